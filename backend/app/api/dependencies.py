@@ -4,14 +4,16 @@ Common API Dependencies
 Reusable dependencies for route handlers to reduce code duplication.
 """
 from typing import Optional, Annotated
-from fastapi import Depends, Query
+from fastapi import Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.security import token_from_request, decode_token
 from app.core.exceptions import NotFoundError
 from app.models.models import Post, User, PostStatus
+from app.services.resolver_service import id_resolver, PostRef
 
 
 async def get_story_or_404(
@@ -77,6 +79,36 @@ async def get_published_story_or_404(
     return story
 
 
+async def get_published_story_ref_or_404(
+    story_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> PostRef:
+    """
+    Resolve a published story to its PostRef or raise 404.
+    
+    For routes that only need the story's id and owner before writing
+    (comments, reactions). The status is read from the database, not the
+    resolver cache, so a story unpublished or deleted through another
+    worker stops taking writes at once.
+    
+    Args:
+        story_id: Public ID of the story
+        db: Database session
+    
+    Returns:
+        PostRef (id, status, user_id, author_token)
+    
+    Raises:
+        NotFoundError: If story doesn't exist or is not published
+    """
+    ref = await id_resolver.post(db, story_id, fresh=True)
+    
+    if not ref or not ref.is_published:
+        raise NotFoundError("Story")
+    
+    return ref
+
+
 async def get_user_or_404(
     user_id: str,
     db: AsyncSession = Depends(get_db)
@@ -105,6 +137,36 @@ async def get_user_or_404(
     return user
 
 
+async def get_reader_id_optional(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+) -> Optional[int]:
+    """
+    Internal id of the signed-in reader, or None.
+    
+    For read routes that only tailor what they show (the personalized
+    feed): the user is resolved through the resolver cache on the route's
+    read session, so no primary session is opened. The token blocklist
+    is not consulted; nothing is disclosed or written on the strength of
+    this id. Routes that act for the user use get_current_user.
+    
+    Args:
+        request: Incoming request (access token cookie or bearer header)
+        db: Read session, shared with the route
+    
+    Returns:
+        The user's internal id, or None if not signed in, unknown or suspended
+    """
+    token = token_from_request(request)
+    payload = decode_token(token) if token else None
+    public_id = payload.get("sub") if payload else None
+    if public_id is None:
+        return None
+    
+    ref = await id_resolver.user(db, public_id)
+    return ref.id if ref and ref.is_active else None
+
+
 class PaginationDep:
     """Pagination parameters dependency"""
     
@@ -5,13 +5,18 @@ Admin and moderator endpoints for content moderation and dashboard
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, date, timezone, timedelta
 from typing import Optional
 from functools import wraps
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.metrics import metrics
 from app.models.models import User, Post, Comment, Support, UserRole, PostStatus
+from app.services.counter_service import CounterService
+from app.services.resolver_service import id_resolver
+from app.services.feed_service import feed_snapshots
+from app.services.stats_service import StatsService
 
 
 router = APIRouter()
@@ -38,62 +43,13 @@ async def get_dashboard_stats(
     db: AsyncSession = Depends(get_db)
 ):
     """Get admin dashboard statistics"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # User statistics
-    total_users_result = await db.execute(select(func.count()).select_from(User))
-    total_users = total_users_result.scalar() or 0
-    
-    new_users_result = await db.execute(
-        select(func.count()).select_from(User).where(User.created_at >= start_date)
-    )
-    new_users = new_users_result.scalar() or 0
-    
-    active_users_result = await db.execute(
-        select(func.count()).select_from(User).where(User.is_active == True)
-    )
-    active_users = active_users_result.scalar() or 0
-    
-    # Story statistics
-    total_stories_result = await db.execute(select(func.count()).select_from(Post))
-    total_stories = total_stories_result.scalar() or 0
-    
-    published_stories_result = await db.execute(
-        select(func.count()).select_from(Post).where(Post.status == PostStatus.PUBLISHED.value)
-    )
-    published_stories = published_stories_result.scalar() or 0
-    
-    flagged_stories_result = await db.execute(
-        select(func.count()).select_from(Post).where(Post.flagged_count > 0)
-    )
-    flagged_stories = flagged_stories_result.scalar() or 0
-    
-    # Reaction statistics
-    total_reactions_result = await db.execute(select(func.count()).select_from(Support))
-    total_reactions = total_reactions_result.scalar() or 0
-    
-    recent_reactions_result = await db.execute(
-        select(func.count()).select_from(Support).where(Support.created_at >= start_date)
-    )
-    recent_reactions = recent_reactions_result.scalar() or 0
-    
-    return {
-        "users": {
-            "total": total_users,
-            "new": new_users,
-            "active": active_users
-        },
-        "stories": {
-            "total": total_stories,
-            "published": published_stories,
-            "flagged": flagged_stories
-        },
-        "reactions": {
-            "total": total_reactions,
-            "recent": recent_reactions
-        },
-        "period_days": days
-    }
+    return await StatsService.dashboard(db, days)
+
+
+@router.get("/metrics")
+async def get_metrics(admin_user: User = Depends(get_admin_user)):
+    """Get this worker's runtime metrics (WebSockets, etc.)"""
+    return {"metrics": metrics.snapshot()}
 
 
 # ========== USER MANAGEMENT ==========
@@ -208,6 +164,7 @@ async def suspend_user(
     
     user.is_active = not user.is_active
     await db.commit()
+    id_resolver.forget_user(user.public_id)
     
     status = "activated" if user.is_active else "suspended"
     return {"message": f"User {status}", "user": user.to_dict()}
@@ -312,6 +269,8 @@ async def moderate_post(
         raise HTTPException(status_code=400, detail="Invalid action. Use: approve, remove, flag")
     
     await db.commit()
+    id_resolver.forget_post(post.public_id)
+    feed_snapshots.invalidate(post.story_type)
     await db.refresh(post)
     
     return {
@@ -395,7 +354,32 @@ async def delete_comment(
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
+    await CounterService.bump(db, Post.comment_count, comment.post_id, -1)
+    await CounterService.bump(db, Comment.reply_count, comment.parent_id, -1)
     await db.delete(comment)
     await db.commit()
     
     return {"message": "Comment deleted successfully"}
+
+
+# ========== MAINTENANCE ==========
+
+@router.post("/maintenance/reconcile-counters")
+async def reconcile_counters(
+    admin_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recompute drifted denormalized counters from source rows (safe to run from cron)"""
+    fixed = await CounterService.reconcile(db)
+    return {"message": "Counters reconciled", "fixed": fixed}
+
+
+@router.post("/maintenance/refresh-stats")
+async def refresh_stats(
+    full: bool = Query(False, description="Rebuild every day instead of the recent ones"),
+    admin_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Refresh the daily_stats rollup behind the dashboard (safe to run from cron)"""
+    days = await StatsService.refresh(db, since=date.min if full else None)
+    return {"message": "Stats refreshed", "days": days}
@@ -4,22 +4,24 @@ Complete migration from Flask auth blueprint
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from datetime import datetime, timezone
 from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import (
     get_password_hash, verify_password, create_access_token, 
     create_refresh_token, get_current_user, decode_token, validate_password
 )
 from app.models.models import User, TokenBlocklist, PostStatus
+from app.models.queries import USER_BY_EMAIL, USER_BY_USERNAME, USER_BY_PUBLIC_ID
 from app.schemas.auth import (
     UserRegistration, UserLogin, TokenResponse, ProfileUpdate, 
     UserResponse, PasswordChange, RefreshToken, DeleteAccount
 )
+from app.services.resolver_service import id_resolver
+from app.services.feed_service import feed_snapshots
 
 
 router = APIRouter()
@@ -109,7 +111,7 @@ async def register(
         )
     
     # Check if email already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
+    result = await db.execute(USER_BY_EMAIL, {'email': user_data.email})
     if result.scalar_one_or_none():
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -117,7 +119,7 @@ async def register(
         )
     
     # Check if username already exists
-    result = await db.execute(select(User).where(User.username == user_data.username))
+    result = await db.execute(USER_BY_USERNAME, {'username': user_data.username})
     if result.scalar_one_or_none():
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -162,7 +164,7 @@ async def login(
 ):
     """Authenticate user and return tokens via HttpOnly cookies"""
     # Find user by email
-    result = await db.execute(select(User).where(User.email == credentials.email))
+    result = await db.execute(USER_BY_EMAIL, {'email': credentials.email})
     user = result.scalar_one_or_none()
     
     if not user or not user.check_password(credentials.password):
@@ -228,8 +230,8 @@ async def refresh_access_token(
         )
     
     user_id = payload.get("sub")
-    result = await db.execute(select(User).where(User.public_id == user_id))
-    user = result.scalar_one_or_none()
+    # Fresh read: a suspension in another worker must stop refreshes at once
+    user = await id_resolver.user(db, user_id, fresh=True)
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -237,7 +239,7 @@ async def refresh_access_token(
             detail="User not found or inactive"
         )
     
-    new_access_token = create_access_token(data={"sub": user.public_id})
+    new_access_token = create_access_token(data={"sub": user_id})
     
     # Set new access_token cookie
     set_auth_cookies(response, new_access_token)
@@ -362,10 +364,10 @@ async def get_user_stats(
 @router.get("/user/{user_id}")
 async def get_public_profile(
     user_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a user's public profile"""
-    result = await db.execute(select(User).where(User.public_id == user_id))
+    result = await db.execute(USER_BY_PUBLIC_ID, {'public_id': user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -374,6 +376,8 @@ async def get_public_profile(
             detail="User not found"
         )
     
+    await db.close()  # connection back to the pool before serialization
+    
     return {"user": user.to_dict()}
 
 
@@ -423,8 +427,11 @@ async def delete_account(
     )
     
     # Finally delete the user
+    public_id = current_user.public_id
     await db.delete(current_user)
     await db.commit()
+    id_resolver.forget_user(public_id, user_id)
+    feed_snapshots.invalidate()
     
     return {"message": "Account deleted successfully"}
 
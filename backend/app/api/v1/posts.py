@@ -3,27 +3,38 @@ FastAPI Posts/Stories Routes
 Refactored to use StoryService and common dependencies
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 from datetime import datetime
 from typing import Optional, List
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user, get_current_user_optional, generate_blind_author_token
 from app.core.exceptions import NotFoundError, ForbiddenError, ValidationError
 from app.api.dependencies import (
-    get_story_or_404, get_published_story_or_404, 
+    get_story_or_404, get_published_story_or_404, get_published_story_ref_or_404, get_reader_id_optional,
     PaginationDep, Pagination, DbSession
 )
 from app.models.models import User, Post, Comment, Support, Bookmark, ReadProgress, PostStatus, StoryType
+from app.models.queries import USER_BY_PUBLIC_ID, STORY_WITH_AUTHOR, PUBLISHED_STORY, POST_TITLE
 from app.schemas.posts import (
     PostCreate, PostUpdate, PostResponse, PostListResponse,
     CommentCreate, CommentResponse, SupportCreate, SupportResponse,
     BookmarkResponse, ReadProgressUpdate
 )
 from app.services.story_service import StoryService, calculate_reading_time
-from app.api.v1.websockets import notify_reaction, notify_comment
+from app.services.listing_service import StoryListing, FeedSort
+from app.services.feed_service import feed_snapshots, new_seed, RANDOM
+from app.services.ranking_service import RankingService
+from app.services.personalization_service import personalized_page
+from app.services.comment_service import CommentThread
+from app.services.counter_service import CounterService, upsert_insert
+from app.services.resolver_service import id_resolver, PostRef
+from app.services.engagement_service import EngagementService, pending_views
+from app.utils.serialization import FastJSONResponse
+from app.api.v1.websockets import notify_reaction, notify_comment, reader_count_stream
 
 
 router = APIRouter()
@@ -59,72 +70,57 @@ async def get_stories(
     story_type: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("smart"),
-    db: AsyncSession = Depends(get_db)
+    sort_by: FeedSort = Query("smart"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page's next_cursor"),
+    seed: Optional[int] = Query(None, ge=0, description="Random order only: the seed from the first page"),
+    db: AsyncSession = Depends(get_read_db),
+    reader_id: Optional[int] = Depends(get_reader_id_optional)
 ):
-    """Get list of published stories with optional filtering and smart ranking"""
-    # Base query with eager loading
-    query = select(Post).options(selectinload(Post.author)).where(
-        Post.status == PostStatus.PUBLISHED.value
-    )
+    """
+    Get list of published stories with optional filtering and smart ranking.
+    A signed-in reader's smart feed is personalized (personalization_service).
+    """
+    listing, extra, algorithm = None, {}, sort_by
+    if sort_by == RANDOM and not cursor:
+        extra["seed"] = seed if seed is not None else new_seed()
+        listing = await feed_snapshots.shuffled_page(db, story_type, extra["seed"], page, per_page)
+    elif sort_by == 'smart' and reader_id and not cursor:
+        listing = await personalized_page(db, reader_id, story_type, page, per_page)
+        if listing is not None:
+            algorithm = "personalized"
+    if listing is None and not cursor:
+        listing = await feed_snapshots.page(db, story_type, sort_by, page, per_page)
+    if listing is None:
+        listing = await (
+            StoryListing.published()
+            .of_type(story_type)
+            .order(sort_by)
+            .fetch(db, page=page, per_page=per_page, cursor=cursor)
+        )
     
-    # Filter by story type
-    if story_type:
-        query = query.where(Post.story_type == story_type)
-    
-    # Apply sorting
-    if sort_by == 'latest':
-        query = query.order_by(desc(Post.published_at))
-    elif sort_by == 'most_viewed':
-        query = query.order_by(desc(Post.view_count))
-    elif sort_by == 'trending':
-        query = query.order_by(desc(Post.support_count), desc(Post.published_at))
-    else:  # smart/gravity sort
-        # Simple gravity sort for now
-        query = query.order_by(desc(Post.rank_score), desc(Post.published_at))
-    
-    # Count total
-    count_query = select(func.count()).select_from(Post).where(Post.status == PostStatus.PUBLISHED.value)
-    if story_type:
-        count_query = count_query.where(Post.story_type == story_type)
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
-    
-    result = await db.execute(query)
-    stories = result.scalars().all()
-    
-    total_pages = (total + per_page - 1) // per_page
+    await db.close()  # connection back to the pool before serialization
     
-    return {
-        "stories": [s.to_dict() for s in stories],
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "total_pages": total_pages,
-        "has_next": page < total_pages,
-        "has_prev": page > 1,
-        "next_page": page + 1 if page < total_pages else None,
-        "prev_page": page - 1 if page > 1 else None,
-        "ranking_algorithm": sort_by
-    }
+    return FastJSONResponse({
+        "stories": listing.to_rows(),
+        **listing.pagination(),
+        "ranking_algorithm": algorithm,
+        **extra
+    })
 
 
 @router.get("/featured")
-async def get_featured_stories(db: AsyncSession = Depends(get_db)):
+async def get_featured_stories(db: AsyncSession = Depends(get_read_db)):
     """Get featured stories"""
-    query = select(Post).options(selectinload(Post.author)).where(
-        Post.status == PostStatus.PUBLISHED.value,
-        Post.is_featured == True
-    ).order_by(desc(Post.featured_at)).limit(10)
+    listing = await (
+        StoryListing.published()
+        .featured()
+        .order('featured')
+        .fetch(db, per_page=10, with_total=False)
+    )
     
-    result = await db.execute(query)
-    stories = result.scalars().all()
+    await db.close()  # connection back to the pool before serialization
     
-    return {"featured_stories": [s.to_dict() for s in stories]}
+    return FastJSONResponse({"featured_stories": listing.to_rows()})
 
 
 @router.get("/drafts")
@@ -135,33 +131,21 @@ async def get_user_drafts(
     db: AsyncSession = Depends(get_db)
 ):
     """Get current user's draft stories"""
-    query = select(Post).where(
-        Post.user_id == current_user.id,
-        Post.status == PostStatus.DRAFT.value
-    ).order_by(desc(Post.updated_at))
-    
-    # Count
-    count_query = select(func.count()).select_from(Post).where(
-        Post.user_id == current_user.id,
-        Post.status == PostStatus.DRAFT.value
+    listing = await (
+        StoryListing(PostStatus.DRAFT.value)
+        .by_author(current_user.id)
+        .order('updated')
+        .without_author()
+        .fetch(db, page=page, per_page=per_page)
     )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
-    
-    result = await db.execute(query)
-    drafts = result.scalars().all()
     
-    return {
-        "drafts": [d.to_dict() for d in drafts],
-        "total": total,
+    return FastJSONResponse({
+        "drafts": listing.to_rows(),
+        "total": listing.total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
+        "total_pages": listing.total_pages
+    })
 
 
 # ========== BOOKMARKS (must be before /{story_id} route) ==========
@@ -174,36 +158,34 @@ async def get_bookmarked_stories(
     db: AsyncSession = Depends(get_db)
 ):
     """Get all stories bookmarked by the current user"""
-    offset = (page - 1) * per_page
-    
-    # Query bookmarks with joined posts
-    query = select(Post).options(selectinload(Post.author)).join(Bookmark).where(
-        Bookmark.user_id == current_user.id,
-        Post.status == PostStatus.PUBLISHED.value
+    listing = await (
+        StoryListing.published()
+        .bookmarked_by(current_user.id)
+        .fetch(db, page=page, per_page=per_page)
     )
     
-    # Calculate total count before pagination
-    count_query = select(func.count()).select_from(Post).join(Bookmark).where(
-        Bookmark.user_id == current_user.id,
-        Post.status == PostStatus.PUBLISHED.value
-    )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Apply pagination and ordering
-    query = query.order_by(desc(Bookmark.created_at)).offset(offset).limit(per_page)
-    
-    # Execute query
-    result = await db.execute(query)
-    posts = result.scalars().all()
-    
-    return {
-        "items": [post.to_dict() for post in posts],
-        "total": total,
+    return FastJSONResponse({
+        "items": listing.to_rows(),
+        "total": listing.total,
         "page": page,
         "size": per_page,
-        "pages": (total + per_page - 1) // per_page if total > 0 else 0
-    }
+        "pages": listing.total_pages
+    })
+
+
+@router.get("/my-state")
+async def get_my_story_states(
+    ids: str = Query(..., description="Comma-separated story ids"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Current user's reaction, bookmark and read progress for a batch of stories (feed cards)"""
+    story_ids = list(dict.fromkeys(i.strip() for i in ids.split(',') if i.strip()))
+    if len(story_ids) > settings.STORY_STATE_MAX_IDS:
+        raise ValidationError(f"At most {settings.STORY_STATE_MAX_IDS} story ids per request")
+    
+    states = await StoryService.get_user_states(db, story_ids, current_user.id)
+    return FastJSONResponse({"states": states})
 
 
 @router.get("/search")
@@ -211,45 +193,26 @@ async def search_stories(
     q: str = Query(..., min_length=2),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Search stories by title or content"""
-    search_term = f"%{q}%"
-    
-    query = select(Post).options(selectinload(Post.author)).where(
-        Post.status == PostStatus.PUBLISHED.value,
-        or_(
-            Post.title.ilike(search_term),
-            Post.content.ilike(search_term)
-        )
-    ).order_by(desc(Post.published_at))
-    
-    # Count
-    count_query = select(func.count()).select_from(Post).where(
-        Post.status == PostStatus.PUBLISHED.value,
-        or_(
-            Post.title.ilike(search_term),
-            Post.content.ilike(search_term)
-        )
+    listing = await (
+        StoryListing.published()
+        .matching(q)
+        .order('latest')
+        .fetch(db, page=page, per_page=per_page)
     )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
     
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
+    await db.close()  # connection back to the pool before serialization
     
-    result = await db.execute(query)
-    stories = result.scalars().all()
-    
-    return {
-        "results": [s.to_dict() for s in stories],
+    return FastJSONResponse({
+        "results": listing.to_rows(),
         "query": q,
-        "total": total,
+        "total": listing.total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
+        "total_pages": listing.total_pages
+    })
 
 
 @router.get("/category/{story_type}")
@@ -257,7 +220,7 @@ async def get_stories_by_category(
     story_type: str,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get stories filtered by category"""
     # Validate story type
@@ -265,34 +228,25 @@ async def get_stories_by_category(
     if story_type not in valid_types:
         raise HTTPException(status_code=400, detail="Invalid story type")
     
-    query = select(Post).options(selectinload(Post.author)).where(
-        Post.status == PostStatus.PUBLISHED.value,
-        Post.story_type == story_type
-    ).order_by(desc(Post.published_at))
-    
-    # Count
-    count_query = select(func.count()).select_from(Post).where(
-        Post.status == PostStatus.PUBLISHED.value,
-        Post.story_type == story_type
-    )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
+    listing = await feed_snapshots.page(db, story_type, 'latest', page, per_page)
+    if listing is None:
+        listing = await (
+            StoryListing.published()
+            .of_type(story_type)
+            .order('latest')
+            .fetch(db, page=page, per_page=per_page)
+        )
     
-    result = await db.execute(query)
-    stories = result.scalars().all()
+    await db.close()  # connection back to the pool before serialization
     
-    return {
-        "stories": [s.to_dict() for s in stories],
+    return FastJSONResponse({
+        "stories": listing.to_rows(),
         "category": story_type,
-        "total": total,
+        "total": listing.total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
+        "total_pages": listing.total_pages
+    })
 
 
 
@@ -301,40 +255,28 @@ async def get_user_stories(
     user_id: str,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all published stories by a specific user"""
     # Find user
-    user_result = await db.execute(select(User).where(User.public_id == user_id))
+    user_result = await db.execute(USER_BY_PUBLIC_ID, {'public_id': user_id})
     user = user_result.scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    query = select(Post).where(
-        Post.user_id == user.id,
-        Post.status == PostStatus.PUBLISHED.value,
-        Post.is_anonymous == False
-    ).order_by(desc(Post.published_at))
-    
-    # Count
-    count_query = select(func.count()).select_from(Post).where(
-        Post.user_id == user.id,
-        Post.status == PostStatus.PUBLISHED.value,
-        Post.is_anonymous == False
+    listing = await (
+        StoryListing.published()
+        .by_author(user.id, include_anonymous=False)
+        .order('latest')
+        .without_author()
+        .fetch(db, page=page, per_page=per_page)
     )
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
     
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
+    await db.close()  # connection back to the pool before serialization
     
-    result = await db.execute(query)
-    stories = result.scalars().all()
-    
-    return {
-        "stories": [s.to_dict() for s in stories],
+    return FastJSONResponse({
+        "stories": listing.to_rows(),
         "author": {
             "id": user.public_id,
             "username": user.username,
@@ -342,11 +284,11 @@ async def get_user_stories(
             "author_bio": user.author_bio,
             "is_featured_author": user.is_featured_author
         },
-        "total": total,
+        "total": listing.total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
+        "total_pages": listing.total_pages
+    })
 
 
 @router.get("/{story_id}")
@@ -356,8 +298,7 @@ async def get_story(
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get a single story by ID and increment view count"""
-    query = select(Post).options(selectinload(Post.author)).where(Post.public_id == story_id)
-    result = await db.execute(query)
+    result = await db.execute(STORY_WITH_AUTHOR, {'public_id': story_id})
     story = result.scalar_one_or_none()
     
     if not story:
@@ -371,10 +312,12 @@ async def get_story(
             raise HTTPException(status_code=404, detail="Story not found")
         return {"story": story.to_dict()}
     
-    # Increment view count only for published stories
-    story.view_count += 1
-    await db.commit()
+    # Count views only for published stories: tallied in memory and written
+    # in bulk by the counter flusher (a hot story would queue on its row)
+    pending_views.add(story.id)
     
+    await CounterService.read(db, story)
+    CounterService.overlay(story, {'view_count': pending_views.pending(story.id)})
     return {"story": story.to_dict()}
 
 
@@ -429,6 +372,28 @@ async def delete_story(
     return {"message": "Story shredded and deleted successfully"}
 
 
+@router.get("/{story_id}/live")
+async def stream_live_readers(
+    story_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-Sent Events stream of the live reader count (lighter than /ws)"""
+    await get_published_story_ref_or_404(story_id, db)
+    
+    # Release the pooled connection - the stream can stay open for minutes
+    await db.commit()
+    
+    return StreamingResponse(
+        reader_count_stream(story_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 # ========== COMMENTS ==========
 
 @router.post("/{story_id}/comments", status_code=status.HTTP_201_CREATED)
@@ -439,16 +404,7 @@ async def add_comment(
     db: AsyncSession = Depends(get_db)
 ):
     """Add a comment to a story"""
-    # Find story
-    story_query = select(Post).where(
-        Post.public_id == story_id,
-        Post.status == PostStatus.PUBLISHED.value
-    )
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
-    
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
+    story = await get_published_story_ref_or_404(story_id, db)
     
     # Handle parent comment
     parent_id = None
@@ -470,8 +426,9 @@ async def add_comment(
     
     db.add(comment)
     
-    # Update comment count
-    story.comment_count = (story.comment_count or 0) + 1
+    # Update comment counts atomically in SQL
+    await CounterService.bump(db, Post.comment_count, story.id)
+    await CounterService.bump(db, Comment.reply_count, parent_id)
     
     await db.commit()
     await db.refresh(comment)
@@ -488,12 +445,14 @@ async def add_comment(
     # Send real-time notification to story author (if not commenting on own story)
     if story.user_id != current_user.id:
         commenter_name = "Anonymous" if comment_data.is_anonymous else current_user.username
+        story_title = await db.scalar(POST_TITLE, {'post_id': story.id})
         await notify_comment(
             story_author_id=story.user_id,
-            story_id=story.public_id,
-            story_title=story.title,
+            story_id=story_id,
+            story_title=story_title or "",
             commenter_username=commenter_name,
-            comment_preview=comment_data.content
+            comment_preview=comment_data.content,
+            db=db
         )
     
     return {
@@ -512,33 +471,42 @@ async def add_comment(
 @router.get("/{story_id}/comments")
 async def get_comments(
     story_id: str,
-    db: AsyncSession = Depends(get_db)
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    parent_id: Optional[str] = Query(None, description="Continue the thread below this comment"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get comments for a story"""
+    """Get a window of the comment thread for a story, replies nested"""
     # Find story
-    story_query = select(Post).where(
-        Post.public_id == story_id,
-        Post.status == PostStatus.PUBLISHED.value
-    )
-    result = await db.execute(story_query)
+    result = await db.execute(PUBLISHED_STORY, {'public_id': story_id})
     story = result.scalar_one_or_none()
     
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     
-    # Get top-level comments
-    comments_query = select(Comment).options(
-        selectinload(Comment.author),
-        selectinload(Comment.replies)
-    ).where(
-        Comment.post_id == story.id,
-        Comment.parent_id == None
-    ).order_by(Comment.created_at)
+    parent = None
+    if parent_id:
+        parent_result = await db.execute(
+            select(Comment.id).where(Comment.public_id == parent_id, Comment.post_id == story.id)
+        )
+        parent = parent_result.scalar_one_or_none()
+        if parent is None:
+            raise HTTPException(status_code=404, detail="Comment not found")
+    
+    thread = CommentThread(story.id, parent_id=parent)
+    window = await thread.fetch(db, page=page, per_page=per_page)
+    total = await thread.count(db)
     
-    result = await db.execute(comments_query)
-    comments = result.scalars().all()
+    await db.close()  # connection back to the pool before serialization
     
-    return {"comments": [c.to_dict() for c in comments], "total": len(comments)}
+    return FastJSONResponse({
+        "comments": window.items,
+        "total": total,  # comments at the paged level, as before threading
+        "comment_count": story.comment_count or 0,  # including replies
+        "page": page,
+        "per_page": per_page,
+        "has_next": window.has_next
+    })
 
 
 # ========== REACTIONS/SUPPORT ==========
@@ -550,47 +518,40 @@ async def react_to_story(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Add a reaction to a story"""
-    # Find story
-    story_query = select(Post).where(
-        Post.public_id == story_id,
-        Post.status == PostStatus.PUBLISHED.value
-    )
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
-    
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
-    
-    # Check if already reacted with this type
-    existing_query = select(Support).where(
-        Support.giver_id == current_user.id,
-        Support.post_id == story.id,
-        Support.support_type == support_data.support_type
+    """Add a reaction to a story (one per user per story; /toggle-react changes it)"""
+    story = await get_published_story_ref_or_404(story_id, db)
+    
+    # The unique (giver_id, post_id) index decides, so two concurrent
+    # requests can't both add one
+    now = datetime.utcnow()
+    added = await db.execute(
+        upsert_insert(db)(Support)
+        .values(
+            support_type=support_data.support_type,
+            message=support_data.message,
+            giver_id=current_user.id,
+            receiver_id=story.user_id,
+            post_id=story.id,
+            created_at=now
+        )
+        .on_conflict_do_nothing()
+        .returning(Support.id)
     )
-    result = await db.execute(existing_query)
-    existing = result.scalar_one_or_none()
+    reaction_id = added.scalar_one_or_none()
+    if reaction_id is None:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Already reacted to this story")
     
-    if existing:
-        raise HTTPException(status_code=409, detail="Already reacted with this type")
+    # Update support count (sharded, no posts row lock)
+    await CounterService.add(db, story.id, 'support_count')
+    await EngagementService.record(db, story.id, reactions=1)
     
-    # Create reaction
+    await db.commit()
     reaction = Support(
-        support_type=support_data.support_type,
-        message=support_data.message,
-        giver_id=current_user.id,
-        receiver_id=story.user_id,
-        post_id=story.id
+        id=reaction_id, support_type=support_data.support_type, message=support_data.message,
+        created_at=now, giver=current_user
     )
     
-    db.add(reaction)
-    
-    # Update support count
-    story.support_count = (story.support_count or 0) + 1
-    
-    await db.commit()
-    await db.refresh(reaction)
-    
     return {"message": "Reaction added successfully", "reaction": reaction.to_dict()}
 
 
@@ -602,81 +563,43 @@ async def toggle_reaction(
     db: AsyncSession = Depends(get_db)
 ):
     """Toggle reaction - add if not exists, remove if same type, change if different type"""
-    # Find story
-    story_query = select(Post).where(
-        Post.public_id == story_id,
-        Post.status == PostStatus.PUBLISHED.value
+    result = await StoryService.toggle_reaction(
+        db=db,
+        story_id=story_id,
+        user=current_user,
+        support_type=support_data.support_type,
+        message=support_data.message
     )
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
     
-    if not story:
+    if result is None:
         raise HTTPException(status_code=404, detail="Story not found")
     
-    # Check if user already has ANY reaction on this story
-    existing_query = select(Support).where(
-        Support.giver_id == current_user.id,
-        Support.post_id == story.id
-    )
-    result = await db.execute(existing_query)
-    existing = result.scalar_one_or_none()
-    
-    if existing:
-        if existing.support_type == support_data.support_type:
-            # Same reaction type - remove it (toggle off)
-            await db.delete(existing)
-            story.support_count = max(0, (story.support_count or 0) - 1)
-            await db.commit()
-            return {
-                "message": "Reaction removed",
-                "action": "removed",
-                "support_count": story.support_count,
-                "user_reaction": None
-            }
-        else:
-            # Different reaction type - update it (count stays same)
-            existing.support_type = support_data.support_type
-            existing.message = support_data.message
-            await db.commit()
-            await db.refresh(existing)
-            return {
-                "message": "Reaction changed",
-                "action": "changed",
-                "reaction": existing.to_dict(),
-                "support_count": story.support_count,
-                "user_reaction": support_data.support_type
-            }
-    else:
-        # No existing reaction - add new one
-        reaction = Support(
-            support_type=support_data.support_type,
-            message=support_data.message,
-            giver_id=current_user.id,
-            receiver_id=story.user_id,
-            post_id=story.id
-        )
-        db.add(reaction)
-        story.support_count = (story.support_count or 0) + 1
-        await db.commit()
-        await db.refresh(reaction)
-        
-        # Send real-time notification to story author (if not reacting to own story)
-        if story.user_id != current_user.id:
-            await notify_reaction(
-                story_author_id=story.user_id,
-                story_id=story.public_id,
-                story_title=story.title,
-                reactor_username=current_user.username,
-                reaction_type=support_data.support_type
-            )
-        
+    if result['action'] == 'removed':
         return {
-            "message": "Reaction added",
-            "action": "added",
-            "reaction": reaction.to_dict(),
-            "support_count": story.support_count,
-            "user_reaction": support_data.support_type
+            "message": "Reaction removed",
+            "action": "removed",
+            "support_count": result['support_count'],
+            "user_reaction": None
         }
+    
+    # Send real-time notification to story author (if not reacting to own story)
+    if result['action'] == 'added' and result['story_user_id'] != current_user.id:
+        await notify_reaction(
+            story_author_id=result['story_user_id'],
+            story_id=story_id,
+            story_title=result['story_title'],
+            reactor_username=current_user.username,
+            reaction_type=support_data.support_type,
+            db=db
+        )
+    
+    return {
+        "message": "Reaction added" if result['action'] == 'added' else "Reaction changed",
+        "action": result['action'],
+        "reaction": result['reaction'],
+        "support_count": result['support_count'],
+        "user_reaction": support_data.support_type
+    }
 
 
 @router.get("/{story_id}/my-reaction")
@@ -686,10 +609,7 @@ async def get_my_reaction(
     db: AsyncSession = Depends(get_db)
 ):
     """Get current user's reaction on a story"""
-    # Find story
-    story_query = select(Post).where(Post.public_id == story_id)
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
+    story = await id_resolver.post(db, story_id)
     
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
@@ -716,39 +636,14 @@ async def toggle_bookmark(
     db: AsyncSession = Depends(get_db)
 ):
     """Toggle bookmark/save status for a story"""
-    # Find story
-    story_query = select(Post).where(Post.public_id == story_id)
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
+    is_bookmarked, save_count = await RankingService.toggle_bookmark(db, story_id, current_user.id)
     
-    if not story:
+    if is_bookmarked is None:
         raise HTTPException(status_code=404, detail="Story not found")
     
-    # Check if already bookmarked
-    bookmark_query = select(Bookmark).where(
-        Bookmark.user_id == current_user.id,
-        Bookmark.post_id == story.id
-    )
-    result = await db.execute(bookmark_query)
-    existing = result.scalar_one_or_none()
-    
-    if existing:
-        # Remove bookmark
-        await db.delete(existing)
-        story.save_count = max(0, (story.save_count or 0) - 1)
-        is_bookmarked = False
-    else:
-        # Add bookmark
-        bookmark = Bookmark(user_id=current_user.id, post_id=story.id)
-        db.add(bookmark)
-        story.save_count = (story.save_count or 0) + 1
-        is_bookmarked = True
-    
-    await db.commit()
-    
     return {
         "is_bookmarked": is_bookmarked,
-        "save_count": story.save_count,
+        "save_count": save_count,
         "message": "Bookmark added" if is_bookmarked else "Bookmark removed"
     }
 
@@ -760,10 +655,7 @@ async def get_bookmark_status(
     db: AsyncSession = Depends(get_db)
 ):
     """Check if story is bookmarked by current user"""
-    # Find story
-    story_query = select(Post).where(Post.public_id == story_id)
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
+    story = await id_resolver.post(db, story_id)
     
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
@@ -778,7 +670,7 @@ async def get_bookmark_status(
     
     return {
         "is_bookmarked": bookmark is not None,
-        "save_count": story.save_count or 0
+        "save_count": await CounterService.value(db, story.id, 'save_count')
     }
 
 
@@ -788,20 +680,14 @@ async def get_bookmark_status(
 async def track_read_progress(
     story_id: str,
     progress_data: ReadProgressUpdate,
+    story: PostRef = Depends(get_published_story_ref_or_404),
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Track reading progress for engagement metrics (works with or without auth)"""
-    # Find story
-    story_query = select(Post).where(Post.public_id == story_id)
-    result = await db.execute(story_query)
-    story = result.scalar_one_or_none()
-    
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
-    
     # Update view count
-    story.view_count += 1
+    await CounterService.bump(db, Post.view_count, story.id)
+    engagement = {'views': 1}
     
     if current_user:
         # Check existing progress
@@ -816,17 +702,23 @@ async def track_read_progress(
             # Update existing progress
             existing.read_count += 1
             existing.last_read = datetime.utcnow()
-            story.reread_count += 1
+            await CounterService.bump(db, Post.reread_count, story.id)
+            engagement['rereads'] = 1
             
             if progress_data.scroll_depth:
                 existing.scroll_depth = max(existing.scroll_depth, progress_data.scroll_depth)
             if progress_data.time_spent:
                 existing.time_spent = (existing.time_spent + progress_data.time_spent) // 2
             if progress_data.scroll_depth and progress_data.scroll_depth >= 0.9:
+                if not existing.completed:
+                    engagement['completions'] = 1
                 existing.completed = True
         else:
             # Create new progress record
-            story.unique_readers += 1
+            await CounterService.bump(db, Post.unique_readers, story.id)
+            engagement['reads'] = 1
+            if (progress_data.scroll_depth or 0) >= 0.9:
+                engagement['completions'] = 1
             progress = ReadProgress(
                 user_id=current_user.id,
                 post_id=story.id,
@@ -836,6 +728,7 @@ async def track_read_progress(
             )
             db.add(progress)
     
+    await EngagementService.record(db, story.id, **engagement)
     await db.commit()
     
     return {
@@ -844,3 +737,29 @@ async def track_read_progress(
         "time_spent": progress_data.time_spent
     }
 
+
+# ========== ANALYTICS ==========
+
+@router.get("/{story_id}/analytics")
+async def get_story_analytics(
+    story_id: str,
+    days: int = Query(30, ge=1, le=365),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Engagement over time for the story's author (pre-aggregated buckets)"""
+    # Read fresh: the ownership check must not trust another worker's stale entry
+    story = await id_resolver.post(db, story_id, fresh=True)
+    
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    
+    expected_token = generate_blind_author_token(current_user.public_id, story_id)
+    is_author = (story.user_id == current_user.id) or (story.author_token == expected_token) or (current_user.role == 'admin')
+    if not is_author:
+        raise ForbiddenError("Only the author can view story analytics")
+    
+    analytics = await EngagementService.series(db, story.id, days, granularity)
+    return FastJSONResponse({"story_id": story_id, "days": days, **analytics})
+
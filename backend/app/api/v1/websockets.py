@@ -2,57 +2,211 @@
 WebSocket Manager for Real-Time Features
 - Real-time notifications (reactions, comments)
 - Live reader tracking
+- Server-driven heartbeats, idle reaping and connection limits
+- Batched notification frames with an offline inbox
+- Server-Sent Events stream of live reader counts
 """
 
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Set, Optional
+from typing import Dict, Set, List, Optional, Callable, Awaitable, AsyncIterator
+import itertools
 import json
+import time
 import asyncio
 
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.metrics import metrics
+from app.models.models import Notification
+
+
+class ClientConnection:
+    """A single accepted socket with its outbound queue and liveness state"""
+
+    def __init__(self, websocket: WebSocket, user_id: int, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.last_seen = time.monotonic()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: Optional[asyncio.Task] = None
+
+    def touch(self):
+        """Mark the connection as alive (any inbound frame counts)"""
+        self.last_seen = time.monotonic()
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time notifications"""
-    
-    def __init__(self):
-        # Map user_id to their WebSocket connection
-        self.active_connections: Dict[int, WebSocket] = {}
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_connections_per_user: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        queue_size: Optional[int] = None
+    ):
+        # Map user_id to their open WebSocket connections (one per tab/device)
+        self.active_connections: Dict[int, Set[ClientConnection]] = {}
         # Map story_id to set of user_ids currently reading
         self.story_readers: Dict[int, Set[int]] = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: int):
-        """Accept a new WebSocket connection"""
+
+        self.max_connections = max_connections or settings.WS_MAX_CONNECTIONS
+        self.max_connections_per_user = max_connections_per_user or settings.WS_MAX_CONNECTIONS_PER_USER
+        self.idle_timeout = idle_timeout or settings.WS_IDLE_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.WS_HEARTBEAT_INTERVAL
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # SSE readers have no user id, so each stream gets its own reader key
+        self._stream_ids = itertools.count(1)
+        self.stream_count = 0
+
+    # Connection lifecycle
+    def connection_count(self) -> int:
+        """Number of live sockets on this worker"""
+        return sum(len(conns) for conns in self.active_connections.values())
+
+    def is_connected(self, user_id: int) -> bool:
+        """Check whether the user has at least one open socket"""
+        return bool(self.active_connections.get(user_id))
+
+    def queue_depth(self) -> int:
+        """Total frames waiting in outbound queues"""
+        return sum(
+            conn.queue.qsize()
+            for conns in self.active_connections.values()
+            for conn in conns
+        )
+
+    async def connect(self, websocket: WebSocket, user_id: int) -> Optional[ClientConnection]:
+        """Accept a new WebSocket connection, or reject it if over the limits"""
+        if self.connection_count() >= self.max_connections:
+            metrics.inc("ws.rejected")
+            await websocket.close(code=1013, reason="Server busy")
+            return None
+
+        if len(self.active_connections.get(user_id, ())) >= self.max_connections_per_user:
+            metrics.inc("ws.rejected")
+            await websocket.close(code=1008, reason="Too many connections")
+            return None
+
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-    
-    def disconnect(self, user_id: int):
-        """Remove a WebSocket connection"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        # Also remove from any story reader lists
-        for story_id, readers in self.story_readers.items():
-            readers.discard(user_id)
-    
-    async def send_notification(self, user_id: int, notification: dict):
-        """Send a notification to a specific user"""
-        if user_id in self.active_connections:
+        connection = ClientConnection(websocket, user_id, self.queue_size)
+        connection.sender = asyncio.create_task(self._sender(connection))
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        metrics.inc("ws.connected")
+        return connection
+
+    def disconnect(self, user_id: int, connection: Optional[ClientConnection] = None):
+        """Remove one WebSocket connection, or all of a user's connections"""
+        conns = self.active_connections.get(user_id)
+        if conns is not None:
+            removed = [connection] if connection is not None else list(conns)
+            for conn in removed:
+                if conn in conns:
+                    conns.discard(conn)
+                    if conn.sender and conn.sender is not asyncio.current_task():
+                        conn.sender.cancel()
+            if not conns:
+                del self.active_connections[user_id]
+
+        # Readers are tracked per user, so only drop them with the last socket
+        if user_id not in self.active_connections:
+            for story_id in list(self.story_readers):
+                self.remove_reader(story_id, user_id)
+
+    async def _sender(self, connection: ClientConnection):
+        """Drain a connection's outbound queue so slow sockets never block callers"""
+        try:
+            while True:
+                message = await connection.queue.get()
+                await connection.websocket.send_json(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Connection might be closed, remove it
+            self.disconnect(connection.user_id, connection)
+
+    def _enqueue(self, connection: ClientConnection, message: dict):
+        """Queue a frame for a connection, dropping the socket if it can't keep up"""
+        try:
+            connection.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            metrics.inc("ws.dropped_slow")
+            asyncio.ensure_future(self._close(connection, code=1008, reason="Send queue full"))
+
+    async def _close(self, connection: ClientConnection, code: int = 1000, reason: str = ""):
+        """Close a socket and forget it"""
+        self.disconnect(connection.user_id, connection)
+        try:
+            await connection.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    # Heartbeats and idle reaping
+    async def heartbeat(self) -> int:
+        """Reap idle sockets and ping the rest. Returns the number reaped."""
+        now = time.monotonic()
+        reaped = 0
+        for conns in list(self.active_connections.values()):
+            for conn in list(conns):
+                if now - conn.last_seen > self.idle_timeout:
+                    await self._close(conn, code=1001, reason="Idle timeout")
+                    reaped += 1
+                else:
+                    self._enqueue(conn, {"type": "ping"})
+        if reaped:
+            metrics.inc("ws.reaped", reaped)
+        return reaped
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
             try:
-                await self.active_connections[user_id].send_json(notification)
+                await self.heartbeat()
             except Exception:
-                # Connection might be closed, remove it
-                self.disconnect(user_id)
-    
+                # Never let one bad socket kill the reaper
+                pass
+
+    def start(self):
+        """Start the heartbeat/reaper task (called from the app lifespan)"""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._run_heartbeat())
+
+    async def stop(self):
+        """Stop the heartbeat task and close every socket"""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for conns in list(self.active_connections.values()):
+            for conn in list(conns):
+                await self._close(conn, code=1001, reason="Server shutdown")
+
+    # Delivery
+    async def send_to_connection(self, connection: ClientConnection, message: dict):
+        """Send a frame to one specific socket"""
+        self._enqueue(connection, message)
+
+    async def send_notification(self, user_id: int, notification: dict):
+        """Send a notification to a specific user"""
+        for conn in list(self.active_connections.get(user_id, ())):
+            self._enqueue(conn, notification)
+
     async def broadcast_to_users(self, user_ids: list, notification: dict):
         """Send notification to multiple users"""
         for user_id in user_ids:
             await self.send_notification(user_id, notification)
-    
+
     # Live Reader Tracking
     def add_reader(self, story_id: int, user_id: int):
         """Track a user reading a story"""
         if story_id not in self.story_readers:
             self.story_readers[story_id] = set()
         self.story_readers[story_id].add(user_id)
-    
+
     def remove_reader(self, story_id: int, user_id: int):
         """Remove a user from story readers"""
         if story_id in self.story_readers:
@@ -60,17 +214,32 @@ class ConnectionManager:
             # Clean up empty sets
             if not self.story_readers[story_id]:
                 del self.story_readers[story_id]
-    
+
+    def add_stream_reader(self, story_id) -> str:
+        """Register an SSE stream as a reader and return its reader key"""
+        reader_key = f"sse:{next(self._stream_ids)}"
+        self.add_reader(story_id, reader_key)
+        self.stream_count += 1
+        return reader_key
+
+    def remove_stream_reader(self, story_id, reader_key: str):
+        """Unregister an SSE stream"""
+        self.remove_reader(story_id, reader_key)
+        self.stream_count -= 1
+
     def get_reader_count(self, story_id: int) -> int:
         """Get the number of users currently reading a story"""
         return len(self.story_readers.get(story_id, set()))
-    
+
     async def broadcast_reader_count(self, story_id: int):
         """Broadcast updated reader count to all readers of a story"""
         count = self.get_reader_count(story_id)
         readers = self.story_readers.get(story_id, set())
-        
-        for user_id in readers:
+
+        for user_id in list(readers):
+            if isinstance(user_id, str):
+                # SSE streams poll the count themselves
+                continue
             await self.send_notification(user_id, {
                 "type": "reader_count",
                 "story_id": story_id,
@@ -78,8 +247,173 @@ class ConnectionManager:
             })
 
 
+class NotificationDispatcher:
+    """
+    Coalesces a user's notifications into single frames.
+    
+    Events for an online user are buffered for a short window and sent as
+    one {"type": "notifications", "items": [...]} frame. Events for an
+    offline user are parked in the notifications inbox and replayed in
+    acked chunks when they reconnect, so nothing is lost.
+    """
+    
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        window_ms: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        replay_chunk: Optional[int] = None,
+        session_factory=None
+    ):
+        self.manager = manager
+        self.window = (window_ms if window_ms is not None else settings.NOTIFICATION_BATCH_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.NOTIFICATION_BATCH_MAX
+        self.replay_chunk = replay_chunk or settings.NOTIFICATION_REPLAY_CHUNK
+        self.session_factory = session_factory or async_session_maker
+        self._pending: Dict[int, List[dict]] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+    
+    async def publish(self, user_id: Optional[int], notification: dict, db: Optional[AsyncSession] = None):
+        """Queue a notification for a user, or park it in the inbox if offline"""
+        if not user_id:
+            return
+        
+        if not self.manager.is_connected(user_id):
+            if db is None:
+                metrics.inc("notifications.dropped")
+                return
+            await self._store(db, user_id, [notification])
+            return
+        
+        pending = self._pending.setdefault(user_id, [])
+        pending.append(notification)
+        if len(pending) >= self.max_batch:
+            await self.flush(user_id)
+        elif user_id not in self._timers:
+            self._timers[user_id] = asyncio.create_task(self._flush_later(user_id))
+    
+    async def _flush_later(self, user_id: int):
+        await asyncio.sleep(self.window)
+        await self.flush(user_id)
+    
+    async def flush(self, user_id: int):
+        """Send everything pending for a user as one frame"""
+        timer = self._timers.pop(user_id, None)
+        if timer and timer is not asyncio.current_task():
+            timer.cancel()
+        
+        items = self._pending.pop(user_id, None)
+        if not items:
+            return
+        
+        if self.manager.is_connected(user_id):
+            await self.manager.send_notification(user_id, {"type": "notifications", "items": items})
+            metrics.inc("notifications.frames")
+            metrics.inc("notifications.delivered", len(items))
+        else:
+            # User went offline inside the batch window
+            async with self.session_factory() as db:
+                await self._store(db, user_id, items)
+    
+    async def drain(self):
+        """Flush every pending batch (called on shutdown)"""
+        for user_id in list(self._pending):
+            await self.flush(user_id)
+    
+    async def _store(self, db: AsyncSession, user_id: int, items: List[dict]):
+        db.add_all([Notification(user_id=user_id, payload=item) for item in items])
+        await db.commit()
+        metrics.inc("notifications.stored", len(items))
+    
+    # Offline inbox replay
+    async def replay(self, db: AsyncSession, connection: ClientConnection, cursor: Optional[int] = None) -> int:
+        """
+        Send the next chunk of parked notifications after `cursor`.
+        
+        The frame carries the last inbox id as its cursor; the client acks it
+        and gets the following chunk, so a large backlog never floods the
+        socket's send queue. Returns the number of notifications sent.
+        """
+        result = await db.execute(
+            select(Notification.id, Notification.payload).where(
+                Notification.user_id == connection.user_id,
+                Notification.id > (cursor or 0)
+            ).order_by(Notification.id).limit(self.replay_chunk + 1)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+        
+        has_more = len(rows) > self.replay_chunk
+        rows = rows[:self.replay_chunk]
+        await self.manager.send_to_connection(connection, {
+            "type": "notifications",
+            "items": [row.payload for row in rows],
+            "cursor": rows[-1].id,
+            "has_more": has_more
+        })
+        metrics.inc("notifications.replayed", len(rows))
+        return len(rows)
+    
+    async def ack(self, db: AsyncSession, connection: ClientConnection, cursor: int) -> int:
+        """Delete inbox rows up to `cursor` and send the next chunk"""
+        await db.execute(
+            delete(Notification).where(
+                Notification.user_id == connection.user_id,
+                Notification.id <= cursor
+            )
+        )
+        await db.commit()
+        return await self.replay(db, connection, cursor)
+
+
 # Global connection manager instance
 manager = ConnectionManager()
+dispatcher = NotificationDispatcher(manager)
+
+metrics.register_gauge("ws.connections", manager.connection_count)
+metrics.register_gauge("ws.queue_depth", manager.queue_depth)
+metrics.register_gauge("ws.stories_tracked", lambda: len(manager.story_readers))
+metrics.register_gauge("sse.streams", lambda: manager.stream_count)
+
+
+async def reader_count_stream(
+    story_id: str,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    interval: Optional[float] = None,
+    keepalive: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events feed of a story's live reader count.
+    
+    Registers the stream in the shared reader registry, then emits a
+    `reader_count` event only when the count changed since the last tick,
+    plus a comment line every `keepalive` seconds so proxies keep it open.
+    """
+    interval = interval or settings.SSE_UPDATE_INTERVAL
+    keepalive = keepalive or settings.SSE_KEEPALIVE_INTERVAL
+    
+    reader_key = manager.add_stream_reader(story_id)
+    await manager.broadcast_reader_count(story_id)
+    try:
+        yield f"retry: {int(interval * 2000)}\n\n"
+        last_count = None
+        last_sent = time.monotonic()
+        while not await is_disconnected():
+            count = manager.get_reader_count(story_id)
+            now = time.monotonic()
+            if count != last_count:
+                data = json.dumps({"story_id": story_id, "count": count})
+                yield f"event: reader_count\ndata: {data}\n\n"
+                last_count = count
+                last_sent = now
+            elif now - last_sent >= keepalive:
+                yield ": keepalive\n\n"
+                last_sent = now
+            await asyncio.sleep(interval)
+    finally:
+        manager.remove_stream_reader(story_id, reader_key)
+        await manager.broadcast_reader_count(story_id)
 
 
 # Helper functions for sending notifications
@@ -88,17 +422,18 @@ async def notify_reaction(
     story_id: int,
     story_title: str,
     reactor_username: str,
-    reaction_type: str
+    reaction_type: str,
+    db: Optional[AsyncSession] = None
 ):
-    """Send notification when someone reacts to a story"""
-    await manager.send_notification(story_author_id, {
+    """Send notification when someone reacts to a story (parked in the inbox if offline)"""
+    await dispatcher.publish(story_author_id, {
         "type": "reaction",
         "story_id": story_id,
         "story_title": story_title[:50] + "..." if len(story_title) > 50 else story_title,
         "from_user": reactor_username,
         "reaction_type": reaction_type,
         "message": f"{reactor_username} reacted to your story"
-    })
+    }, db=db)
 
 
 async def notify_comment(
@@ -106,14 +441,15 @@ async def notify_comment(
     story_id: int,
     story_title: str,
     commenter_username: str,
-    comment_preview: str
+    comment_preview: str,
+    db: Optional[AsyncSession] = None
 ):
-    """Send notification when someone comments on a story"""
-    await manager.send_notification(story_author_id, {
+    """Send notification when someone comments on a story (parked in the inbox if offline)"""
+    await dispatcher.publish(story_author_id, {
         "type": "comment",
         "story_id": story_id,
         "story_title": story_title[:50] + "..." if len(story_title) > 50 else story_title,
         "from_user": commenter_username,
         "comment_preview": comment_preview[:100] + "..." if len(comment_preview) > 100 else comment_preview,
         "message": f"{commenter_username} commented on your story"
-    })
+    }, db=db)
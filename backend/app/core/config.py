@@ -3,12 +3,33 @@ FastAPI Application Configuration
 Using Pydantic Settings for type-safe configuration
 """
 import os
-from typing import List, Any
+from typing import List, Any, Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 
+def to_async_url(url: str) -> str:
+    """Convert a sync database URL to its async driver form"""
+    # Handle SQLite (use aiosqlite)
+    if url.startswith("sqlite"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///")
+    
+    # Handle PostgreSQL (use asyncpg)
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    
+    # asyncpg doesn't support URL query parameters like sslmode, channel_binding
+    # These are passed differently in asyncpg (via connect_args in engine)
+    # Strip all query parameters from the URL
+    if "?" in url:
+        url = url.split("?")[0]
+    
+    return url
+
+
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
     
@@ -22,31 +43,34 @@ class Settings(BaseSettings):
     @property
     def ASYNC_DATABASE_URL(self) -> str:
         """Convert sync database URL to async format"""
-        url = self.DATABASE_URL
-        
-        # Handle SQLite (use aiosqlite)
-        if url.startswith("sqlite"):
-            return url.replace("sqlite:///", "sqlite+aiosqlite:///")
-        
-        # Handle PostgreSQL (use asyncpg)
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-        elif url.startswith("postgresql://"):
-            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-        
-        # asyncpg doesn't support URL query parameters like sslmode, channel_binding
-        # These are passed differently in asyncpg (via connect_args in engine)
-        # Strip all query parameters from the URL
-        if "?" in url:
-            url = url.split("?")[0]
-        
-        return url
+        return to_async_url(self.DATABASE_URL)
+    
+    # Read replica (optional) - read-only routes use it via get_read_db
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    READ_YOUR_WRITES_SECONDS: int = 5  # reads stay on the primary this long after a client's write
+    
+    @property
+    def ASYNC_DATABASE_REPLICA_URL(self) -> str:
+        return to_async_url(self.DATABASE_REPLICA_URL) if self.DATABASE_REPLICA_URL else ""
     
     @property
     def IS_SQLITE(self) -> bool:
         """Check if using SQLite database"""
         return self.DATABASE_URL.startswith("sqlite")
     
+    # Connection pool (PostgreSQL) - see app/core/database.py for the profiles
+    DB_POOL_PROFILE: str = "default"  # default, serverless (Neon) or dedicated
+    DB_POOL_SIZE: Optional[int] = None  # overrides the profile when set
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_RECYCLE: Optional[int] = None  # seconds
+    DB_POOL_TIMEOUT: Optional[int] = None  # seconds to wait for a connection
+    DB_PREPARED_STATEMENT_CACHE_SIZE: Optional[int] = None  # per connection; 0 behind PgBouncer (transaction mode)
+    DB_ECHO: bool = False  # log every SQL statement (independent of DEBUG)
+    MIGRATE_ON_STARTUP: bool = True  # apply pending app/migrations at boot (else refuse to serve)
+    STARTUP_WARMUP_TIMEOUT: int = 30  # seconds a request waits for startup warmup before a 503
+    STARTUP_WARMUP_ATTEMPTS: int = 5  # tries before warmup fails for good
+    STARTUP_WARMUP_BACKOFF: float = 2.0  # seconds before the first retry, doubled each time
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "jwt-secret-key-change-in-production")
@@ -78,7 +102,61 @@ class Settings(BaseSettings):
     
     # Redis (optional)
     REDIS_URL: str = os.getenv("REDIS_URL", "")
-    
+
+    # WebSockets
+    WS_HEARTBEAT_INTERVAL: int = 25  # seconds between server pings
+    WS_IDLE_TIMEOUT: int = 75  # seconds without a client frame before reaping
+    WS_MAX_CONNECTIONS: int = 1000  # per worker process
+    WS_MAX_CONNECTIONS_PER_USER: int = 5
+    WS_SEND_QUEUE_SIZE: int = 100  # outbound frames buffered per socket
+    SSE_UPDATE_INTERVAL: float = 2.0  # seconds between coalesced reader counts
+    SSE_KEEPALIVE_INTERVAL: float = 15.0  # comment frame so proxies keep the stream
+
+    # Notifications
+    NOTIFICATION_BATCH_WINDOW_MS: int = 500  # coalesce events into one frame
+    NOTIFICATION_BATCH_MAX: int = 20  # flush early once this many are pending
+    NOTIFICATION_REPLAY_CHUNK: int = 50  # inbox rows per replay frame
+
+    # Comment threads
+    COMMENT_THREAD_MAX_DEPTH: int = 4  # reply levels loaded under each top-level comment
+    COMMENT_THREAD_MAX_ROWS: int = 500  # hard cap on comments in one thread window
+
+    # Sharded counters (support_count, save_count)
+    COUNTER_SHARDS: int = 8  # shard rows per post and counter
+    COUNTER_FLUSH_INTERVAL: int = 30  # seconds between folding shards into posts
+
+    # Admin dashboard rollup (daily_stats)
+    STATS_REFRESH_INTERVAL: int = 300  # seconds between rollup refreshes
+    STATS_REFRESH_OVERLAP: int = 2  # already rolled-up days recounted on each refresh
+
+    # Per-story engagement buckets (author analytics)
+    ENGAGEMENT_HOURLY_RETENTION_DAYS: int = 7  # hourly buckets older than this fold into daily ones
+    ENGAGEMENT_COMPACT_INTERVAL: int = 3600  # seconds between compaction passes
+
+    # Feed snapshots (front page / category top-K story ids, per process)
+    FEED_SNAPSHOT_SIZE: int = 1000  # story ids kept per story_type and sort
+    FEED_SNAPSHOT_INTERVAL: int = 60  # seconds between snapshot rebuilds
+    RANDOM_FEED_MAX_IDS: int = 100000  # newest stories a random-order feed samples from
+
+    # Personalized ranking (RankingService.get_ranked_stories with a user_id)
+    PERSONALIZE_CANDIDATES: int = 200  # top smart-feed stories re-ranked per reader
+    PERSONALIZE_BOOST: float = 1.0  # score multiplier per unit of type affinity (0 disables the lift)
+    AFFINITY_CACHE_TTL: int = 300  # seconds new reads/reactions may take to reach a reader's feed
+
+    # Rank scores (RankingService.recalculate_rank_scores)
+    RANK_FORMULA: str = "gravity"  # gravity, wilson or decayed_engagement
+    RANK_BATCH_SIZE: int = 5000  # rows per UPDATE when writing scores back
+
+    # Batched per-user story state (/api/posts/my-state)
+    STORY_STATE_MAX_IDS: int = 100  # story ids accepted per request
+
+    # Public id -> internal id resolution cache (per process)
+    ID_CACHE_SIZE: int = 10000  # entries per kind (posts, users)
+    ID_CACHE_TTL: int = 300  # seconds; bounds staleness across workers
+
+    # Profile stats (/api/auth/stats)
+    USER_STATS_CACHE_TTL: int = 60  # seconds others' views/reactions may lag
+
     # Password Requirements
     PASSWORD_MIN_LENGTH: int = 8
     PASSWORD_REQUIRE_UPPERCASE: bool = True
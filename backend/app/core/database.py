@@ -1,37 +1,168 @@
 """
 Async Database Configuration with SQLAlchemy 2.0
 Supports both SQLite (development) and PostgreSQL (production)
+
+PostgreSQL pools come from a named profile (DB_POOL_PROFILE):
+- default: the original settings (5 + 10 overflow, 5 min recycle, pre-ping)
+- serverless: small pool with aggressive recycle for Neon-style endpoints
+  that drop idle connections; no prepared statement cache (PgBouncer safe)
+- dedicated: large pool, no pre-ping, prepared statement cache on
+DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_RECYCLE / DB_POOL_TIMEOUT /
+DB_PREPARED_STATEMENT_CACHE_SIZE override individual values. Pool checkout latency, waits and overflow
+usage are exported through app.core.metrics.
+
+With DATABASE_REPLICA_URL set, read-only routes take their session from
+get_read_db, which uses the replica unless the client wrote within the
+last READ_YOUR_WRITES_SECONDS (tracked in a cookie), so authors see their
+own changes immediately.
+
+Read sessions run in AUTOCOMMIT (no BEGIN/COMMIT round trips), take a
+connection only at their first query and are never committed; read routes
+close them before building the response, so the connection goes back to
+the pool before serialization.
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import StaticPool
-from typing import AsyncGenerator
+from sqlalchemy.pool import StaticPool, AsyncAdaptedQueuePool
+from fastapi import Request, Response
+from typing import AsyncGenerator, Any, Dict, Optional
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
 
-# Create async engine with appropriate settings for database type
-if settings.IS_SQLITE:
-    # SQLite: use StaticPool for in-memory/file databases
-    engine = create_async_engine(
-        settings.ASYNC_DATABASE_URL,
-        echo=settings.DEBUG,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-else:
+POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+    'default': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_recycle': 300,
+        'pool_timeout': 30,
+        'pool_pre_ping': True,
+        'prepared_statement_cache_size': None,  # driver default
+    },
+    'serverless': {
+        'pool_size': 2,
+        'max_overflow': 3,
+        'pool_recycle': 60,
+        'pool_timeout': 10,
+        'pool_pre_ping': True,
+        'prepared_statement_cache_size': 0,
+    },
+    'dedicated': {
+        'pool_size': 20,
+        'max_overflow': 20,
+        'pool_recycle': 1800,
+        'pool_timeout': 30,
+        'pool_pre_ping': False,
+        'prepared_statement_cache_size': 500,
+    },
+}
+
+
+def pool_options(profile: str = None) -> Dict[str, Any]:
+    """Resolved pool settings: the named profile plus any DB_POOL_* overrides"""
+    profile = profile or settings.DB_POOL_PROFILE
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE '{profile}'. Use one of: {', '.join(POOL_PROFILES)}")
+
+    options = dict(POOL_PROFILES[profile])
+    overrides = {
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'prepared_statement_cache_size': settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    options.update({name: value for name, value in overrides.items() if value is not None})
+    return options
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports checkout latency, waits and timeouts"""
+
+    metrics_prefix = 'db.pool'
+
+    def _do_get(self):
+        # No idle connection and no overflow left: this checkout will queue
+        if self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow():
+            metrics.inc(f'{self.metrics_prefix}.waits')
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.inc(f'{self.metrics_prefix}.timeouts')
+            raise
+        finally:
+            metrics.observe(f'{self.metrics_prefix}.checkout_ms', (time.perf_counter() - start) * 1000)
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    """Same instrumentation, reported under db.replica_pool"""
+
+    metrics_prefix = 'db.replica_pool'
+
+
+def register_pool_metrics(engine: AsyncEngine, prefix: Optional[str] = None) -> None:
+    """Export size / checked-out / overflow gauges for a queue-pooled engine"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return
+    prefix = prefix or getattr(pool, 'metrics_prefix', 'db.pool')
+    metrics.register_gauge(f'{prefix}.size', pool.size)
+    metrics.register_gauge(f'{prefix}.checked_out', pool.checkedout)
+    metrics.register_gauge(f'{prefix}.idle', pool.checkedin)
+    metrics.register_gauge(f'{prefix}.overflow', lambda: max(0, pool.overflow()))
+
+
+def asyncpg_connect_args(cache_size: Optional[int]) -> Dict[str, Any]:
+    """
+    asyncpg connect() arguments. SQLAlchemy prepares statements through its
+    own per-connection cache (the URL's prepared_statement_cache_size);
+    asyncpg keeps a second one for anything it prepares implicitly, so with
+    caching disabled both must be off or PgBouncer still sees named statements.
+    """
+    connect_args: Dict[str, Any] = {"ssl": "require"}  # Require SSL but skip cert verification (Neon compatible)
+    if cache_size == 0:
+        connect_args["statement_cache_size"] = 0
+    return connect_args
+
+
+def create_engine_for(database_url: str, async_url: str, poolclass=InstrumentedQueuePool) -> AsyncEngine:
+    """Engine for a configured database URL (sync form) and its async form"""
+    if database_url.startswith("sqlite"):
+        # SQLite: use StaticPool for in-memory/file databases
+        return create_async_engine(
+            async_url,
+            echo=settings.DB_ECHO,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+
     # PostgreSQL: use connection pooling with SSL for Neon
     # Use 'require' SSL mode - enforces encryption but allows self-signed certs
     # This is the recommended approach for Neon and similar serverless Postgres
-    engine = create_async_engine(
-        settings.ASYNC_DATABASE_URL,
-        echo=settings.DEBUG,
-        pool_size=5,
-        max_overflow=10,
-        pool_recycle=300,
-        pool_pre_ping=True,
-        connect_args={"ssl": "require"},  # Require SSL but skip cert verification (Neon compatible)
+    options = pool_options()
+    cache_size = options.pop('prepared_statement_cache_size')
+    url = make_url(async_url)
+    if cache_size is not None:
+        url = url.update_query_dict({'prepared_statement_cache_size': str(cache_size)})
+
+    new_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=poolclass,
+        connect_args=asyncpg_connect_args(cache_size),
+        **options,
     )
+    register_pool_metrics(new_engine)
+    return new_engine
+
+
+# Create async engine with appropriate settings for database type
+engine = create_engine_for(settings.DATABASE_URL, settings.ASYNC_DATABASE_URL)
 
 
 # Async session factory
@@ -44,6 +175,24 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def read_session_maker(bind: AsyncEngine) -> async_sessionmaker:
+    """Session factory for read-only routes: AUTOCOMMIT, nothing to flush"""
+    return async_sessionmaker(
+        bind.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+
+
+# Read replica (optional); without one, reads use the primary
+replica_engine: Optional[AsyncEngine] = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine_for(
+        settings.DATABASE_REPLICA_URL, settings.ASYNC_DATABASE_REPLICA_URL, poolclass=ReplicaQueuePool
+    )
+
+
 # Base class for models
 class Base(DeclarativeBase):
     pass
@@ -54,7 +203,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         try:
             yield session
-            await session.commit()
+            # Handlers that committed themselves (or never queried) need no extra round trip
+            if session.in_transaction():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -62,8 +213,70 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+class SessionRouter:
+    """
+    Picks the session factory for read-only routes.
+    After a successful write the client gets a short-lived cookie holding the
+    time until which its reads must stay on the primary (read-your-writes);
+    everyone else reads from the replica.
+    """
+
+    COOKIE = 'rw_primary_until'
+
+    def __init__(self, primary: async_sessionmaker, replica: Optional[async_sessionmaker] = None,
+                 window: Optional[int] = None):
+        self.primary = primary
+        self.replica = replica
+        self.window = settings.READ_YOUR_WRITES_SECONDS if window is None else window
+
+    def wants_primary(self, request: Request) -> bool:
+        """True while the client's read-your-writes window is open"""
+        try:
+            until = float(request.cookies.get(self.COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+    def session_for(self, request: Request) -> async_sessionmaker:
+        if self.replica is None or self.wants_primary(request):
+            metrics.inc('db.reads.primary')
+            return self.primary
+        metrics.inc('db.reads.replica')
+        return self.replica
+
+    def mark_write(self, response: Response) -> None:
+        """Pin the client's reads to the primary for the next `window` seconds"""
+        if self.replica is None or self.window <= 0:
+            return
+        response.set_cookie(
+            key=self.COOKIE,
+            value=str(int(time.time()) + self.window + 1),
+            max_age=self.window + 1,
+            httponly=True,
+            secure=True,
+            samesite="none",
+            path="/",
+        )
+
+    async def read_db(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        """Dependency body for read-only routes (nothing is committed)"""
+        async with self.session_for(request)() as session:
+            yield session
+
+
+session_router = SessionRouter(
+    read_session_maker(engine),
+    read_session_maker(replica_engine) if replica_engine is not None else None,
+)
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency injection for read-only routes (replica when configured)"""
+    async for session in session_router.read_db(request):
+        yield session
+
+
 async def create_tables():
     """Create all tables in the database"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-
@@ -0,0 +1,76 @@
+"""
+In-process metrics registry
+Counters, gauges and timing summaries exported via /api/admin/metrics
+"""
+from typing import Callable, Dict
+
+
+class MetricsRegistry:
+    """
+    Minimal per-worker metrics store.
+
+    Usage:
+        metrics.inc('ws.reaped')
+        metrics.observe('db.pool.checkout_ms', 1.7)
+        metrics.register_gauge('ws.connections', lambda: len(conns))
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: int = 1):
+        """Increment a counter"""
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def register_gauge(self, name: str, fn: Callable[[], float]):
+        """Register a gauge whose value is read lazily at snapshot time"""
+        self._gauges[name] = fn
+
+    def observe(self, name: str, value: float):
+        """Record a sample into a count/sum/max summary"""
+        summary = self._timings.get(name)
+        if summary is None:
+            summary = self._timings[name] = {"count": 0, "sum": 0.0, "max": 0.0}
+        summary["count"] += 1
+        summary["sum"] += value
+        if value > summary["max"]:
+            summary["max"] = value
+
+    def get(self, name: str) -> int:
+        """Get the current value of a counter"""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Return all metrics as a JSON-serializable dict"""
+        gauges = {}
+        for name, fn in self._gauges.items():
+            try:
+                gauges[name] = fn()
+            except Exception:
+                gauges[name] = None
+
+        timings = {}
+        for name, summary in self._timings.items():
+            count = summary["count"]
+            timings[name] = {
+                "count": count,
+                "avg": summary["sum"] / count if count else 0.0,
+                "max": summary["max"],
+            }
+
+        return {
+            "counters": dict(self._counters),
+            "gauges": gauges,
+            "timings": timings,
+        }
+
+    def reset(self):
+        """Clear counters and timings (gauges stay registered)"""
+        self._counters.clear()
+        self._timings.clear()
+
+
+# Global metrics instance
+metrics = MetricsRegistry()
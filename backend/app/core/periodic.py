@@ -0,0 +1,92 @@
+"""
+Periodic Background Tasks
+The start/stop/sleep loop shared by the DB background loops
+(CounterFlusher, StatsRefresher, EngagementCompactor, FeedSnapshotRefresher).
+
+- A failed pass is logged and counted (metrics `<name>.failed`); the loop
+  carries on and the next pass retries the same work
+- Every worker process runs every loop. That is required for loops that
+  drain per-process state (counter flusher: pending views; feed snapshot
+  refresher: in-memory snapshots). Loops that only rewrite shared tables
+  set `exclusive`: on PostgreSQL a pass runs under a transaction-scoped
+  advisory lock taken with pg_try_advisory_xact_lock, and a worker that
+  doesn't get it skips the pass (`<name>.skipped`). SQLite serializes
+  the writers on its database lock instead
+"""
+import asyncio
+import logging
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.core.database import async_session_maker
+from app.core.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs `run_pass()` every `interval` seconds from start() until stop().
+
+    Usage:
+        class CounterFlusher(PeriodicTask):
+            name = 'counter_flush'
+
+            async def run_pass(self):
+                ...
+
+        counter_flusher = CounterFlusher(settings.COUNTER_FLUSH_INTERVAL)
+    """
+
+    name = 'periodic'
+    run_at_start = False  # first pass right away instead of after one interval
+    exclusive = False  # one worker at a time (see module docstring)
+
+    def __init__(self, interval: float, session_factory=async_session_maker):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_pass(self) -> Any:
+        raise NotImplementedError
+
+    @property
+    def lock_key(self) -> int:
+        return zlib.crc32(f"periodic:{self.name}".encode())
+
+    async def _guarded_pass(self) -> None:
+        if not self.exclusive:
+            await self.run_pass()
+            return
+        async with self.session_factory() as db:
+            if db.bind.dialect.name == 'postgresql':
+                # Held until this session's transaction ends (the block exit rolls it back)
+                locked = await db.scalar(text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': self.lock_key})
+                if not locked:
+                    metrics.inc(f"{self.name}.skipped")
+                    return
+            await self.run_pass()
+
+    async def _run(self):
+        if not self.run_at_start:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await self._guarded_pass()
+            except Exception:
+                metrics.inc(f"{self.name}.failed")
+                logger.exception("%s pass failed; retrying in %ss", self.name, self.interval)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the loop (called from the app lifespan)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
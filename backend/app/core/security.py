@@ -12,7 +12,6 @@ import bcrypt
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.database import get_db
@@ -73,6 +72,16 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
+def token_from_request(request: Request) -> Optional[str]:
+    """Access token from the HttpOnly cookie, falling back to the Authorization header"""
+    token = request.cookies.get("access_token")
+    if not token:
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            token = auth_header[7:]
+    return token or None
+
+
 async def get_current_user(
     request: Request,
     db: AsyncSession = Depends(get_db)
@@ -80,7 +89,7 @@ async def get_current_user(
     """Dependency to get current authenticated user.
     Reads JWT from HttpOnly cookie first, falls back to Authorization header.
     """
-    from app.models.models import User, TokenBlocklist
+    from app.models.queries import USER_BY_PUBLIC_ID, TOKEN_IS_REVOKED
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -88,13 +97,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Try cookie first, then Authorization header
-    token = request.cookies.get("access_token")
-    if not token:
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header[7:]
-    
+    token = token_from_request(request)
     if not token:
         raise credentials_exception
     
@@ -109,16 +112,11 @@ async def get_current_user(
     # Check if token is in blocklist (revoked)
     jti = payload.get("jti")
     if jti:
-        blocklist_result = await db.execute(
-            select(TokenBlocklist).where(TokenBlocklist.jti == jti)
-        )
-        if blocklist_result.scalar_one_or_none():
+        if await db.scalar(TOKEN_IS_REVOKED, {'jti': jti}):
             raise credentials_exception  # Token has been revoked
     
     # Get user from database
-    result = await db.execute(
-        select(User).where(User.public_id == user_id)
-    )
+    result = await db.execute(USER_BY_PUBLIC_ID, {'public_id': user_id})
     user = result.scalar_one_or_none()
     
     if user is None:
@@ -136,15 +134,9 @@ async def get_current_user_optional(
     Does not require authentication - returns None for unauthenticated requests.
     Reads JWT from HttpOnly cookie first, falls back to Authorization header.
     """
-    from app.models.models import User
-    
-    # Try cookie first, then Authorization header
-    token = request.cookies.get("access_token")
-    if not token:
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header[7:]
+    from app.models.queries import USER_BY_PUBLIC_ID
     
+    token = token_from_request(request)
     if not token:
         return None
     
@@ -157,9 +149,7 @@ async def get_current_user_optional(
         return None
     
     # Get user from database
-    result = await db.execute(
-        select(User).where(User.public_id == user_id)
-    )
+    result = await db.execute(USER_BY_PUBLIC_ID, {'public_id': user_id})
     user = result.scalar_one_or_none()
     
     return user
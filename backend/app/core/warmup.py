@@ -0,0 +1,112 @@
+"""
+Startup Warmup
+Work that used to block the lifespan before the server accepted traffic
+(schema check / migrations, loading the admin router, starting the DB
+background loops) runs as a task instead, so /api/health answers right
+after boot. Other requests and WebSocket handshakes wait for it (see the
+startup gate in main.py).
+
+A failed attempt (database still waking up, a migration lock timing out)
+is retried STARTUP_WARMUP_ATTEMPTS times with exponential backoff from
+STARTUP_WARMUP_BACKOFF seconds; only then, or on a StartupAborted (e.g.
+an out-of-date schema with MIGRATE_ON_STARTUP off), does it fail for good.
+The work must therefore be safe to run again.
+"""
+import asyncio
+import importlib
+from typing import Awaitable, Callable, Optional
+
+from fastapi import FastAPI
+
+from app.core.config import settings
+
+
+IDLE = 'idle'  # no lifespan ran (e.g. tests): nothing to wait for
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class StartupAborted(Exception):
+    """A startup failure that retrying can't fix"""
+
+
+class Warmup:
+    """Runs the startup work (retried until it succeeds) and lets requests wait for it"""
+
+    def __init__(self, attempts: Optional[int] = None, backoff: Optional[float] = None):
+        self.attempts = attempts or settings.STARTUP_WARMUP_ATTEMPTS
+        self.backoff = settings.STARTUP_WARMUP_BACKOFF if backoff is None else backoff
+        self.state = IDLE
+        self.error: Optional[str] = None  # last failure, kept while retrying
+        self._done: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, work: Callable[[], Awaitable[None]]):
+        """Start the warmup (called from the app lifespan)"""
+        self.state = WARMING
+        self.error = None
+        self._done = asyncio.Event()  # bound to the running loop
+        self._task = asyncio.create_task(self._run(work))
+
+    async def _run(self, work):
+        try:
+            for attempt in range(self.attempts):
+                try:
+                    await work()
+                    self.state = READY
+                    return
+                except StartupAborted as exc:
+                    self.error = str(exc)
+                    break
+                except Exception as exc:
+                    self.error = str(exc)
+                    if attempt < self.attempts - 1:
+                        await asyncio.sleep(self.backoff * 2 ** attempt)
+            self.state = FAILED
+        finally:
+            self._done.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """True once warmup succeeded (or never started); False on failure or timeout"""
+        if self.state in (IDLE, READY):
+            return True  # no timer once started up: this runs on every request
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.state == READY
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.state = IDLE
+
+
+class LazyRouter:
+    """
+    A router whose module is imported on first use: the first request under
+    its prefix, or the warmup task, whichever comes first.
+    """
+
+    def __init__(self, app: FastAPI, module: str, prefix: str, tags: list):
+        self.app = app
+        self.module = module
+        self.prefix = prefix
+        self.tags = tags
+        self.loaded = False
+
+    def matches(self, path: str) -> bool:
+        return path == self.prefix or path.startswith(self.prefix + '/')
+
+    def load(self):
+        if self.loaded:
+            return
+        router = importlib.import_module(self.module).router
+        self.app.include_router(router, prefix=self.prefix, tags=self.tags)
+        self.app.openapi_schema = None  # regenerate docs with the new routes
+        self.loaded = True
+
+
+warmup = Warmup()
@@ -12,34 +12,59 @@ from slowapi.errors import RateLimitExceeded
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.v1 import auth, posts, admin
+from app.core.database import engine, session_router
+from app.core.warmup import warmup, LazyRouter, StartupAborted, FAILED
+from app.api.v1 import auth, posts
 
 
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
 
+async def warm_up():
+    """Startup work that needs the database; runs once the server accepts connections"""
+    from app.migrations import schema_is_current, upgrade as upgrade_schema
+    
+    admin_router.load()
+    
+    # Versioned migrations (app/migrations); a current schema costs one query
+    if not await schema_is_current(engine):
+        if not settings.MIGRATE_ON_STARTUP:
+            raise StartupAborted("Database schema is out of date: run `python -m app.migrations upgrade`")
+        applied = await upgrade_schema(engine)
+        print(f"Applied database migrations: {', '.join(applied) or 'none'}")
+    print(f"Database schema is current")
+    
+    # Counter shard flusher, dashboard rollup refresher, engagement bucket compactor,
+    # feed snapshot refresher
+    counter_flusher.start()
+    stats_refresher.start()
+    engagement_compactor.start()
+    feed_snapshot_refresher.start()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - startup and shutdown events"""
     # Startup
     print("Starting FastAPI application...")
-    
-    # Create tables if they don't exist (for both SQLite and PostgreSQL)
-    # In production, you might want to use Alembic migrations instead
-    from app.models.models import (
-        User, Post, Comment, Support, Bookmark, ReadProgress, TokenBlocklist
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print(f"Database tables verified/created")
-    
     print(f"Using database: {settings.DATABASE_URL[:30]}...")
+    
+    # WebSocket heartbeat/idle reaper; the database work runs in the background
+    # so /api/health answers while a cold database wakes up
+    manager.start()
+    warmup.start(warm_up)
     yield
     
     # Shutdown
     print("Shutting down FastAPI application...")
+    await warmup.stop()
+    await dispatcher.drain()
+    await manager.stop()
+    await counter_flusher.stop()
+    await stats_refresher.stop()
+    await engagement_compactor.stop()
+    await feed_snapshot_refresher.stop()
     await engine.dispose()
 
 
@@ -100,22 +125,22 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         status_code=422,
         content={"detail": errors}
     )
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",
-        "http://localhost:3000",
-        "https://heartout.vercel.app",
-        "https://heart-out.vercel.app",
-        "https://heartout-kx89.onrender.com",
-    ],
-    allow_origin_regex=r"https://.*\.onrender\.com|https://.*\.vercel\.app",
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=["*"],
-    expose_headers=["*"],
-)
+
+
+# Startup gate: everything but the health check waits for the warmup (/ws waits in its endpoint)
+@app.middleware("http")
+async def wait_for_warmup(request: Request, call_next):
+    path = request.url.path
+    if path != "/api/health":
+        if not await warmup.wait(settings.STARTUP_WARMUP_TIMEOUT):
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is starting up, please retry shortly"},
+                headers={"Retry-After": "5"}
+            )
+        if admin_router.matches(path):
+            admin_router.load()
+    return await call_next(request)
 
 
 # Security headers & Zero-IP logging middleware
@@ -137,17 +162,51 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
+# Read-your-writes: after a successful write, keep this client's reads on the primary
+@app.middleware("http")
+async def pin_reads_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        session_router.mark_write(response)
+    return response
+
+
+# CORS middleware - added last so it wraps the middlewares above: their responses
+# (e.g. the startup gate's 503) carry the CORS headers, and preflights never wait
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        "http://localhost:5173",
+        "http://localhost:3000",
+        "https://heartout.vercel.app",
+        "https://heart-out.vercel.app",
+        "https://heartout-kx89.onrender.com",
+    ],
+    allow_origin_regex=r"https://.*\.onrender\.com|https://.*\.vercel\.app",
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
+    allow_headers=["*"],
+    expose_headers=["*"],
+)
+
+
 # Include routers - use /api/ prefix to match Flask routes for frontend compatibility
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(posts.router, prefix="/api/posts", tags=["Stories"])
-app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+# Admin is rarely hit: imported by the warmup task or its first request
+admin_router = LazyRouter(app, "app.api.v1.admin", prefix="/api/admin", tags=["Admin"])
 
 
 # Health check endpoint
 @app.get("/api/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint for monitoring"""
-    return {"status": "healthy", "message": "FastAPI server is running!"}
+    """Health check endpoint for monitoring (answers during warmup)"""
+    if warmup.state == FAILED:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "message": warmup.error, "warmup": warmup.state}
+        )
+    return {"status": "healthy", "message": "FastAPI server is running!", "warmup": warmup.state}
 
 
 # Root endpoint
@@ -164,18 +223,27 @@ async def root():
 
 # WebSocket endpoint for real-time notifications
 from fastapi import WebSocket, WebSocketDisconnect, Query
-from app.api.v1.websockets import manager
+from app.api.v1.websockets import manager, dispatcher
+from app.services.counter_service import counter_flusher
+from app.services.stats_service import stats_refresher
+from app.services.engagement_service import engagement_compactor
+from app.services.feed_service import feed_snapshot_refresher
 from app.core.security import decode_token
 from app.core.database import async_session_maker
-from sqlalchemy import select
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket, 
-    token: str = Query(None, description="JWT access token")
+    token: str = Query(None, description="JWT access token"),
+    cursor: int = Query(None, description="Last acked notification inbox id")
 ):
     """WebSocket endpoint for real-time notifications with JWT authentication"""
+    # The HTTP startup gate doesn't see WebSocket handshakes: wait here too
+    if not await warmup.wait(settings.STARTUP_WARMUP_TIMEOUT):
+        await websocket.close(code=1013, reason="Server is starting up, please retry shortly")
+        return
+    
     # Validate token
     if not token:
         await websocket.close(code=4001, reason="Authentication required")
@@ -195,20 +263,15 @@ async def websocket_endpoint(
     # Check token is not revoked
     jti = payload.get("jti")
     async with async_session_maker() as db:
-        from app.models.models import User, TokenBlocklist
+        from app.models.queries import USER_BY_PUBLIC_ID, TOKEN_IS_REVOKED
         
         if jti:
-            blocklist_result = await db.execute(
-                select(TokenBlocklist).where(TokenBlocklist.jti == jti)
-            )
-            if blocklist_result.scalar_one_or_none():
+            if await db.scalar(TOKEN_IS_REVOKED, {'jti': jti}):
                 await websocket.close(code=4001, reason="Token revoked")
                 return
         
         # Get user
-        result = await db.execute(
-            select(User).where(User.public_id == user_public_id)
-        )
+        result = await db.execute(USER_BY_PUBLIC_ID, {'public_id': user_public_id})
         user = result.scalar_one_or_none()
         
         if not user or not user.is_active:
@@ -217,12 +280,23 @@ async def websocket_endpoint(
         
         user_id = user.id
     
-    # Connection authenticated - proceed
-    await manager.connect(websocket, user_id)
+    # Connection authenticated - proceed (None if over the connection limits)
+    connection = await manager.connect(websocket, user_id)
+    if connection is None:
+        return
+    
     try:
+        # Replay notifications parked while the user was offline
+        async with async_session_maker() as db:
+            if cursor:
+                await dispatcher.ack(db, connection, cursor)
+            else:
+                await dispatcher.replay(db, connection)
+        
         while True:
             # Keep connection alive, handle incoming messages
             data = await websocket.receive_json()
+            connection.touch()
             
             # Handle different message types
             if data.get("type") == "join_story":
@@ -238,10 +312,19 @@ async def websocket_endpoint(
                     await manager.broadcast_reader_count(story_id)
             
             elif data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await manager.send_to_connection(connection, {"type": "pong"})
+            
+            elif data.get("type") == "ack":
+                # Client confirmed an inbox chunk - delete it and send the next
+                ack_cursor = data.get("cursor")
+                if isinstance(ack_cursor, int):
+                    async with async_session_maker() as db:
+                        await dispatcher.ack(db, connection, ack_cursor)
+            
+            # "pong" replies to server heartbeats only need the touch() above
     
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        manager.disconnect(user_id, connection)
     except Exception:
-        manager.disconnect(user_id)
+        manager.disconnect(user_id, connection)
 
@@ -0,0 +1,16 @@
+"""
+Database Migrations
+Versioned async schema migrations for the app package (replaces
+create_all on startup). The app runs pending versions at boot when
+MIGRATE_ON_STARTUP is set; otherwise apply them with:
+
+    cd backend
+    python -m app.migrations upgrade
+"""
+from app.migrations.runner import (
+    Migration, load_migrations, applied_versions, pending_migrations, schema_is_current, upgrade
+)
+
+__all__ = [
+    "Migration", "load_migrations", "applied_versions", "pending_migrations", "schema_is_current", "upgrade",
+]
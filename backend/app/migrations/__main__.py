@@ -0,0 +1,35 @@
+"""
+Migration CLI
+
+    python -m app.migrations status    # list versions, applied or pending
+    python -m app.migrations upgrade   # apply pending versions
+"""
+import argparse
+import asyncio
+
+from app.core.database import engine
+from app.migrations.runner import load_migrations, applied_versions, upgrade
+
+
+async def status():
+    applied = await applied_versions(engine)
+    for migration in load_migrations():
+        state = 'applied' if migration.revision in applied else 'pending'
+        print(f"{migration.revision}  {state:8} {migration.description}")
+
+
+async def main(command: str):
+    try:
+        if command == 'upgrade':
+            revisions = await upgrade(engine)
+            print(f"Applied: {', '.join(revisions)}" if revisions else "Schema is current")
+        else:
+            await status()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HeartOut database migrations")
+    parser.add_argument("command", choices=["status", "upgrade"], nargs="?", default="status")
+    asyncio.run(main(parser.parse_args().command))
@@ -0,0 +1,71 @@
+"""
+Migration Operations
+Idempotent schema helpers for migration versions: every operation checks
+the live schema first, so a version that was interrupted can simply rerun.
+"""
+from typing import Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+def is_postgres(conn: AsyncConnection) -> bool:
+    return conn.dialect.name == 'postgresql'
+
+
+def step(conn: AsyncConnection):
+    """
+    A short transaction of its own, for non-transactional versions: each
+    DDL statement and each backfill batch commits, releasing its locks,
+    instead of holding them until the whole version is done.
+
+        async with step(conn) as tx:
+            await add_column(tx, 'posts', 'excerpt', 'VARCHAR(300)')
+    """
+    return conn.engine.begin()
+
+
+async def has_table(conn: AsyncConnection, table: str) -> bool:
+    return await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(table))
+
+
+async def has_column(conn: AsyncConnection, table: str, column: str) -> bool:
+    def check(sync_conn) -> bool:
+        inspector = inspect(sync_conn)
+        return inspector.has_table(table) and column in {c['name'] for c in inspector.get_columns(table)}
+    return await conn.run_sync(check)
+
+
+async def add_column(conn: AsyncConnection, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless it exists. Returns True when added."""
+    if await has_column(conn, table, column):
+        return False
+    await conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    return True
+
+
+def index_sql(name: str, table: str, columns: Sequence[str], dialect: str, unique: bool = False) -> str:
+    """CREATE INDEX; CONCURRENTLY on PostgreSQL so writes are not blocked"""
+    concurrently = 'CONCURRENTLY ' if dialect == 'postgresql' else ''
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    return f'CREATE {kind} {concurrently}IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'
+
+
+async def create_index(conn: AsyncConnection, name: str, table: str, columns: Sequence[str],
+                       unique: bool = False) -> None:
+    """
+    Build an index online. On PostgreSQL the connection must be in AUTOCOMMIT
+    (CONCURRENTLY cannot run in a transaction); a build that failed half way
+    leaves an INVALID index behind, which is dropped and rebuilt here.
+    """
+    if is_postgres(conn):
+        invalid = await conn.scalar(
+            text(
+                'SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid '
+                'WHERE c.relname = :name AND NOT i.indisvalid'
+            ),
+            {'name': name}
+        )
+        if invalid:
+            await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+    await conn.execute(text(index_sql(name, table, columns, conn.dialect.name, unique)))
@@ -0,0 +1,132 @@
+"""
+Migration Runner
+Applies app/migrations/versions/v*.py in order and records each one in the
+schema_migrations table.
+
+A version module defines:
+- revision: sortable id ('0002'), description: one line
+- async upgrade(conn): the change, written with app.migrations.ops
+- transactional (default True): False runs upgrade() on an AUTOCOMMIT
+  connection, which CREATE INDEX CONCURRENTLY requires. Versions that
+  alter busy tables or backfill them are non-transactional too and wrap
+  each step in ops.step(), so no lock is held for the whole backfill
+
+Versions are frozen: they import only app.migrations.ops and SQLAlchemy,
+never the models or services, so later refactors can't change what a
+historical version does (copy what they need instead, as 0001 and 0002 do).
+"""
+import importlib
+import pkgutil
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import ModuleType
+from typing import List, NamedTuple, Set
+
+from sqlalchemy import MetaData, Table, Column, String, DateTime, select, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.migrations import versions
+from app.migrations.ops import has_table
+
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', String(32), primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime),
+)
+
+# pg_advisory_lock key: one migrating worker at a time
+LOCK_KEY = 4_410_440
+
+
+class Migration(NamedTuple):
+    revision: str
+    description: str
+    transactional: bool
+    module: ModuleType
+
+
+def load_migrations() -> List[Migration]:
+    """All version modules, ordered by revision"""
+    migrations = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if not info.name.startswith('v'):
+            continue
+        module = importlib.import_module(f'{versions.__name__}.{info.name}')
+        migrations.append(Migration(
+            module.revision,
+            module.description,
+            getattr(module, 'transactional', True),
+            module,
+        ))
+    migrations.sort(key=lambda m: m.revision)
+    return migrations
+
+
+async def applied_versions(engine: AsyncEngine) -> Set[str]:
+    async with engine.connect() as conn:
+        if not await has_table(conn, schema_migrations.name):
+            return set()
+        result = await conn.execute(select(schema_migrations.c.version))
+        return set(result.scalars().all())
+
+
+async def pending_migrations(engine: AsyncEngine) -> List[Migration]:
+    applied = await applied_versions(engine)
+    return [m for m in load_migrations() if m.revision not in applied]
+
+
+async def schema_is_current(engine: AsyncEngine) -> bool:
+    """Boot-time check: one catalog lookup and one SELECT"""
+    return not await pending_migrations(engine)
+
+
+async def _apply(engine: AsyncEngine, migration: Migration) -> None:
+    if migration.transactional:
+        async with engine.begin() as conn:
+            await migration.module.upgrade(conn)
+            await _record(conn, migration)
+        return
+
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await migration.module.upgrade(autocommit)
+    # Recorded separately; rerunning an unrecorded version is harmless
+    async with engine.begin() as conn:
+        await _record(conn, migration)
+
+
+async def _record(conn, migration: Migration) -> None:
+    await conn.execute(insert(schema_migrations).values(
+        version=migration.revision,
+        description=migration.description,
+        applied_at=datetime.utcnow(),
+    ))
+
+
+@asynccontextmanager
+async def _migration_lock(engine: AsyncEngine):
+    """Serialize workers booting together (session advisory lock on PostgreSQL)"""
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': LOCK_KEY})
+        try:
+            yield
+        finally:
+            await conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': LOCK_KEY})
+
+
+async def upgrade(engine: AsyncEngine) -> List[str]:
+    """Apply pending versions. Returns the revisions applied."""
+    async with _migration_lock(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(schema_migrations.create, checkfirst=True)
+        # Re-read under the lock: another worker may have just migrated
+        pending = await pending_migrations(engine)
+        for migration in pending:
+            await _apply(engine, migration)
+        return [m.revision for m in pending]
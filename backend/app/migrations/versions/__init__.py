@@ -0,0 +1,3 @@
+"""
+Migration versions, applied in revision order: vNNNN_<name>.py
+"""
@@ -0,0 +1,199 @@
+"""
+Baseline: create every table of the schema as it stood before 0002 that
+does not exist yet. A new database gets all of them here and the later
+versions add what came after (posts.excerpt, comments.reply_count, the
+composite indexes, one reaction per story); a database created before
+this runner gets the tables added since (notifications,
+post_counter_shards, daily_stats, engagement_buckets).
+
+The tables are a frozen snapshot, not the live models: a version must do
+the same thing however the models change later. Python-side defaults are
+left out, they never reach the DDL.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Index, UniqueConstraint, ForeignKey,
+    String, Text, Integer, Float, Boolean, Date, DateTime, JSON
+)
+
+
+revision = '0001'
+description = 'Baseline schema'
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('public_id', String(36), unique=True, nullable=False),
+    Column('username', String(80), unique=True, nullable=False),
+    Column('email', String(120), unique=True, nullable=False),
+    Column('password_hash', String(200), nullable=False),
+    Column('role', String(20), nullable=False),
+    Column('is_active', Boolean),
+    Column('is_verified', Boolean),
+    Column('created_at', DateTime),
+    Column('last_login', DateTime, nullable=True),
+    Column('display_name', String(100), nullable=True),
+    Column('bio', Text, nullable=True),
+    Column('age_range', String(20), nullable=True),
+    Column('preferred_anonymity', Boolean),
+    Column('author_bio', Text, nullable=True),
+    Column('website_url', String(200), nullable=True),
+    Column('social_links', JSON, nullable=True),
+    Column('is_featured_author', Boolean),
+    Index('idx_user_public_id', 'public_id'),
+    Index('idx_user_email', 'email'),
+    Index('idx_user_username', 'username'),
+    Index('idx_user_is_active', 'is_active'),
+)
+
+Table(
+    'token_blocklist', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('jti', String(36), nullable=False, unique=True, index=True),
+    Column('token_type', String(10), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('revoked_at', DateTime),
+    Column('expires_at', DateTime, nullable=False),
+    Index('idx_token_jti', 'jti'),
+    Index('idx_token_expires', 'expires_at'),
+)
+
+Table(
+    'posts', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('public_id', String(36), unique=True, nullable=False),
+    Column('title', String(200), nullable=False),
+    Column('content', Text, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('story_type', String(20), nullable=False),
+    Column('is_anonymous', Boolean),
+    Column('tags', JSON, nullable=True),
+    Column('reading_time', Integer),
+    Column('view_count', Integer),
+    Column('is_featured', Boolean),
+    Column('featured_at', DateTime, nullable=True),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('published_at', DateTime, nullable=True),
+    Column('flagged_count', Integer),
+    Column('save_count', Integer),
+    Column('completion_rate', Float),
+    Column('avg_read_time', Integer),
+    Column('reread_count', Integer),
+    Column('unique_readers', Integer),
+    Column('rank_score', Float),
+    Column('last_ranked_at', DateTime, nullable=True),
+    Column('support_count', Integer),
+    Column('comment_count', Integer),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=True),
+    Column('author_token', String(64), nullable=True, index=True),
+    Index('idx_post_public_id', 'public_id'),
+    Index('idx_post_author_token', 'author_token'),
+    Index('idx_post_status', 'status'),
+    Index('idx_post_story_type', 'story_type'),
+    Index('idx_post_user_id', 'user_id'),
+    Index('idx_post_published_at', 'published_at'),
+    Index('idx_post_is_featured', 'is_featured'),
+    Index('idx_post_view_count', 'view_count'),
+)
+
+Table(
+    'comments', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('public_id', String(36), unique=True, nullable=False),
+    Column('content', Text, nullable=False),
+    Column('is_anonymous', Boolean),
+    Column('created_at', DateTime),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('post_id', Integer, ForeignKey('posts.id'), nullable=False),
+    Column('parent_id', Integer, ForeignKey('comments.id'), nullable=True),
+    Index('idx_comment_post_id', 'post_id'),
+    Index('idx_comment_user_id', 'user_id'),
+    Index('idx_comment_parent_id', 'parent_id'),
+)
+
+Table(
+    'supports', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('support_type', String(50)),
+    Column('message', Text, nullable=True),
+    Column('created_at', DateTime),
+    Column('giver_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('receiver_id', Integer, ForeignKey('users.id'), nullable=True),
+    Column('post_id', Integer, ForeignKey('posts.id'), nullable=True),
+    Index('idx_support_giver_id', 'giver_id'),
+    Index('idx_support_post_id', 'post_id'),
+    UniqueConstraint('giver_id', 'post_id', 'support_type', name='unique_user_post_reaction'),
+)
+
+Table(
+    'bookmarks', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('created_at', DateTime),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('post_id', Integer, ForeignKey('posts.id'), nullable=False),
+    UniqueConstraint('user_id', 'post_id', name='unique_user_bookmark'),
+    Index('idx_bookmark_user', 'user_id'),
+    Index('idx_bookmark_post', 'post_id'),
+)
+
+Table(
+    'read_progress', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('scroll_depth', Float),
+    Column('time_spent', Integer),
+    Column('completed', Boolean),
+    Column('read_count', Integer),
+    Column('first_read', DateTime),
+    Column('last_read', DateTime),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('post_id', Integer, ForeignKey('posts.id'), nullable=False),
+    UniqueConstraint('user_id', 'post_id', name='unique_user_read_progress'),
+    Index('idx_read_progress_user', 'user_id'),
+    Index('idx_read_progress_post', 'post_id'),
+)
+
+Table(
+    'notifications', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('payload', JSON, nullable=False),
+    Column('created_at', DateTime),
+    Index('idx_notification_user_id', 'user_id', 'id'),
+)
+
+Table(
+    'post_counter_shards', metadata,
+    Column('post_id', Integer, ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True),
+    Column('name', String(32), primary_key=True),
+    Column('shard', Integer, primary_key=True),
+    Column('value', Integer, nullable=False),
+)
+
+Table(
+    'daily_stats', metadata,
+    Column('day', Date, primary_key=True),
+    Column('new_users', Integer, nullable=False),
+    Column('new_stories', Integer, nullable=False),
+    Column('reactions', Integer, nullable=False),
+    Column('refreshed_at', DateTime),
+)
+
+Table(
+    'engagement_buckets', metadata,
+    Column('post_id', Integer, ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True),
+    Column('granularity', String(8), primary_key=True),
+    Column('bucket_start', DateTime, primary_key=True),
+    Column('views', Integer, nullable=False),
+    Column('reads', Integer, nullable=False),
+    Column('rereads', Integer, nullable=False),
+    Column('completions', Integer, nullable=False),
+    Column('reactions', Integer, nullable=False),
+    Column('bookmarks', Integer, nullable=False),
+    Index('idx_engagement_granularity_start', 'granularity', 'bucket_start'),
+)
+
+
+async def upgrade(conn):
+    await conn.run_sync(metadata.create_all)
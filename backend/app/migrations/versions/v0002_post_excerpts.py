@@ -0,0 +1,55 @@
+"""
+posts.excerpt (feed preview), added to databases created before it
+existed and backfilled so old rows read the same as new ones.
+comments.reply_count has its own version (0004).
+
+Non-transactional: each ALTER and each backfill batch is its own short
+transaction, so on PostgreSQL the ACCESS EXCLUSIVE lock of ADD COLUMN is
+released at once and feed reads keep flowing during the backfill.
+
+The excerpt function is a copy, not an import of story_service, so a
+later change to the service can't change what this version writes.
+"""
+from sqlalchemy import text
+
+from app.migrations.ops import add_column, step
+
+
+revision = '0002'
+description = 'posts.excerpt, backfilled'
+transactional = False
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 200
+
+
+def make_excerpt(content: str) -> str:
+    """The feed preview as story_service built it at this revision (frozen copy)"""
+    collapsed = ' '.join(content.split())
+    if len(collapsed) <= EXCERPT_LENGTH:
+        return collapsed
+    cut = collapsed[:EXCERPT_LENGTH].rsplit(' ', 1)[0] or collapsed[:EXCERPT_LENGTH]
+    return cut.rstrip(' .,;:!?') + '…'
+
+
+async def upgrade(conn):
+    async with step(conn) as tx:
+        await add_column(tx, 'posts', 'excerpt', 'VARCHAR(300)')
+
+    last_id = 0
+    while True:
+        async with step(conn) as tx:
+            rows = (await tx.execute(
+                text(
+                    'SELECT id, content FROM posts WHERE excerpt IS NULL AND content IS NOT NULL '
+                    'AND id > :last_id ORDER BY id LIMIT :limit'
+                ),
+                {'last_id': last_id, 'limit': BATCH_SIZE}
+            )).all()
+            if not rows:
+                break
+            await tx.execute(
+                text('UPDATE posts SET excerpt = :excerpt WHERE id = :id'),
+                [{'id': post_id, 'excerpt': make_excerpt(content)} for post_id, content in rows]
+            )
+        last_id = rows[-1][0]
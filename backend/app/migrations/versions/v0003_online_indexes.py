@@ -0,0 +1,23 @@
+"""
+Indexes declared on existing tables that create_all never added to
+long-lived databases. Built with CREATE INDEX CONCURRENTLY on PostgreSQL,
+so reads and writes continue while they build.
+"""
+from app.migrations.ops import create_index
+
+
+revision = '0003'
+description = 'Composite post and comment indexes (online)'
+transactional = False
+
+INDEXES = [
+    ('idx_post_status_story_type', 'posts', ['status', 'story_type']),
+    ('idx_post_status_published', 'posts', ['status', 'published_at']),
+    ('idx_post_user_status', 'posts', ['user_id', 'status']),
+    ('idx_comment_post_parent', 'comments', ['post_id', 'parent_id', 'created_at']),
+]
+
+
+async def upgrade(conn):
+    for name, table, columns in INDEXES:
+        await create_index(conn, name, table, columns)
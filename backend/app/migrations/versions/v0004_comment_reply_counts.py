@@ -0,0 +1,44 @@
+"""
+comments.reply_count (denormalized direct-reply count for thread windows),
+added to databases created before it existed and backfilled from the
+comments table.
+
+Non-transactional: the ALTER and each backfill batch are short
+transactions of their own (see ops.step). A database that already got the
+column from an earlier revision of 0002 just has its counts recomputed.
+"""
+from sqlalchemy import text
+
+from app.migrations.ops import add_column, step
+
+
+revision = '0004'
+description = 'comments.reply_count, backfilled'
+transactional = False
+
+BATCH_SIZE = 500
+
+
+async def upgrade(conn):
+    async with step(conn) as tx:
+        await add_column(tx, 'comments', 'reply_count', 'INTEGER DEFAULT 0')
+
+    # Recounting is idempotent, so an interrupted run simply starts over
+    last_id = 0
+    while True:
+        async with step(conn) as tx:
+            upper = await tx.scalar(
+                text('SELECT max(id) FROM (SELECT id FROM comments WHERE id > :last_id ORDER BY id LIMIT :limit) AS batch'),
+                {'last_id': last_id, 'limit': BATCH_SIZE}
+            )
+            if upper is None:
+                break
+            await tx.execute(
+                text(
+                    'UPDATE comments SET reply_count = '
+                    '(SELECT count(*) FROM comments AS reply WHERE reply.parent_id = comments.id) '
+                    'WHERE id > :last_id AND id <= :upper'
+                ),
+                {'last_id': last_id, 'upper': upper}
+            )
+        last_id = upper
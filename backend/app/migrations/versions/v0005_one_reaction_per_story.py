@@ -0,0 +1,56 @@
+"""
+One reaction per user per story: a unique index on supports
+(giver_id, post_id), which the reaction toggle uses as its ON CONFLICT
+target.
+
+The old unique constraint also covered support_type, so a user could hold
+several reactions on one story. The newest is kept, the others are
+deleted and support_count is recounted for the stories involved (their
+pending shards are dropped with it). The index is then built online; on
+PostgreSQL the old three-column constraint is dropped, SQLite keeps it
+as part of the table definition (it is implied by the new index).
+
+Non-transactional for CREATE INDEX CONCURRENTLY. If a duplicate lands
+between the cleanup and the index build, the build fails and the rerun
+cleans up again.
+"""
+from sqlalchemy import bindparam, text
+
+from app.migrations.ops import create_index, is_postgres, step
+
+
+revision = '0005'
+description = 'One reaction per user per story (unique supports index)'
+transactional = False
+
+
+async def upgrade(conn):
+    async with step(conn) as tx:
+        removed = await tx.execute(text(
+            'DELETE FROM supports WHERE post_id IS NOT NULL AND EXISTS ('
+            'SELECT 1 FROM supports AS newer WHERE newer.giver_id = supports.giver_id '
+            'AND newer.post_id = supports.post_id AND newer.id > supports.id'
+            ') RETURNING post_id'
+        ))
+        post_ids = sorted({post_id for (post_id,) in removed.all()})
+        if post_ids:
+            await tx.execute(
+                text(
+                    'UPDATE posts SET support_count = '
+                    '(SELECT count(*) FROM supports WHERE supports.post_id = posts.id) '
+                    'WHERE id IN :ids'
+                ).bindparams(bindparam('ids', expanding=True)),
+                {'ids': post_ids}
+            )
+            await tx.execute(
+                text(
+                    "DELETE FROM post_counter_shards WHERE name = 'support_count' AND post_id IN :ids"
+                ).bindparams(bindparam('ids', expanding=True)),
+                {'ids': post_ids}
+            )
+
+    await create_index(conn, 'uq_support_giver_post', 'supports', ['giver_id', 'post_id'], unique=True)
+
+    if is_postgres(conn):
+        async with step(conn) as tx:
+            await tx.execute(text('ALTER TABLE supports DROP CONSTRAINT IF EXISTS unique_user_post_reaction'))
@@ -7,6 +7,10 @@ from app.models.models import (
     Bookmark,
     ReadProgress,
     TokenBlocklist,
+    Notification,
+    PostCounterShard,
+    DailyStat,
+    EngagementBucket,
     UserRole,
     PostStatus,
     StoryType,
@@ -20,6 +24,10 @@ __all__ = [
     "Bookmark",
     "ReadProgress",
     "TokenBlocklist",
+    "Notification",
+    "PostCounterShard",
+    "DailyStat",
+    "EngagementBucket",
     "UserRole",
     "PostStatus",
     "StoryType",
@@ -2,16 +2,17 @@
 SQLAlchemy 2.0 Async Models for FastAPI
 Complete migration from Flask-SQLAlchemy
 """
-from datetime import datetime, timezone
+from datetime import datetime, date, timezone
 from typing import Optional, List
 from enum import Enum
 import uuid
 
-from sqlalchemy import String, Text, Integer, Float, Boolean, DateTime, JSON, ForeignKey, Index, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy import String, Text, Integer, Float, Boolean, Date, DateTime, JSON, ForeignKey, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import bcrypt
 
 from app.core.database import Base
+from app.utils.serialization import plain, post_row, comment_row, support_row
 
 
 # Enums
@@ -158,6 +159,7 @@ class Post(Base):
     public_id: Mapped[str] = mapped_column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    excerpt: Mapped[Optional[str]] = mapped_column(String(300), nullable=True)  # Precomputed feed preview
     status: Mapped[str] = mapped_column(String(20), default=PostStatus.DRAFT.value, nullable=False)
     story_type: Mapped[str] = mapped_column(String(20), default=StoryType.OTHER.value, nullable=False)
     is_anonymous: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -217,45 +219,9 @@ class Post(Base):
         Index('idx_post_user_status', 'user_id', 'status'),
     )
     
-    def to_dict(self, include_author: bool = True) -> dict:
-        data = {
-            'id': self.public_id,
-            'title': self.title,
-            'content': self.content,
-            'status': self.status,
-            'story_type': self.story_type,
-            'is_anonymous': self.is_anonymous,
-            'tags': self.tags or [],
-            'reading_time': self.reading_time,
-            'view_count': self.view_count,
-            'is_featured': self.is_featured,
-            'created_at': (self.created_at.isoformat() + 'Z') if self.created_at else None,
-            'updated_at': (self.updated_at.isoformat() + 'Z') if self.updated_at else None,
-            'published_at': (self.published_at.isoformat() + 'Z') if self.published_at else None,
-            'support_count': self.support_count or 0,
-            'comment_count': self.comment_count or 0
-        }
-        
-        if include_author and self.author:
-            if self.is_anonymous:
-                data['author'] = {
-                    'id': self.author.public_id,
-                    'username': 'Anonymous',
-                    'display_name': 'Anonymous User'
-                }
-            else:
-                data['author'] = {
-                    'id': self.author.public_id,
-                    'username': self.author.username,
-                    'display_name': self.author.display_name
-                }
-        elif self.is_anonymous:
-            data['author'] = {
-                'username': 'Anonymous',
-                'display_name': 'Anonymous User'
-            }
-        
-        return data
+    def to_dict(self, include_author: bool = True, include_content: bool = True) -> dict:
+        # List views defer the body; only detail views ship it
+        return plain(post_row(self, include_author=include_author, include_content=include_content))
 
 
 class Comment(Base):
@@ -268,6 +234,9 @@ class Comment(Base):
     is_anonymous: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
+    # Denormalized direct-reply count (kept in SQL on insert/delete)
+    reply_count: Mapped[int] = mapped_column(Integer, default=0)
+    
     # Foreign keys
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
     post_id: Mapped[int] = mapped_column(Integer, ForeignKey('posts.id'), nullable=False)
@@ -283,30 +252,11 @@ class Comment(Base):
         Index('idx_comment_post_id', 'post_id'),
         Index('idx_comment_user_id', 'user_id'),
         Index('idx_comment_parent_id', 'parent_id'),
+        Index('idx_comment_post_parent', 'post_id', 'parent_id', 'created_at'),
     )
     
     def to_dict(self) -> dict:
-        data = {
-            'id': self.public_id,
-            'content': self.content,
-            'is_anonymous': self.is_anonymous,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'reply_count': len(self.replies) if self.replies else 0
-        }
-        
-        if not self.is_anonymous and self.author:
-            data['author'] = {
-                'id': self.author.public_id,
-                'username': self.author.username,
-                'display_name': self.author.display_name
-            }
-        else:
-            data['author'] = {
-                'username': 'Anonymous',
-                'display_name': 'Anonymous User'
-            }
-        
-        return data
+        return plain(comment_row(self))
 
 
 class Support(Base):
@@ -331,21 +281,12 @@ class Support(Base):
     __table_args__ = (
         Index('idx_support_giver_id', 'giver_id'),
         Index('idx_support_post_id', 'post_id'),
-        UniqueConstraint('giver_id', 'post_id', 'support_type', name='unique_user_post_reaction'),
+        # One reaction per user per story, whatever its type (toggle / ON CONFLICT target)
+        Index('uq_support_giver_post', 'giver_id', 'post_id', unique=True),
     )
     
     def to_dict(self) -> dict:
-        return {
-            'id': self.id,
-            'support_type': self.support_type,
-            'message': self.message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'giver': {
-                'id': self.giver.public_id,
-                'username': self.giver.username,
-                'display_name': self.giver.display_name
-            } if self.giver else None
-        }
+        return plain(support_row(self))
 
 
 class Bookmark(Base):
@@ -399,3 +340,70 @@ class ReadProgress(Base):
         Index('idx_read_progress_user', 'user_id'),
         Index('idx_read_progress_post', 'post_id'),
     )
+
+
+class Notification(Base):
+    """Offline notification inbox - rows are deleted once the client acks them"""
+    __tablename__ = 'notifications'
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_notification_user_id', 'user_id', 'id'),
+    )
+
+
+class PostCounterShard(Base):
+    """
+    Pending deltas for hot Post counters (support_count, save_count).
+    Writers add to one of N shard rows instead of locking the posts row;
+    the counter flusher folds shards back into posts periodically.
+    """
+    __tablename__ = 'post_counter_shards'
+    
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class DailyStat(Base):
+    """
+    Per-day rollup of site activity for the admin dashboard.
+    Refreshed periodically by the stats refresher, so any window is a
+    range-sum over at most 365 rows instead of COUNT(*) scans.
+    """
+    __tablename__ = 'daily_stats'
+    
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    new_stories: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class EngagementBucket(Base):
+    """
+    Per-story engagement in time buckets (hourly, compacted to daily).
+    Fed by the view, reaction, bookmark and read-progress paths so author
+    analytics read a few pre-aggregated rows instead of raw events.
+    """
+    __tablename__ = 'engagement_buckets'
+    
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)  # 'hour' or 'day'
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reads: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # first reads (unique readers)
+    rereads: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # net: added - removed
+    bookmarks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # net: added - removed
+    
+    __table_args__ = (
+        Index('idx_engagement_granularity_start', 'granularity', 'bucket_start'),
+    )
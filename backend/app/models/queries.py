@@ -0,0 +1,41 @@
+"""
+Prepared Statements
+Hot lookups built once at import time with named bindparam() placeholders
+and executed as db.execute(STATEMENT, {'name': value}).
+
+A fresh select() per request costs construction plus cache-key generation
+(~60us for a one-column lookup) before SQLAlchemy can even find the
+compiled SQL in its cache; a reused statement object has its cache key
+memoized, so that overhead disappears. On PostgreSQL the same SQL text
+also hits asyncpg's prepared statement cache (see DB_PREPARED_STATEMENT_CACHE_SIZE).
+"""
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import selectinload
+
+from app.models.models import User, Post, TokenBlocklist, PostStatus
+
+
+# Users
+USER_BY_PUBLIC_ID = select(User).where(User.public_id == bindparam('public_id'))
+USER_BY_EMAIL = select(User).where(User.email == bindparam('email'))
+USER_BY_USERNAME = select(User).where(User.username == bindparam('username'))
+USER_REF_BY_PUBLIC_ID = select(User.id, User.is_active).where(User.public_id == bindparam('public_id'))
+
+# Auth
+TOKEN_IS_REVOKED = select(TokenBlocklist.id).where(TokenBlocklist.jti == bindparam('jti')).limit(1)
+
+# Stories
+POST_REF_BY_PUBLIC_ID = (
+    select(Post.id, Post.status, Post.user_id, Post.author_token)
+    .where(Post.public_id == bindparam('public_id'))
+)
+STORY_WITH_AUTHOR = (
+    select(Post)
+    .options(selectinload(Post.author))
+    .where(Post.public_id == bindparam('public_id'))
+)
+PUBLISHED_STORY = select(Post).where(
+    Post.public_id == bindparam('public_id'),
+    Post.status == PostStatus.PUBLISHED.value
+)
+POST_TITLE = select(Post.title).where(Post.id == bindparam('post_id'))
@@ -0,0 +1,128 @@
+"""
+Comment Thread Engine
+Loads a paginated window of a comment thread in one query.
+
+- A page of top-level comments (or of direct replies to one comment) anchors
+  a recursive CTE that walks replies down to COMMENT_THREAD_MAX_DEPTH levels
+- The window is capped at COMMENT_THREAD_MAX_ROWS, filled breadth-first, so
+  large discussions load in bounded time and memory
+- Reply counts come from the denormalized Comment.reply_count column (kept
+  by CounterService); a node whose replies were cut off has
+  reply_count > len(replies), and the client continues that branch with
+  ?parent_id=<comment id>
+"""
+from dataclasses import dataclass
+from typing import Optional, List, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal
+from sqlalchemy.orm import joinedload
+
+from app.core.config import settings
+from app.models.models import Comment, User
+from app.utils.serialization import comment_row
+
+
+@dataclass
+class ThreadPage:
+    """One window of a comment thread, as nested rows"""
+    items: List[dict]
+    page: int
+    per_page: int
+    has_next: bool = False
+
+
+class CommentThread:
+    """
+    Paginated thread window for a story.
+
+    Usage:
+        thread = CommentThread(story.id)
+        window = await thread.fetch(db, page=1, per_page=20)
+        return {"comments": window.items, "total": await thread.count(db), "has_next": window.has_next}
+    """
+
+    def __init__(
+        self,
+        post_id: int,
+        parent_id: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.post_id = post_id
+        self.parent_id = parent_id
+        self.max_depth = settings.COMMENT_THREAD_MAX_DEPTH if max_depth is None else max_depth
+        self.max_rows = max_rows or settings.COMMENT_THREAD_MAX_ROWS
+
+    def _anchor_filter(self):
+        if self.parent_id is None:
+            return Comment.parent_id.is_(None)
+        return Comment.parent_id == self.parent_id
+
+    async def count(self, db: AsyncSession) -> int:
+        """Comments at the paged level: top-level ones, or the direct replies to parent_id"""
+        result = await db.execute(
+            select(func.count()).select_from(Comment).where(Comment.post_id == self.post_id, self._anchor_filter())
+        )
+        return result.scalar() or 0
+
+    def _query(self, first: int, last: int):
+        """
+        Thread rows for anchor positions first..last (1-based, inclusive).
+        Each row carries its depth and the position of the anchor it hangs from.
+        """
+        ranked = (
+            select(
+                Comment.id,
+                func.row_number().over(order_by=(Comment.created_at, Comment.id)).label('position')
+            )
+            .where(Comment.post_id == self.post_id, self._anchor_filter())
+            .subquery('ranked')
+        )
+        thread = (
+            select(ranked.c.id, literal(0).label('depth'), ranked.c.position)
+            .where(ranked.c.position.between(first, last))
+            .cte('thread', recursive=True)
+        )
+        # The extra anchor (last) only signals has_next; don't walk its replies
+        thread = thread.union_all(
+            select(Comment.id, thread.c.depth + 1, thread.c.position)
+            .join(thread, Comment.parent_id == thread.c.id)
+            .where(thread.c.depth < self.max_depth, thread.c.position < last)
+        )
+
+        return (
+            select(Comment, thread.c.depth, thread.c.position)
+            .join(thread, Comment.id == thread.c.id)
+            .options(
+                joinedload(Comment.author).load_only(User.public_id, User.username, User.display_name)
+            )
+            .order_by(thread.c.depth, thread.c.position, Comment.created_at, Comment.id)
+            .limit(self.max_rows)
+        )
+
+    async def fetch(self, db: AsyncSession, page: int = 1, per_page: int = 20) -> ThreadPage:
+        first = (page - 1) * per_page + 1
+        last = first + per_page  # one past the page
+        result = await db.execute(self._query(first, last))
+
+        nodes: Dict[int, dict] = {}
+        anchors: List[dict] = []
+        has_next = False
+        for comment, depth, position in result.all():
+            if position == last:
+                has_next = True
+                continue
+            node = comment_row(comment)
+            node['replies'] = []
+            nodes[comment.id] = node
+            if depth == 0:
+                anchors.append(node)
+            else:
+                # Rows arrive breadth-first, so the parent is already placed
+                parent = nodes.get(comment.parent_id)
+                if parent is not None:
+                    parent['replies'].append(node)
+
+        return ThreadPage(items=anchors, page=page, per_page=per_page, has_next=has_next)
+
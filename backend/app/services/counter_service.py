@@ -0,0 +1,280 @@
+"""
+Denormalized Counter Service
+Atomic SQL-side counter updates plus a bulk reconciliation job.
+
+- bump() issues `UPDATE ... SET col = col + :delta`, so concurrent writers
+  never lose increments (no ORM read-modify-write)
+- Hot counters (support_count, save_count) are sharded: add() upserts a
+  delta into one of COUNTER_SHARDS rows per post, so reaction bursts never
+  queue on the posts row lock. Reads add the pending shard sums to the
+  column; fold() moves them into posts (run by CounterFlusher, which also
+  writes the story views tallied in memory)
+- reconcile() recomputes drifted counters from the source rows in one
+  statement per counter, like the legacy backfill_support_and_comment_counts
+  migration but for values that are wrong, not just NULL. It runs on one
+  snapshot (REPEATABLE READ on PostgreSQL), retried on write conflicts
+"""
+import logging
+import random
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, case, or_, bindparam, literal
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import aliased, InstrumentedAttribute
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.metrics import metrics
+from app.core.periodic import PeriodicTask
+from app.models.models import Post, Comment, Support, Bookmark, PostCounterShard
+
+
+logger = logging.getLogger(__name__)
+
+# Sharded Post counters and the rows they count
+SHARDED_COUNTERS = {
+    'support_count': Support,
+    'save_count': Bookmark,
+}
+
+
+# PostgreSQL SQLSTATE for a write conflict under REPEATABLE READ
+SERIALIZATION_FAILURE = '40001'
+RECONCILE_ATTEMPTS = 3
+
+
+def upsert_insert(db: AsyncSession):
+    """Dialect insert() construct that supports ON CONFLICT"""
+    if db.bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def pending_delta(name: str):
+    """Correlated subquery: unfolded shard total for Post `name` (for list queries)"""
+    return (
+        select(func.coalesce(func.sum(PostCounterShard.value), 0))
+        .where(PostCounterShard.post_id == Post.id, PostCounterShard.name == name)
+        .scalar_subquery()
+        .label(f'pending_{name}')
+    )
+
+
+class CounterService:
+    """Atomic counter updates and reconciliation"""
+
+    @staticmethod
+    async def bump(
+        db: AsyncSession,
+        column: InstrumentedAttribute,
+        row_id: Optional[int],
+        delta: int = 1
+    ) -> None:
+        """Add `delta` to one row's counter in SQL, never going below zero"""
+        if row_id is None:
+            return
+        model = column.class_
+        current = func.coalesce(column, 0)
+        value = current + delta if delta >= 0 else case((current + delta < 0, 0), else_=current + delta)
+        await db.execute(
+            update(model)
+            .where(model.id == row_id)
+            .values({column.key: value})
+            .execution_options(synchronize_session=False)
+        )
+
+    # ----- Sharded counters -----
+
+    @staticmethod
+    async def add(db: AsyncSession, post_id: int, name: str, delta: int = 1) -> None:
+        """Add `delta` to a sharded Post counter (one upsert on a random shard)"""
+        insert = upsert_insert(db)
+        stmt = insert(PostCounterShard).values(
+            post_id=post_id,
+            name=name,
+            shard=random.randrange(settings.COUNTER_SHARDS),
+            value=delta,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['post_id', 'name', 'shard'],
+            set_={'value': PostCounterShard.value + stmt.excluded.value},
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    def add_from(insert, name: str, deltas):
+        """
+        Shard upsert fed by a SELECT of (post_id, value) rows, for use as a
+        data-modifying CTE next to the statement that produced the deltas.
+        """
+        source = deltas.subquery('deltas')
+        post_id, value = list(source.c)
+        stmt = insert(PostCounterShard).from_select(
+            ['post_id', 'name', 'shard', 'value'],
+            select(post_id, literal(name), literal(random.randrange(settings.COUNTER_SHARDS)), value)
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=['post_id', 'name', 'shard'],
+            set_={'value': PostCounterShard.value + stmt.excluded.value},
+        )
+
+    @staticmethod
+    async def value(db: AsyncSession, post_id: int, name: str) -> int:
+        """Exact value of one sharded counter (column + pending shards)"""
+        result = await db.execute(
+            select(func.coalesce(getattr(Post, name), 0) + pending_delta(name)).where(Post.id == post_id)
+        )
+        return max(0, result.scalar() or 0)
+
+    @staticmethod
+    def overlay(post: Post, deltas: Dict[str, int]) -> None:
+        """Apply pending shard deltas to a loaded Post without marking it dirty"""
+        for name, delta in deltas.items():
+            if delta:
+                set_committed_value(post, name, max(0, (getattr(post, name) or 0) + delta))
+
+    @classmethod
+    async def read(cls, db: AsyncSession, post: Post) -> Dict[str, int]:
+        """Exact counter values for one post (column + pending shards)"""
+        result = await db.execute(
+            select(PostCounterShard.name, func.sum(PostCounterShard.value))
+            .where(PostCounterShard.post_id == post.id)
+            .group_by(PostCounterShard.name)
+        )
+        cls.overlay(post, dict(result.all()))
+        return {name: getattr(post, name) or 0 for name in SHARDED_COUNTERS}
+
+    @staticmethod
+    async def fold(db: AsyncSession) -> int:
+        """
+        Move all pending shard deltas into the posts columns.
+        Deleting with RETURNING means increments that land mid-fold simply
+        create a fresh shard row for the next pass. Returns posts touched.
+        """
+        result = await db.execute(
+            delete(PostCounterShard).returning(
+                PostCounterShard.post_id, PostCounterShard.name, PostCounterShard.value
+            )
+        )
+        totals: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(SHARDED_COUNTERS, 0))
+        for post_id, name, value in result.all():
+            if name in SHARDED_COUNTERS:
+                totals[post_id][name] += value
+
+        if totals:
+            posts = Post.__table__
+            values = {}
+            for name in SHARDED_COUNTERS:
+                current = func.coalesce(posts.c[name], 0) + bindparam(f'd_{name}')
+                values[name] = case((current < 0, 0), else_=current)
+            stmt = update(posts).where(posts.c.id == bindparam('d_post_id')).values(values)
+            params = [
+                {'d_post_id': post_id, **{f'd_{name}': delta for name, delta in deltas.items()}}
+                for post_id, deltas in totals.items()
+            ]
+            connection = await db.connection()
+            await connection.execute(stmt, params)
+
+        await db.commit()
+        return len(totals)
+
+    # ----- Reconciliation -----
+
+    @staticmethod
+    async def _reconcile(db: AsyncSession, column: InstrumentedAttribute, actual) -> int:
+        model = column.class_
+        result = await db.execute(
+            update(model)
+            .where(or_(column.is_(None), column != actual))
+            .values({column.key: actual})
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
+
+    @classmethod
+    async def reconcile(cls, db: AsyncSession) -> Dict[str, int]:
+        """
+        Recompute drifted counters in bulk (for cron job). Returns rows fixed.
+
+        Dropping the shards and recounting must see the same rows, or a
+        toggle committing in between is counted twice (in its shard and in
+        the recount). On PostgreSQL the pass runs under REPEATABLE READ: one
+        snapshot for every statement, and a toggle or fold that changes the
+        same shard or post rows mid-pass fails it with a serialization error,
+        so it starts over. SQLite holds its write lock from the first UPDATE
+        to the commit, so nothing lands in between.
+        """
+        await db.commit()  # the isolation level applies from a transaction's start
+        for attempt in range(RECONCILE_ATTEMPTS):
+            if db.bind.dialect.name == 'postgresql':
+                await db.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+            try:
+                fixed = await cls._recount(db)
+                await db.commit()
+                return fixed
+            except DBAPIError as exc:
+                await db.rollback()
+                conflict = getattr(exc.orig, 'sqlstate', None) == SERIALIZATION_FAILURE
+                if not conflict or attempt == RECONCILE_ATTEMPTS - 1:
+                    raise
+
+    @classmethod
+    async def _recount(cls, db: AsyncSession) -> Dict[str, int]:
+        comments = select(func.count()).where(Comment.post_id == Post.id).scalar_subquery()
+
+        reply = aliased(Comment)
+        replies = select(func.count()).select_from(reply).where(reply.parent_id == Comment.id).scalar_subquery()
+
+        fixed = {
+            "comment_count": await cls._reconcile(db, Post.comment_count, comments),
+            "reply_count": await cls._reconcile(db, Comment.reply_count, replies),
+        }
+
+        # Exact recount supersedes any pending shard deltas
+        await db.execute(delete(PostCounterShard))
+        for name, model in SHARDED_COUNTERS.items():
+            actual = select(func.count()).select_from(model).where(model.post_id == Post.id).scalar_subquery()
+            fixed[name] = await cls._reconcile(db, getattr(Post, name), actual)
+        return fixed
+
+
+class CounterFlusher(PeriodicTask):
+    """
+    Background task that folds counter shards and writes the tallied story
+    views (engagement_service.pending_views) every COUNTER_FLUSH_INTERVAL
+    seconds. Shards and views left by a failed pass go out with the next one.
+    Every worker runs it: the views are tallied per process, and concurrent
+    folds delete disjoint shard rows.
+    """
+
+    name = 'counter_flush'
+
+    def __init__(self, interval: Optional[float] = None, session_factory=async_session_maker):
+        super().__init__(interval or settings.COUNTER_FLUSH_INTERVAL, session_factory)
+
+    async def flush(self) -> int:
+        from app.services.engagement_service import EngagementService  # imports this module
+        async with self.session_factory() as db:
+            folded = await CounterService.fold(db)
+            await EngagementService.flush_views(db)
+            return folded
+
+    async def run_pass(self) -> int:
+        return await self.flush()
+
+    async def stop(self):
+        """Stop the loop and fold whatever is pending"""
+        await super().stop()
+        try:
+            await self.flush()
+        except Exception:
+            metrics.inc(f"{self.name}.failed")
+            logger.exception("final %s pass failed", self.name)
+
+
+counter_flusher = CounterFlusher()
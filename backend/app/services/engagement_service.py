@@ -0,0 +1,243 @@
+"""
+Engagement Time Series
+Bucketed per-story engagement for author analytics.
+
+- The reaction, bookmark and read-progress paths add their deltas to the
+  story's current hourly bucket (one upsert, in the caller's transaction)
+- Story page views are the hottest path, so they are only tallied in
+  memory (pending_views) and written in bulk by CounterFlusher: one
+  posts.view_count increment and one bucket upsert per story and hour per
+  flush, instead of one upsert on the same (post_id, hour) row per view.
+  A worker that dies loses its unflushed views
+- compact() folds hourly buckets older than ENGAGEMENT_HOURLY_RETENTION_DAYS
+  into daily ones, so a story keeps at most a week of hourly rows plus one
+  row per active day (EngagementCompactor runs it periodically)
+- series() answers analytics from those rows; nothing scans ReadProgress
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, literal, bindparam, DateTime
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.periodic import PeriodicTask
+from app.models.models import Post, EngagementBucket
+from app.services.counter_service import upsert_insert
+
+
+METRICS = ('views', 'reads', 'rereads', 'completions', 'reactions', 'bookmarks')
+
+HOUR = 'hour'
+DAY = 'day'
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _accumulate(stmt):
+    """ON CONFLICT: add the new deltas to the existing bucket"""
+    bucket = EngagementBucket.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=['post_id', 'granularity', 'bucket_start'],
+        set_={name: bucket.c[name] + stmt.excluded[name] for name in METRICS},
+    )
+
+
+class PendingViews:
+    """Per-process view tallies by (post_id, hour), waiting for the next flush"""
+
+    def __init__(self):
+        self._counts: Dict[tuple, int] = defaultdict(int)
+
+    def add(self, post_id: int, now: Optional[datetime] = None) -> None:
+        self._counts[(post_id, hour_start(now or datetime.utcnow()))] += 1
+
+    def pending(self, post_id: int) -> int:
+        """Views of the post this worker hasn't flushed yet"""
+        return sum(n for (pid, _), n in self._counts.items() if pid == post_id)
+
+    def drain(self) -> Dict[tuple, int]:
+        counts, self._counts = self._counts, defaultdict(int)
+        return counts
+
+    def restore(self, counts: Dict[tuple, int]) -> None:
+        """Put back tallies whose flush failed"""
+        for key, n in counts.items():
+            self._counts[key] += n
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+pending_views = PendingViews()
+
+
+class EngagementService:
+    """Record, compact and read engagement buckets"""
+
+    @staticmethod
+    async def record(db: AsyncSession, post_id: int, now: Optional[datetime] = None, **deltas: int) -> None:
+        """Add deltas (views=1, reactions=-1, ...) to the post's current hourly bucket"""
+        deltas = {name: value for name, value in deltas.items() if value}
+        if not deltas:
+            return
+        insert = upsert_insert(db)
+        stmt = insert(EngagementBucket.__table__).values(
+            post_id=post_id,
+            granularity=HOUR,
+            bucket_start=hour_start(now or datetime.utcnow()),
+            **{**dict.fromkeys(METRICS, 0), **deltas},
+        )
+        await db.execute(_accumulate(stmt))
+
+    @staticmethod
+    def record_from(insert, metric: str, deltas, now: datetime):
+        """
+        Bucket upsert fed by a SELECT of (post_id, value) rows, for use as a
+        data-modifying CTE next to the statement that produced the deltas.
+        """
+        source = deltas.subquery('engagement_deltas')
+        post_id, value = list(source.c)
+        stmt = insert(EngagementBucket.__table__).from_select(
+            ['post_id', 'granularity', 'bucket_start', metric],
+            select(post_id, literal(HOUR), literal(hour_start(now), DateTime), value)
+        )
+        return _accumulate(stmt)
+
+    @staticmethod
+    async def flush_views(db: AsyncSession) -> int:
+        """
+        Write the tallied views: posts.view_count increments and hourly
+        bucket upserts, one executemany each. Returns stories touched.
+        """
+        counts = pending_views.drain()
+        if not counts:
+            return 0
+        per_post: Dict[int, int] = defaultdict(int)
+        for (post_id, _), n in counts.items():
+            per_post[post_id] += n
+        try:
+            connection = await db.connection()
+            posts = Post.__table__
+            await connection.execute(
+                update(posts)
+                .where(posts.c.id == bindparam('v_post_id'))
+                .values(view_count=func.coalesce(posts.c.view_count, 0) + bindparam('v_views')),
+                [{'v_post_id': post_id, 'v_views': n} for post_id, n in per_post.items()]
+            )
+            insert = upsert_insert(db)
+            await connection.execute(
+                _accumulate(insert(EngagementBucket.__table__)),
+                [
+                    {'post_id': post_id, 'granularity': HOUR, 'bucket_start': start,
+                     **dict.fromkeys(METRICS, 0), 'views': n}
+                    for (post_id, start), n in counts.items()
+                ]
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            pending_views.restore(counts)
+            raise
+        return len(per_post)
+
+    @staticmethod
+    async def compact(db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """
+        Fold hourly buckets older than the retention window into daily ones.
+        Only whole days move, so a day is never split between the two.
+        Returns the number of hourly rows compacted.
+        """
+        cutoff = day_start(now or datetime.utcnow()) - timedelta(days=settings.ENGAGEMENT_HOURLY_RETENTION_DAYS)
+        bucket = EngagementBucket.__table__
+        result = await db.execute(
+            delete(bucket)
+            .where(bucket.c.granularity == HOUR, bucket.c.bucket_start < cutoff)
+            .returning(bucket.c.post_id, bucket.c.bucket_start, *[bucket.c[name] for name in METRICS])
+        )
+        rows = result.all()
+
+        days: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+        for post_id, start, *values in rows:
+            totals = days[(post_id, day_start(start))]
+            for name, value in zip(METRICS, values):
+                totals[name] += value or 0
+
+        if days:
+            insert = upsert_insert(db)
+            stmt = _accumulate(insert(bucket))
+            params = [
+                {'post_id': post_id, 'granularity': DAY, 'bucket_start': start, **totals}
+                for (post_id, start), totals in days.items()
+            ]
+            connection = await db.connection()
+            await connection.execute(stmt, params)
+
+        await db.commit()
+        return len(rows)
+
+    @staticmethod
+    async def series(db: AsyncSession, post_id: int, days: int, granularity: str = DAY) -> Dict:
+        """
+        Engagement for the last `days` days, one point per active hour or day.
+        Daily series merge compacted days with not-yet-compacted hours.
+        """
+        now = datetime.utcnow()
+        if granularity == HOUR:
+            since = hour_start(now) - timedelta(days=days)
+            granularities = [HOUR]
+        else:
+            since = day_start(now) - timedelta(days=days - 1)
+            granularities = [HOUR, DAY]
+
+        result = await db.execute(
+            select(EngagementBucket.bucket_start, *[getattr(EngagementBucket, name) for name in METRICS])
+            .where(
+                EngagementBucket.post_id == post_id,
+                EngagementBucket.granularity.in_(granularities),
+                EngagementBucket.bucket_start >= since,
+            )
+        )
+
+        points: Dict[datetime, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+        totals = dict.fromkeys(METRICS, 0)
+        for start, *values in result.all():
+            point = points[start if granularity == HOUR else day_start(start)]
+            for name, value in zip(METRICS, values):
+                point[name] += value
+                totals[name] += value
+
+        series: List[dict] = [{'bucket': start, **points[start]} for start in sorted(points)]
+        return {'granularity': granularity, 'since': since, 'series': series, 'totals': totals}
+
+
+class EngagementCompactor(PeriodicTask):
+    """
+    Background task that compacts hourly buckets every
+    ENGAGEMENT_COMPACT_INTERVAL seconds. After a failed pass the hourly rows
+    stay put for the next one. One worker at a time (exclusive).
+    """
+
+    name = 'engagement_compact'
+    exclusive = True
+
+    def __init__(self, interval: Optional[float] = None, session_factory=async_session_maker):
+        super().__init__(interval or settings.ENGAGEMENT_COMPACT_INTERVAL, session_factory)
+
+    async def compact(self) -> int:
+        async with self.session_factory() as db:
+            return await EngagementService.compact(db)
+
+    async def run_pass(self) -> int:
+        return await self.compact()
+
+
+engagement_compactor = EngagementCompactor()
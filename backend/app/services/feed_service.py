@@ -0,0 +1,274 @@
+"""
+Feed Snapshots
+Precomputed hot feeds for the front page and the category pages.
+
+- For each story_type (and the unfiltered front page) and each snapshot
+  sort, the ids of the top FEED_SNAPSHOT_SIZE published stories are kept
+  in memory as a compact int array, with a byte per story for its type
+  (used by personalization_service) and the total count
+- A page inside the snapshot is a slice of that array, hydrated in one
+  `id IN (...)` query; deeper pages and cursor requests use the regular
+  listing query
+- FeedSnapshotRefresher rebuilds every snapshot in use each
+  FEED_SNAPSHOT_INTERVAL seconds; publishing, unpublishing, moving or
+  deleting a story drops the affected snapshots so they are rebuilt on the
+  next request. Snapshots are per worker process.
+- A missing or expired snapshot is built once however many requests
+  miss it at the same time; the others wait for that build (single flight)
+- Snapshots are shared by every request in the worker, so they are built
+  from the primary (their own session), never from a request's read
+  session: a lagging replica would otherwise pin a stale snapshot (one
+  missing a just-published story) on every reader until the next refresh.
+  Pages are still hydrated on the request's session
+- Random order (unsent letters) uses a snapshot of up to
+  RANDOM_FEED_MAX_IDS ids walked in a seed-keyed pseudorandom permutation:
+  a page costs per_page permutation lookups whatever the category size,
+  and the same seed gives the same order, so pages never repeat a story
+"""
+import asyncio
+import hashlib
+import secrets
+import time
+from array import array
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.periodic import PeriodicTask
+from app.models.models import StoryType
+from app.services.listing_service import StoryListing, ListingPage
+
+
+# Sorts the feed pages are served from snapshots for
+SNAPSHOT_SORTS = ('smart', 'latest', 'trending', 'most_viewed')
+
+# None is the unfiltered front page
+SNAPSHOT_TYPES = {None} | {st.value for st in StoryType}
+
+# Snapshots keep each story's type as one byte: its index here (UNKNOWN_TYPE otherwise)
+STORY_TYPES = tuple(st.value for st in StoryType)
+UNKNOWN_TYPE = 255
+_TYPE_CODES = {story_type: code for code, story_type in enumerate(STORY_TYPES)}
+
+RANDOM = 'random'
+FEISTEL_ROUNDS = 6
+
+
+def new_seed() -> int:
+    """Seed for a shuffled feed session (fits a JSON/JS safe integer)"""
+    return secrets.randbits(52)
+
+
+def _round(seed: int, round_: int, value: int) -> int:
+    digest = hashlib.blake2b(f"{seed}:{round_}:{value}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def shuffled_position(index: int, n: int, seed: int) -> int:
+    """
+    Where `index` lands in a seed-keyed pseudorandom permutation of range(n).
+
+    A balanced Feistel network permutes [0, 2^bits) for the smallest even
+    bits with 2^bits >= n; values past n are walked through the network
+    again until they fall inside (cycle walking, < 4 steps on average), so
+    the result is still a permutation of range(n).
+    """
+    half = max(1, ((n - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    value = index
+    while True:
+        left, right = value >> half, value & mask
+        for round_ in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ (_round(seed, round_, right) & mask)
+        value = (left << half) | right
+        if value < n:
+            return value
+
+
+class FeedSnapshot(NamedTuple):
+    ids: array  # story ids in listing order, at most FEED_SNAPSHOT_SIZE
+    types: bytes  # story type code (index in STORY_TYPES) of each id
+    total: int  # published stories matching, including those past the snapshot
+    built_at: float
+
+
+class FeedSnapshots:
+    """
+    Per-process store of ranked story ids keyed by (story_type, sort).
+
+    Usage:
+        page = await feed_snapshots.page(db, story_type, 'smart', page=1, per_page=20)
+        snapshot = await feed_snapshots.get(story_type, 'smart')  # ids only
+        if page is None:  # not snapshotted: fall back to StoryListing
+            ...
+
+        await db.commit()
+        feed_snapshots.invalidate(story.story_type)  # after publishing / unpublishing
+    """
+
+    def __init__(self, size: Optional[int] = None, max_age: Optional[float] = None,
+                 random_size: Optional[int] = None, session_factory=async_session_maker):
+        self.session_factory = session_factory  # builds on demand read the primary
+        self.size = size or settings.FEED_SNAPSHOT_SIZE
+        self.random_size = random_size or settings.RANDOM_FEED_MAX_IDS
+        # Past this a snapshot is rebuilt on request (the refresher normally gets there first)
+        self.max_age = max_age or settings.FEED_SNAPSHOT_INTERVAL * 2
+        self._snapshots: Dict[Tuple[Optional[str], str], FeedSnapshot] = {}
+        # Builds in progress: concurrent misses on one key wait for the same build
+        self._building: Dict[Tuple[Optional[str], str], asyncio.Future] = {}
+        self._generation = 0
+
+    def covers(self, story_type: Optional[str], sort: str, page: int, per_page: int) -> bool:
+        return story_type in SNAPSHOT_TYPES and sort in SNAPSHOT_SORTS and page * per_page <= self.size
+
+    async def build(self, db: AsyncSession, story_type: Optional[str], sort: str) -> FeedSnapshot:
+        generation = self._generation
+        listing = StoryListing.published().of_type(story_type).order(sort)
+        size = self.random_size if sort == RANDOM else self.size
+        top = await listing.top(db, size)
+        ids = array('q', [story_id for story_id, _ in top])
+        types = bytes(_TYPE_CODES.get(story_type, UNKNOWN_TYPE) for _, story_type in top)
+        total = len(ids) if len(ids) < size else await listing.count(db)
+        snapshot = FeedSnapshot(ids, types, total, time.monotonic())
+        # An invalidation during the build means these ids may already be stale
+        if generation == self._generation:
+            self._snapshots[(story_type, sort)] = snapshot
+        return snapshot
+
+    async def get(self, story_type: Optional[str], sort: str) -> FeedSnapshot:
+        key = (story_type, sort)
+        while True:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and time.monotonic() - snapshot.built_at <= self.max_age:
+                return snapshot
+            # Single flight: a cold or expired key is built once, not once per waiting request
+            pending = self._building.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this request was cancelled
+                # The building request went away: the next waiter builds
+
+        pending = self._building[key] = asyncio.get_running_loop().create_future()
+        try:
+            async with self.session_factory() as db:
+                snapshot = await self.build(db, story_type, sort)
+        except Exception as exc:
+            pending.set_exception(exc)
+            pending.exception()  # marked retrieved, in case nobody was waiting
+            raise
+        except BaseException:
+            pending.cancel()
+            raise
+        else:
+            pending.set_result(snapshot)
+            return snapshot
+        finally:
+            del self._building[key]
+
+    async def page(
+        self,
+        db: AsyncSession,
+        story_type: Optional[str],
+        sort: str,
+        page: int = 1,
+        per_page: int = 20
+    ) -> Optional[ListingPage]:
+        """One feed page from the snapshot, or None when the page isn't covered"""
+        story_type = story_type or None
+        if not self.covers(story_type, sort, page, per_page):
+            return None
+        snapshot = await self.get(story_type, sort)
+        start = (page - 1) * per_page
+        return await (
+            StoryListing.published()
+            .of_type(story_type)
+            .order(sort)
+            .fetch_ids(
+                db, list(snapshot.ids[start:start + per_page]), page, per_page,
+                total=snapshot.total,
+                has_next=start + per_page < snapshot.total,
+            )
+        )
+
+    async def shuffled_page(
+        self,
+        db: AsyncSession,
+        story_type: Optional[str],
+        seed: int,
+        page: int = 1,
+        per_page: int = 20
+    ) -> Optional[ListingPage]:
+        """
+        One page of the category in the seed's random order, or None for an
+        unknown story_type. Pages of one seed never repeat a story (while the
+        category is unchanged). Only the newest RANDOM_FEED_MAX_IDS stories
+        take part, so `total` is at most that.
+        """
+        story_type = story_type or None
+        if story_type not in SNAPSHOT_TYPES:
+            return None
+        snapshot = await self.get(story_type, RANDOM)
+        n = len(snapshot.ids)
+        start = (page - 1) * per_page
+        ids = [snapshot.ids[shuffled_position(i, n, seed)] for i in range(start, min(start + per_page, n))]
+        return await (
+            StoryListing.published()
+            .of_type(story_type)
+            .order(RANDOM)
+            .fetch_ids(db, ids, page, per_page, total=n, has_next=start + per_page < n)
+        )
+
+    def invalidate(self, *story_types: Optional[str]) -> None:
+        """
+        Drop the snapshots a story of these types appears in (its category
+        and the front page); with no types, drop everything.
+        """
+        self._generation += 1
+        if not story_types:
+            self._snapshots.clear()
+            return
+        for key in [k for k in self._snapshots if k[0] is None or k[0] in story_types]:
+            del self._snapshots[key]
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Rebuild every snapshot currently held"""
+        keys = list(self._snapshots)
+        for story_type, sort in keys:
+            await self.build(db, story_type, sort)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+class FeedSnapshotRefresher(PeriodicTask):
+    """
+    Background task that rebuilds the feed snapshots every
+    FEED_SNAPSHOT_INTERVAL seconds. After a failed pass the previous
+    snapshots keep serving until they expire (max_age). Snapshots are per
+    process, so every worker runs it.
+    """
+
+    name = 'feed_snapshot_refresh'
+
+    def __init__(self, snapshots: FeedSnapshots, interval: Optional[float] = None,
+                 session_factory=async_session_maker):
+        super().__init__(interval or settings.FEED_SNAPSHOT_INTERVAL, session_factory)
+        self.snapshots = snapshots
+
+    async def refresh(self) -> int:
+        async with self.session_factory() as db:
+            return await self.snapshots.refresh(db)
+
+    async def run_pass(self) -> int:
+        return await self.refresh()
+
+
+feed_snapshots = FeedSnapshots()
+feed_snapshot_refresher = FeedSnapshotRefresher(feed_snapshots)
@@ -0,0 +1,375 @@
+"""
+Story Listing Engine
+One query builder for every story list (feed, category, search, featured,
+bookmarks, author pages, drafts) so listing optimizations land in one place.
+
+- Authors are fetched in the same query (LEFT JOIN, three columns only)
+- Post.content is deferred; list items carry the precomputed excerpt instead
+- Pending counter shard deltas ride along as correlated subqueries
+- Offset pagination (page/per_page) or keyset pagination (opaque cursor)
+- Count query shares the exact same filters as the page query
+- Filters are bound parameters, so the page and count statements are built
+  once per listing shape and reused (no per-request query construction)
+"""
+import base64
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Any, Dict, Tuple, Literal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc, func, or_, and_, bindparam, DateTime, Float, Integer
+from sqlalchemy.orm import joinedload, defer
+
+from app.core.exceptions import ValidationError
+from app.models.models import Post, User, Bookmark, PostStatus
+from app.utils.serialization import post_rows
+from app.services.counter_service import CounterService, SHARDED_COUNTERS, pending_delta
+
+
+# Sort modes -> key expressions, all ordered DESC with Post.id as final tiebreak
+SORT_KEYS = {
+    'latest': [Post.published_at],
+    'most_viewed': [Post.view_count],
+    'trending': [Post.support_count, Post.published_at],
+    'smart': [Post.rank_score, Post.published_at],
+    'featured': [Post.featured_at],
+    'updated': [Post.updated_at],
+    'bookmarked': [Bookmark.created_at],
+}
+
+# Sorts that can't be paged by cursor
+UNSTABLE_SORTS = {'random'}
+
+# Sorts on a joined table: set by the filter that adds the join, never by order()
+JOINED_SORTS = {'bookmarked'}
+
+# Sorts clients may request (GET /api/posts?sort_by=)
+FeedSort = Literal['smart', 'latest', 'trending', 'most_viewed', 'random']
+
+# Filter name -> predicate; values travel as bound parameters
+FILTERS = {
+    'status': Post.status == bindparam('status'),
+    'story_type': Post.story_type == bindparam('story_type'),
+    'author': Post.user_id == bindparam('author_id'),
+    'named': Post.is_anonymous == False,
+    'featured': Post.is_featured == True,
+    'matching': or_(Post.title.ilike(bindparam('pattern')), Post.content.ilike(bindparam('pattern'))),
+    'bookmarked': Bookmark.user_id == bindparam('bookmark_user_id'),
+    'ids': Post.id.in_(bindparam('ids', expanding=True)),
+}
+
+# Listing shape -> built statements. Shapes come from the fixed set of
+# routes calling StoryListing, so this stays small.
+_statements: Dict[tuple, Any] = {}
+
+
+@dataclass
+class ListingPage:
+    """One page of a listing plus the metadata routes need"""
+    items: List[Post]
+    page: int
+    per_page: int
+    total: Optional[int] = None
+    has_next: bool = False
+    next_cursor: Optional[str] = None
+
+    @property
+    def total_pages(self) -> int:
+        if not self.total:
+            return 0
+        return (self.total + self.per_page - 1) // self.per_page
+
+    def to_dicts(self) -> List[dict]:
+        return [s.to_dict(include_content=False) for s in self.items]
+
+    def to_rows(self) -> List[dict]:
+        """Rows for FastJSONResponse (datetimes left for the encoder)"""
+        return post_rows(self.items)
+
+    def pagination(self) -> Dict[str, Any]:
+        """Standard pagination block used by the feed endpoints"""
+        total_pages = self.total_pages
+        return {
+            "total": self.total,
+            "page": self.page,
+            "per_page": self.per_page,
+            "total_pages": total_pages,
+            "has_next": self.has_next,
+            "has_prev": self.page > 1,
+            "next_page": self.page + 1 if self.has_next else None,
+            "prev_page": self.page - 1 if self.page > 1 else None,
+            "next_cursor": self.next_cursor,
+        }
+
+
+class StoryListing:
+    """
+    Chainable builder for story list queries.
+
+    Usage:
+        page = await (
+            StoryListing.published()
+            .of_type('regret')
+            .order('smart')
+            .fetch(db, page=2, per_page=20)
+        )
+        return {"stories": page.to_dicts(), **page.pagination()}
+    """
+
+    def __init__(self, status: Optional[str] = PostStatus.PUBLISHED.value):
+        self._filters: List[str] = []
+        self._params: Dict[str, Any] = {}
+        if status is not None:
+            self._where('status', status=status)
+        self._sort = 'latest'
+        self._with_author = True
+
+    @classmethod
+    def published(cls) -> "StoryListing":
+        return cls(PostStatus.PUBLISHED.value)
+
+    # ----- Filters -----
+
+    def _where(self, name: str, **params) -> "StoryListing":
+        self._filters.append(name)
+        self._params.update(params)
+        return self
+
+    def of_type(self, story_type: Optional[str]) -> "StoryListing":
+        if story_type:
+            self._where('story_type', story_type=story_type)
+        return self
+
+    def by_author(self, user_id: int, include_anonymous: bool = True) -> "StoryListing":
+        self._where('author', author_id=user_id)
+        if not include_anonymous:
+            self._where('named')
+        return self
+
+    def featured(self) -> "StoryListing":
+        return self._where('featured')
+
+    def matching(self, text: str) -> "StoryListing":
+        return self._where('matching', pattern=f"%{text}%")
+
+    def bookmarked_by(self, user_id: int) -> "StoryListing":
+        """Stories the user bookmarked, newest bookmark first"""
+        self._sort = 'bookmarked'
+        return self._where('bookmarked', bookmark_user_id=user_id)
+
+    def with_ids(self, ids: List[int]) -> "StoryListing":
+        return self._where('ids', ids=list(ids))
+
+    def order(self, sort_by: str) -> "StoryListing":
+        known = sort_by in SORT_KEYS or sort_by in UNSTABLE_SORTS
+        self._sort = sort_by if known and sort_by not in JOINED_SORTS else 'smart'
+        return self
+
+    def without_author(self) -> "StoryListing":
+        self._with_author = False
+        return self
+
+    # ----- Query building -----
+
+    def _shape(self) -> tuple:
+        return (tuple(self._filters), self._sort, self._with_author)
+
+    def _statement(self, kind: str, build):
+        """The `kind` statement for this listing's shape, built on first use"""
+        key = (kind,) + self._shape()
+        statement = _statements.get(key)
+        if statement is None:
+            statement = _statements[key] = build()
+        return statement
+
+    def _from(self, query):
+        if 'bookmarked' in self._filters:
+            query = query.join(Bookmark, Bookmark.post_id == Post.id)
+        return query.where(*[FILTERS[name] for name in self._filters])
+
+    def _sort_keys(self) -> list:
+        return SORT_KEYS.get(self._sort, [])
+
+    def _page_query(self, key_columns: list):
+        pending = [pending_delta(name) for name in SHARDED_COUNTERS]
+        query = self._from(select(Post, *key_columns, *pending)).options(defer(Post.content))
+        if self._with_author:
+            query = query.options(
+                joinedload(Post.author).load_only(User.public_id, User.username, User.display_name)
+            )
+        if self._sort == 'random':
+            return query.order_by(func.random())
+        return query.order_by(*[desc(k) for k in key_columns])
+
+    def _offset_query(self, key_columns: list):
+        return (
+            self._page_query(key_columns)
+            .offset(bindparam('offset'))
+            .limit(bindparam('limit'))
+        )
+
+    async def count(self, db: AsyncSession) -> int:
+        query = self._statement('count', lambda: self._from(select(func.count()).select_from(Post)))
+        result = await db.execute(query, self._params)
+        return result.scalar() or 0
+
+    async def fetch(
+        self,
+        db: AsyncSession,
+        page: int = 1,
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> ListingPage:
+        """
+        Fetch one page. With `cursor`, uses keyset pagination (no OFFSET, no
+        count); otherwise offset pagination with an optional total count.
+        """
+        key_columns = self._sort_keys() + [Post.id]
+        # One extra row tells us whether another page exists
+        params = dict(self._params, limit=per_page + 1)
+
+        if cursor:
+            if self._sort in UNSTABLE_SORTS:
+                raise ValidationError("Cursor pagination is not supported for this sort")
+            values = _decode_cursor(cursor, self._sort, key_columns)
+            nulls_first = db.bind.dialect.name == 'postgresql'
+            # The keyset predicate carries the cursor values, so this one is built per request
+            query = (
+                self._statement('page', lambda: self._page_query(key_columns))
+                .where(_after(key_columns, values, nulls_first))
+                .limit(bindparam('limit'))
+            )
+            with_total = False
+        else:
+            query = self._statement('offset', lambda: self._offset_query(key_columns))
+            params['offset'] = (page - 1) * per_page
+
+        result = await db.execute(query, params)
+        rows = result.all()
+        has_next = len(rows) > per_page
+
+        return self._page(
+            rows[:per_page], key_columns, page, per_page,
+            total=await self.count(db) if with_total else None,
+            has_next=has_next,
+        )
+
+    async def top(self, db: AsyncSession, limit: int) -> List[Tuple[int, str]]:
+        """(id, story_type) of the first `limit` stories in listing order, without loading rows"""
+        key_columns = self._sort_keys() + [Post.id]
+        query = self._statement('top', lambda: (
+            self._from(select(Post.id, Post.story_type))
+            .order_by(*[desc(k) for k in key_columns])
+            .limit(bindparam('limit'))
+        ))
+        result = await db.execute(query, dict(self._params, limit=limit))
+        return [tuple(row) for row in result.all()]
+
+    async def fetch_ids(
+        self,
+        db: AsyncSession,
+        ids: List[int],
+        page: int,
+        per_page: int,
+        total: Optional[int],
+        has_next: bool
+    ) -> ListingPage:
+        """
+        A page of already-ranked story ids (see feed_service), hydrated in
+        one query and kept in the given order. Ids that no longer match the
+        filters (unpublished or deleted since) are dropped.
+        """
+        key_columns = self._sort_keys() + [Post.id]
+        self.with_ids(ids)
+        query = self._statement('page', lambda: self._page_query(key_columns))
+        result = await db.execute(query, self._params)
+        found = {row[0].id: row for row in result.all()}
+        rows = [found[i] for i in ids if i in found]
+        return self._page(rows, key_columns, page, per_page, total=total, has_next=has_next)
+
+    def _page(self, rows: list, key_columns: list, page: int, per_page: int,
+              total: Optional[int], has_next: bool) -> ListingPage:
+        keys_end = 1 + len(key_columns)
+        for row in rows:
+            CounterService.overlay(row[0], dict(zip(SHARDED_COUNTERS, row[keys_end:])))
+
+        next_cursor = None
+        if has_next and rows and self._sort not in UNSTABLE_SORTS:
+            next_cursor = _encode_cursor(self._sort, list(rows[-1][1:keys_end]))
+
+        return ListingPage(
+            items=[row[0] for row in rows],
+            page=page,
+            per_page=per_page,
+            total=total,
+            has_next=has_next,
+            next_cursor=next_cursor,
+        )
+
+
+def _after(key_columns: list, values: list, nulls_first: bool):
+    """
+    Keyset predicate: rows strictly after `values` in (k1 DESC, k2 DESC, ..., id DESC).
+
+    NULL placement follows the dialect default for DESC (first on Postgres,
+    last on SQLite) so the ORDER BY still matches the plain b-tree indexes.
+    """
+    column, value = key_columns[0], values[0]
+    rest = key_columns[1:]
+
+    if not rest:
+        return column < value
+
+    tail = _after(rest, values[1:], nulls_first)
+    if value is None:
+        if nulls_first:
+            return or_(and_(column.is_(None), tail), column.isnot(None))
+        return and_(column.is_(None), tail)
+
+    after = or_(column < value, and_(column == value, tail))
+    if not nulls_first:
+        after = or_(after, column.is_(None))
+    return after
+
+
+def _encode_cursor(sort: str, values: list) -> str:
+    encoded = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps([sort, encoded], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str, key_columns: list) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor")
+
+    if cursor_sort != sort or not isinstance(values, list) or len(values) != len(key_columns):
+        raise ValidationError("Cursor does not match this listing")
+
+    return [_cursor_value(column, value) for column, value in zip(key_columns, values)]
+
+
+def _cursor_value(column, value):
+    """A decoded cursor value, checked against its key column's type"""
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    elif isinstance(column.type, Integer):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif isinstance(column.type, Float):
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return value
+    elif isinstance(value, str):
+        return value
+    raise ValidationError("Invalid cursor")
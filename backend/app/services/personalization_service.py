@@ -0,0 +1,169 @@
+"""
+Personalized Ranking
+Re-ranks the global smart feed for a signed-in reader.
+
+- Candidates are the top PERSONALIZE_CANDIDATES stories of the smart feed
+  snapshot (feed_service), which already holds each story's type
+- A reader's profile is their story_type affinity (their reads,
+  completions, supports and bookmarks per type, as shares of the total)
+  plus the ids of the stories they completed. One query builds it and it
+  is cached for AFFINITY_CACHE_TTL seconds; completing a story drops it
+- A candidate at position p scores (1 + PERSONALIZE_BOOST * affinity) /
+  (p + POSITION_OFFSET): the global order stays the prior and a reader's
+  categories are lifted; completed stories are left out
+- So a personalized page costs one cache lookup, an in-memory sort of the
+  candidates and the usual `id IN (...)` hydration. Past the candidates
+  the feed continues with the global order from that position, completed
+  stories still left out.
+"""
+from itertools import islice
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, case, literal, union_all, Float
+
+from app.core.config import settings
+from app.models.models import Post, Support, Bookmark, ReadProgress
+from app.services.feed_service import FeedSnapshot, SNAPSHOT_TYPES, STORY_TYPES, feed_snapshots
+from app.services.listing_service import StoryListing, ListingPage
+from app.utils.cache import cache
+
+
+# How much each interaction says about a reader's taste
+READ_WEIGHT = 1.0
+COMPLETED_WEIGHT = 2.0  # replaces READ_WEIGHT for finished reads
+SUPPORT_WEIGHT = 3.0
+BOOKMARK_WEIGHT = 3.0
+
+# Flattens the position prior so affinity can move stories across a few
+# places near the top, not just swap neighbours further down
+POSITION_OFFSET = 10
+
+
+class ReaderProfile(NamedTuple):
+    affinity: Dict[str, float]  # story_type -> share of the reader's interactions
+    completed: FrozenSet[int]  # post ids read to the end
+
+
+def affinity_cache_key(user_id: int) -> str:
+    return f"affinity:{user_id}"
+
+
+def _interactions(user_id: int):
+    """(post_id, story_type, weight, completed) for each of the reader's reads, supports and bookmarks"""
+    reads = (
+        select(
+            ReadProgress.post_id,
+            Post.story_type,
+            case((ReadProgress.completed, COMPLETED_WEIGHT), else_=READ_WEIGHT).label('weight'),
+            ReadProgress.completed,
+        )
+        .join(Post, Post.id == ReadProgress.post_id)
+        .where(ReadProgress.user_id == user_id)
+    )
+    supports = (
+        select(Support.post_id, Post.story_type, literal(SUPPORT_WEIGHT, Float), literal(False))
+        .join(Post, Post.id == Support.post_id)
+        .where(Support.giver_id == user_id)
+    )
+    bookmarks = (
+        select(Bookmark.post_id, Post.story_type, literal(BOOKMARK_WEIGHT, Float), literal(False))
+        .join(Post, Post.id == Bookmark.post_id)
+        .where(Bookmark.user_id == user_id)
+    )
+    return union_all(reads, supports, bookmarks)
+
+
+async def load_profile(db: AsyncSession, user_id: int) -> ReaderProfile:
+    """The reader's profile, from the cache or one query over their interactions"""
+    key = affinity_cache_key(user_id)
+    cached = await cache.get(key)
+    if cached is None:
+        weights: Dict[str, float] = {}
+        completed = set()
+        for post_id, story_type, weight, is_completed in (await db.execute(_interactions(user_id))).all():
+            weights[story_type] = weights.get(story_type, 0.0) + weight
+            if is_completed:
+                completed.add(post_id)
+        total = sum(weights.values())
+        cached = {
+            'affinity': {story_type: weight / total for story_type, weight in weights.items()},
+            'completed': sorted(completed),
+        }
+        await cache.set(key, cached, ttl=settings.AFFINITY_CACHE_TTL)
+    return ReaderProfile(cached['affinity'], frozenset(cached['completed']))
+
+
+async def forget_profile(user_id: int) -> None:
+    """Drop the cached profile (after the reader completes a story)"""
+    await cache.delete(affinity_cache_key(user_id))
+
+
+def rerank(snapshot: FeedSnapshot, profile: ReaderProfile, candidates: Optional[int] = None,
+           boost: Optional[float] = None) -> List[int]:
+    """The snapshot's first `candidates` ids in the reader's order, completed stories left out"""
+    candidates = candidates or settings.PERSONALIZE_CANDIDATES
+    boost = settings.PERSONALIZE_BOOST if boost is None else boost
+    # Indexed by type code; unknown types (code 255) get no lift
+    lift = [1 + boost * profile.affinity.get(story_type, 0.0) for story_type in STORY_TYPES]
+    lift += [1.0] * (256 - len(lift))
+    ids, types = snapshot.ids, snapshot.types
+    positions = [p for p in range(min(candidates, len(ids))) if ids[p] not in profile.completed]
+    positions.sort(key=lambda p: lift[types[p]] / (p + POSITION_OFFSET), reverse=True)
+    return [ids[p] for p in positions]
+
+
+async def personalized_page(
+    db: AsyncSession,
+    user_id: int,
+    story_type: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20
+) -> Optional[ListingPage]:
+    """
+    One page of the smart feed in the reader's order, or None for an
+    unknown story_type (serve the global order then).
+
+    The reader's order is the re-ranked candidates followed by the global
+    order from position PERSONALIZE_CANDIDATES on, completed stories left
+    out of both, so paging hands off from one to the other without
+    skipping or repeating a story whatever per_page is. `total` discounts
+    the completed stories inside the snapshot; ones deeper than the
+    snapshot are only dropped from the pages.
+    """
+    story_type = story_type or None
+    if story_type not in SNAPSHOT_TYPES:
+        return None
+    snapshot = await feed_snapshots.get(story_type, 'smart')
+    profile = await load_profile(db, user_id)
+    ranked = rerank(snapshot, profile)
+    candidates = min(len(snapshot.ids), settings.PERSONALIZE_CANDIDATES)
+    start, end = (page - 1) * per_page, page * per_page
+    listing = StoryListing.published().of_type(story_type).order('smart')
+
+    # The part of this page past the re-ranked candidates
+    rest = []
+    if end > len(ranked):
+        skip = max(0, start - len(ranked))
+        take = end - len(ranked) - skip
+        rest = _unread(snapshot.ids[candidates:], profile.completed, skip, take)
+        if len(rest) < take and len(snapshot.ids) < snapshot.total:
+            # Deeper than the snapshot: ids only, enough to make up for completed ones
+            depth = candidates + skip + take + len(profile.completed)
+            ids = [story_id for story_id, _ in await listing.top(db, depth)]
+            rest = _unread(ids[candidates:], profile.completed, skip, take)
+
+    total = snapshot.total - len(profile.completed.intersection(snapshot.ids))
+    result = await listing.fetch_ids(
+        db, ranked[start:end] + rest, page, per_page,
+        total=total,
+        has_next=end < total,
+    )
+    # A keyset cursor would continue the global order, not the reader's
+    result.next_cursor = None
+    return result
+
+
+def _unread(ids, completed: FrozenSet[int], skip: int, take: int) -> List[int]:
+    """`take` ids after the first `skip`, counting only stories not in `completed`"""
+    return list(islice((story_id for story_id in ids if story_id not in completed), skip, skip + take))
@@ -10,10 +10,16 @@ Formula: score = points / (age_hours + 2) ^ gravity
 from datetime import datetime, timezone
 from typing import Optional, Tuple, List, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, delete, func, exists, literal
 from sqlalchemy.orm import selectinload
 
 from app.models.models import Post, Support, Bookmark, ReadProgress, PostStatus, StoryType
+from app.services.listing_service import StoryListing
+from app.services.counter_service import CounterService, upsert_insert, pending_delta
+from app.services.engagement_service import EngagementService
+from app.services.feed_service import feed_snapshots, new_seed
+from app.services.scoring_service import RankScorer, GRAVITY
+from app.services.personalization_service import personalized_page, forget_profile
 
 
 class RankingService:
@@ -23,8 +29,8 @@ class RankingService:
     Industry-standard approach used by Hacker News, Reddit, etc.
     """
     
-    # Gravity decay factor (higher = faster decay for old content)
-    GRAVITY = 1.8
+    # Gravity decay factor (higher = faster decay for old content), shared with the batch scorer
+    GRAVITY = GRAVITY
     
     # Special handling for privacy-sensitive categories
     RANDOM_CATEGORIES = {StoryType.UNSENT_LETTER}
@@ -36,7 +42,8 @@ class RankingService:
         story_type: Optional[str] = None,
         page: int = 1,
         per_page: int = 20,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        seed: Optional[int] = None
     ) -> dict:
         """
         Get stories ranked using Gravity Sort algorithm.
@@ -46,62 +53,45 @@ class RankingService:
             story_type: StoryType string (optional filter)
             page: Page number
             per_page: Items per page
-            user_id: Optional user ID (for future personalization)
+            user_id: Signed-in reader: the feed is re-ranked by their story type
+                affinity and skips stories they completed (personalization_service)
+            seed: Random order seed returned with the first page (unsent letters)
             
         Returns:
             Dict with stories, pagination info, and algorithm used
         """
-        # Build base query with eager loading
-        query = select(Post).options(selectinload(Post.author)).where(
-            Post.status == PostStatus.PUBLISHED.value
-        )
-        
-        # Filter by story type if specified
-        if story_type:
-            query = query.where(Post.story_type == story_type)
+        extra = {}
         
         # Apply ranking based on category
         if story_type and story_type == StoryType.UNSENT_LETTER.value:
-            # Unsent Letters: Pure random for privacy
-            query = query.order_by(func.random())
+            # Unsent Letters: Pure random for privacy, stable across one seed's pages
+            extra["seed"] = seed if seed is not None else new_seed()
+            result = await feed_snapshots.shuffled_page(db, story_type, extra["seed"], page, per_page)
             algorithm = "random"
         else:
-            # All other categories: Gravity Sort
-            query = cls._apply_gravity_ranking(query)
-            algorithm = "gravity"
-        
-        # Count total
-        count_query = select(func.count()).select_from(Post).where(
-            Post.status == PostStatus.PUBLISHED.value
-        )
-        if story_type:
-            count_query = count_query.where(Post.story_type == story_type)
-        
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        stories = result.scalars().all()
-        
-        total_pages = (total + per_page - 1) // per_page
+            # All other categories: Gravity Sort, re-ranked for a signed-in reader
+            result = None
+            if user_id:
+                result = await personalized_page(db, user_id, story_type, page, per_page)
+            algorithm = "gravity" if result is None else "personalized"
+            if result is None:
+                listing = cls._apply_gravity_ranking(StoryListing.published().of_type(story_type))
+                result = await listing.fetch(db, page=page, per_page=per_page)
         
         return {
-            "stories": [s.to_dict() for s in stories],
-            "total": total,
+            "stories": result.to_dicts(),
+            "total": result.total,
             "page": page,
             "per_page": per_page,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
+            "total_pages": result.total_pages,
+            "has_next": result.has_next,
             "has_prev": page > 1,
-            "ranking_algorithm": algorithm
+            "ranking_algorithm": algorithm,
+            **extra
         }
     
     @classmethod
-    def _apply_gravity_ranking(cls, query):
+    def _apply_gravity_ranking(cls, listing: StoryListing) -> StoryListing:
         """
         Apply Gravity Sort ranking (Hacker News style).
         
@@ -112,7 +102,7 @@ class RankingService:
         - Engagement: Popular content stays visible longer
         """
         # Order by rank_score (pre-calculated) with fallback to published_at
-        return query.order_by(desc(Post.rank_score), desc(Post.published_at))
+        return listing.order('smart')
     
     @classmethod
     async def update_story_metrics(
@@ -140,8 +130,9 @@ class RankingService:
         if not story:
             return False
         
-        # Update view count
-        story.view_count += 1
+        # Update view count (SQL increments, like the other counters here)
+        await CounterService.bump(db, Post.view_count, story.id)
+        engagement = {'views': 1}
         
         if user_id:
             # Track reading progress
@@ -157,7 +148,8 @@ class RankingService:
                 # Returning reader
                 existing_progress.read_count += 1
                 existing_progress.last_read = datetime.utcnow()
-                story.reread_count += 1
+                await CounterService.bump(db, Post.reread_count, story.id)
+                engagement['rereads'] = 1
                 
                 if scroll_depth:
                     existing_progress.scroll_depth = max(
@@ -170,10 +162,15 @@ class RankingService:
                     ) // 2
                 
                 if scroll_depth and scroll_depth >= 0.9:
+                    if not existing_progress.completed:
+                        engagement['completions'] = 1
                     existing_progress.completed = True
             else:
                 # New reader
-                story.unique_readers += 1
+                await CounterService.bump(db, Post.unique_readers, story.id)
+                engagement['reads'] = 1
+                if (scroll_depth or 0) >= 0.9:
+                    engagement['completions'] = 1
                 
                 progress = ReadProgress(
                     user_id=user_id,
@@ -187,7 +184,10 @@ class RankingService:
             # Update completion rate
             await cls._update_completion_rate(db, story)
         
+        await EngagementService.record(db, story.id, **engagement)
         await db.commit()
+        if 'completions' in engagement:
+            await forget_profile(user_id)  # drop it from their personalized feed
         return True
     
     @classmethod
@@ -210,36 +210,92 @@ class RankingService:
     ) -> Tuple[Optional[bool], int]:
         """
         Toggle bookmark status for a story.
-        Returns (is_bookmarked, total_saves)
+        Returns (is_bookmarked, total_saves); is_bookmarked is None if the story doesn't exist.
+        
+        PostgreSQL: one statement - DELETE ... RETURNING, INSERT ... ON CONFLICT
+        DO NOTHING RETURNING and the save_count shard upsert chained as CTEs.
+        Other dialects run the same steps as separate statements.
         """
-        # Find story
-        result = await db.execute(select(Post).where(Post.public_id == story_id))
-        story = result.scalar_one_or_none()
+        now = datetime.utcnow()
+        insert = upsert_insert(db)
         
-        if not story:
+        if db.bind.dialect.name == 'postgresql':
+            result = await db.execute(cls._toggle_bookmark_statement(insert, story_id, user_id, now))
+            row = result.first()
+            await db.commit()
+            if row is None:
+                return None, 0
+            return bool(row[0]), max(0, row[1])
+        
+        post_id = await db.scalar(select(Post.id).where(Post.public_id == story_id))
+        if post_id is None:
             return None, 0
         
-        # Check existing bookmark
-        bookmark_result = await db.execute(
-            select(Bookmark).where(
-                Bookmark.user_id == user_id,
-                Bookmark.post_id == story.id
-            )
+        removed = await db.execute(
+            delete(Bookmark)
+            .where(Bookmark.user_id == user_id, Bookmark.post_id == post_id)
+            .returning(Bookmark.id)
         )
-        existing = bookmark_result.scalar_one_or_none()
-        
-        if existing:
-            await db.delete(existing)
-            story.save_count = max(0, (story.save_count or 0) - 1)
-            is_bookmarked = False
+        if removed.first():
+            is_bookmarked, delta = False, -1
         else:
-            bookmark = Bookmark(user_id=user_id, post_id=story.id)
-            db.add(bookmark)
-            story.save_count = (story.save_count or 0) + 1
-            is_bookmarked = True
+            added = await db.execute(
+                insert(Bookmark)
+                .values(user_id=user_id, post_id=post_id, created_at=now)
+                .on_conflict_do_nothing()
+                .returning(Bookmark.id)
+            )
+            # A lost race still ends bookmarked, just without a second count
+            is_bookmarked, delta = True, 1 if added.first() else 0
         
+        if delta:
+            await CounterService.add(db, post_id, 'save_count', delta)
+            await EngagementService.record(db, post_id, now, bookmarks=delta)
+        save_count = await CounterService.value(db, post_id, 'save_count')
         await db.commit()
-        return is_bookmarked, story.save_count
+        return is_bookmarked, save_count
+    
+    @staticmethod
+    def _toggle_bookmark_statement(insert, story_id: str, user_id: int, now: datetime):
+        """Single-round-trip bookmark toggle (PostgreSQL data-modifying CTEs)"""
+        story = select(Post.id).where(Post.public_id == story_id).cte('story')
+        removed = (
+            delete(Bookmark)
+            .where(Bookmark.user_id == user_id, Bookmark.post_id == select(story.c.id).scalar_subquery())
+            .returning(Bookmark.post_id)
+            .cte('removed')
+        )
+        added = (
+            insert(Bookmark)
+            .from_select(
+                ['user_id', 'post_id', 'created_at'],
+                select(literal(user_id), story.c.id, literal(now)).where(~exists(select(removed.c.post_id)))
+            )
+            .on_conflict_do_nothing()
+            .returning(Bookmark.post_id)
+            .cte('added')
+        )
+        delta = (
+            select(func.count()).select_from(added).scalar_subquery()
+            - select(func.count()).select_from(removed).scalar_subquery()
+        )
+        counted = CounterService.add_from(
+            insert, 'save_count', select(story.c.id, delta).where(delta != 0)
+        ).cte('counted')
+        tracked = EngagementService.record_from(
+            insert, 'bookmarks', select(story.c.id, delta).where(delta != 0), now
+        ).cte('tracked')
+        
+        # CTEs share one snapshot, so add this statement's delta by hand
+        return (
+            select(
+                exists(select(added.c.post_id)),
+                func.coalesce(Post.save_count, 0) + pending_delta('save_count') + delta
+            )
+            .select_from(story)
+            .join(Post, Post.id == story.c.id)
+            .add_cte(counted, tracked)
+        )
     
     @classmethod
     async def is_bookmarked(
@@ -274,61 +330,23 @@ class RankingService:
         per_page: int = 20
     ) -> dict:
         """Get all bookmarked stories for a user with eager loading"""
-        query = select(Post).options(selectinload(Post.author)).join(Bookmark).where(
-            Bookmark.user_id == user_id,
-            Post.status == PostStatus.PUBLISHED.value
-        ).order_by(desc(Bookmark.created_at))
-        
-        # Count
-        count_query = select(func.count()).select_from(Post).join(Bookmark).where(
-            Bookmark.user_id == user_id,
-            Post.status == PostStatus.PUBLISHED.value
+        result = await (
+            StoryListing.published()
+            .bookmarked_by(user_id)
+            .fetch(db, page=page, per_page=per_page)
         )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        stories = result.scalars().all()
         
         return {
-            "stories": [s.to_dict() for s in stories],
-            "total": total,
+            "stories": result.to_dicts(),
+            "total": result.total,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": result.total_pages
         }
     
     @classmethod
-    async def recalculate_rank_scores(cls, db: AsyncSession):
-        """Batch recalculate all story rank scores (for cron job)"""
-        now = datetime.utcnow()
-        
-        # Get all published posts
-        result = await db.execute(
-            select(Post).where(Post.status == PostStatus.PUBLISHED.value)
-        )
-        stories = result.scalars().all()
-        
-        for story in stories:
-            # Calculate points
-            points = (
-                (story.save_count or 0) + 
-                (story.support_count or 0) + 
-                ((story.view_count or 0) / 10.0)
-            )
-            
-            # Calculate age in hours
-            if story.published_at:
-                age_hours = (now - story.published_at).total_seconds() / 3600
-            else:
-                age_hours = 0
-            
-            # Calculate gravity score
-            story.rank_score = (points + 1) / pow(age_hours + 2, cls.GRAVITY)
-            story.last_ranked_at = now
-        
-        await db.commit()
+    async def recalculate_rank_scores(cls, db: AsyncSession, formula: Optional[str] = None) -> int:
+        """Batch recalculate all story rank scores (for cron job); see scoring_service"""
+        scored = await RankScorer(formula).run(db)
+        feed_snapshots.invalidate()  # 'smart' order changed
+        return scored
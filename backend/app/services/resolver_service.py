@@ -0,0 +1,142 @@
+"""
+Public ID Resolution Cache
+Process-wide, bounded LRU cache of public_id -> internal row reference.
+
+- Read routes that only need a story's or user's internal id (reaction
+  and bookmark lookups, author filters, the personalized feed's reader)
+  resolve it from memory instead of loading the row first
+- The cache serves reads only. Writes on a story (comments, reactions,
+  read progress), authorization checks (analytics ownership) and token
+  refresh pass fresh=True, which reads the row (one small indexed
+  query) and replaces the entry, so another worker's stale entry never
+  decides them
+- Entries are dropped after any commit that changes what they hold
+  (status change, shredding, deletion, suspension); ID_CACHE_TTL bounds
+  staleness across worker processes, which each keep their own cache
+- Misses are never cached, so a story becomes resolvable as soon as it
+  is committed
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import PostStatus
+from app.models.queries import POST_REF_BY_PUBLIC_ID, USER_REF_BY_PUBLIC_ID
+
+
+class PostRef(NamedTuple):
+    """The Post fields routes need before doing the real work"""
+    id: int
+    status: str
+    user_id: int
+    author_token: Optional[str]
+
+    @property
+    def is_published(self) -> bool:
+        return self.status == PostStatus.PUBLISHED.value
+
+
+class UserRef(NamedTuple):
+    id: int
+    is_active: bool
+
+
+class LRUCache:
+    """Bounded mapping with per-entry expiry; least recently used goes first"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def pop_where(self, predicate) -> None:
+        """Drop every entry whose value matches"""
+        for key in [k for k, (_, value) in self._data.items() if predicate(value)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class IdResolver:
+    """
+    Resolve public ids to internal references, cached.
+
+    Usage:
+        ref = await id_resolver.post(db, story_id)
+        if not ref:
+            raise NotFoundError("Story")
+        ...
+        ref = await id_resolver.post(db, story_id, fresh=True)  # before writing
+        await db.commit()
+        id_resolver.forget_post(story_id)  # after changing status / deleting
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        self._posts = LRUCache(maxsize or settings.ID_CACHE_SIZE, ttl or settings.ID_CACHE_TTL)
+        self._users = LRUCache(maxsize or settings.ID_CACHE_SIZE, ttl or settings.ID_CACHE_TTL)
+
+    async def post(self, db: AsyncSession, public_id: str, fresh: bool = False) -> Optional[PostRef]:
+        ref = None if fresh else self._posts.get(public_id)
+        if ref is None:
+            result = await db.execute(POST_REF_BY_PUBLIC_ID, {'public_id': public_id})
+            row = result.first()
+            if row is None:
+                return None
+            ref = PostRef(*row)
+            self._posts.set(public_id, ref)
+        return ref
+
+    async def user(self, db: AsyncSession, public_id: str, fresh: bool = False) -> Optional[UserRef]:
+        ref = None if fresh else self._users.get(public_id)
+        if ref is None:
+            result = await db.execute(USER_REF_BY_PUBLIC_ID, {'public_id': public_id})
+            row = result.first()
+            if row is None:
+                return None
+            ref = UserRef(*row)
+            self._users.set(public_id, ref)
+        return ref
+
+    def forget_post(self, public_id: str) -> None:
+        """Drop a story (call after committing a status change or delete)"""
+        self._posts.pop(public_id)
+
+    def forget_user(self, public_id: str, user_id: Optional[int] = None) -> None:
+        """Drop a user and, given their internal id, every cached story they own"""
+        self._users.pop(public_id)
+        if user_id is not None:
+            self._posts.pop_where(lambda ref: ref.user_id == user_id)
+
+    def clear(self) -> None:
+        self._posts.clear()
+        self._users.clear()
+
+
+id_resolver = IdResolver()
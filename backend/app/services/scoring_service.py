@@ -0,0 +1,209 @@
+"""
+Batch Rank Scoring
+Recomputes Post.rank_score for every published story in one pass.
+
+- Inputs are read as columns (id, counters, age, completion, rereads) with
+  a single SELECT, no ORM objects
+- Scores come from a named formula (RANK_FORMULA); with NumPy installed a
+  formula runs once over whole arrays, otherwise row by row in Python
+  with the same code. NumPy is imported on the first scoring pass, not
+  with this module (it sits on the import path of the posts routes)
+- Scores are written back in chunks of RANK_BATCH_SIZE rows: UPDATE ...
+  FROM (VALUES ...) on PostgreSQL, an executemany UPDATE elsewhere
+
+Formulas take the batch columns and a math namespace (`xp`: numpy, or the
+scalar shim below) and return the scores, so one definition serves both
+paths:
+
+    def my_formula(c, xp):
+        return (c.support_count + 1) / (c.age_hours + 2) ** 1.5
+
+    register_formula('my_formula', my_formula)
+"""
+import importlib.util
+import math
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, bindparam, values, column, Integer, Float
+
+from app.core.config import settings
+from app.models.models import Post, PostStatus
+
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    import numpy
+    return numpy
+
+
+# Input columns every formula can use (besides age_hours)
+SCORE_INPUTS = {
+    'save_count': Post.save_count,
+    'support_count': Post.support_count,
+    'view_count': Post.view_count,
+    'completion_rate': Post.completion_rate,
+    'reread_count': Post.reread_count,
+}
+
+# Gravity decay factor (higher = faster decay for old content); RankingService.GRAVITY
+GRAVITY = 1.8
+WILSON_Z = 1.96  # 95% confidence
+ENGAGEMENT_HALF_LIFE_HOURS = 48.0
+REREAD_WEIGHT = 2.0
+
+
+class _ScalarMath:
+    """The numpy functions formulas use, for one row of Python numbers"""
+    sqrt = staticmethod(math.sqrt)
+    exp = staticmethod(math.exp)
+    maximum = staticmethod(max)
+
+    @staticmethod
+    def where(condition, if_true, if_false):
+        return if_true if condition else if_false
+
+
+def gravity(c, xp):
+    """Hacker News gravity: (points + 1) / (age_hours + 2) ^ 1.8, points = saves + supports + views / 10"""
+    points = c.save_count + c.support_count + c.view_count / 10.0
+    return (points + 1) / (c.age_hours + 2) ** GRAVITY
+
+
+def wilson(c, xp):
+    """Lower bound of the Wilson interval for (supports + saves) out of views; ignores age"""
+    positives = c.support_count + c.save_count
+    trials = xp.maximum(c.view_count, positives)
+    n = xp.maximum(trials, 1)
+    p = positives / n
+    z2 = WILSON_Z ** 2
+    bound = (p + z2 / (2 * n) - WILSON_Z * xp.sqrt((p * (1 - p) + z2 / (4 * n)) / n)) / (1 + z2 / n)
+    return xp.where(trials > 0, bound, 0.0)
+
+
+def decayed_engagement(c, xp):
+    """
+    Engagement weighted by read quality, halving every ENGAGEMENT_HALF_LIFE_HOURS:
+    (supports + saves + views / 10 + 2 * rereads + 1) * (0.5 + completion_rate) * 2^(-age / half-life)
+    """
+    engagement = c.support_count + c.save_count + c.view_count / 10.0 + REREAD_WEIGHT * c.reread_count
+    quality = 0.5 + c.completion_rate
+    return (engagement + 1) * quality * xp.exp(-math.log(2) * c.age_hours / ENGAGEMENT_HALF_LIFE_HOURS)
+
+
+FORMULAS: Dict[str, Callable] = {
+    'gravity': gravity,
+    'wilson': wilson,
+    'decayed_engagement': decayed_engagement,
+}
+
+
+def register_formula(name: str, formula: Callable) -> None:
+    FORMULAS[name] = formula
+
+
+def get_formula(name: Optional[str] = None) -> Callable:
+    name = name or settings.RANK_FORMULA
+    if name not in FORMULAS:
+        raise ValueError(f"Unknown rank formula '{name}'. Use one of: {', '.join(FORMULAS)}")
+    return FORMULAS[name]
+
+
+def score_columns(columns: Dict[str, Sequence], formula: Callable, use_numpy: bool = NUMPY_AVAILABLE) -> List[float]:
+    """
+    Scores for columnar inputs: SCORE_INPUTS names plus age_hours, all the
+    same length
+    """
+    if use_numpy:
+        np = _numpy()
+        batch = SimpleNamespace(**{name: np.asarray(col, dtype=np.float64) for name, col in columns.items()})
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.broadcast_to(formula(batch, np), len(columns['age_hours']))
+        return scores.tolist()
+    names = list(columns)
+    row = SimpleNamespace()
+    scores = []
+    for record in zip(*columns.values()):
+        row.__dict__.update(zip(names, record))
+        scores.append(float(formula(row, _ScalarMath)))
+    return scores
+
+
+def age_hours(published: Sequence[Optional[datetime]], now: datetime, use_numpy: bool = NUMPY_AVAILABLE):
+    """Hours since publication (0 for stories without published_at)"""
+    # Subtracting datetimes in Python beats np.array(..., dtype='datetime64'),
+    # which converts each object the slow way
+    ages = ((now - p).total_seconds() / 3600 if p else 0.0 for p in published)
+    if use_numpy:
+        np = _numpy()
+        return np.fromiter(ages, dtype=np.float64, count=len(published))
+    return list(ages)
+
+
+class RankScorer:
+    """
+    Reads, scores and writes back rank_score for all published stories.
+
+    Usage:
+        scored = await RankScorer('wilson').run(db)
+    """
+
+    def __init__(self, formula: Optional[str] = None, batch_size: Optional[int] = None,
+                 use_numpy: bool = NUMPY_AVAILABLE):
+        self.formula = get_formula(formula)
+        self.batch_size = batch_size or settings.RANK_BATCH_SIZE
+        self.use_numpy = use_numpy
+
+    async def load(self, db: AsyncSession) -> Dict[str, Sequence]:
+        """Scoring inputs for every published story, as columns"""
+        result = await db.execute(
+            select(
+                Post.id,
+                Post.published_at,
+                *[func.coalesce(col, 0).label(name) for name, col in SCORE_INPUTS.items()]
+            ).where(Post.status == PostStatus.PUBLISHED.value)
+        )
+        rows = result.all()
+        names = ['id', 'published_at', *SCORE_INPUTS]
+        return dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+
+    def score(self, columns: Dict[str, Sequence], now: datetime) -> List[float]:
+        inputs = {name: columns[name] for name in SCORE_INPUTS}
+        inputs['age_hours'] = age_hours(columns['published_at'], now, self.use_numpy)
+        return score_columns(inputs, self.formula, self.use_numpy)
+
+    async def write(self, db: AsyncSession, ids: Sequence[int], scores: Sequence[float], now: datetime) -> None:
+        posts = Post.__table__
+        postgres = db.bind.dialect.name == 'postgresql'
+        # Rescoring isn't an edit: keep updated_at out of its onupdate
+        ranked = {'last_ranked_at': now, 'updated_at': posts.c.updated_at}
+        for start in range(0, len(ids), self.batch_size):
+            chunk = list(zip(ids[start:start + self.batch_size], scores[start:start + self.batch_size]))
+            if postgres:
+                scored = values(column('id', Integer), column('score', Float), name='scored').data(chunk)
+                await db.execute(
+                    update(posts)
+                    .where(posts.c.id == scored.c.id)
+                    .values(rank_score=scored.c.score, **ranked)
+                )
+            else:
+                await db.execute(
+                    update(posts)
+                    .where(posts.c.id == bindparam('post_id'))
+                    .values(rank_score=bindparam('score'), **ranked),
+                    [{'post_id': post_id, 'score': score} for post_id, score in chunk]
+                )
+
+    async def run(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """Rescore every published story and commit; returns the number scored"""
+        now = now or datetime.utcnow()
+        columns = await self.load(db)
+        scores = self.score(columns, now)
+        await self.write(db, columns['id'], scores, now)
+        await db.commit()
+        return len(scores)
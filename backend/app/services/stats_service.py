@@ -0,0 +1,167 @@
+"""
+Site Statistics Service
+Admin dashboard numbers without a COUNT(*) query per metric.
+
+- totals() runs one FILTER-based aggregate per table (users, posts,
+  supports); the same pass counts today's new rows
+- Earlier days come from the daily_stats rollup. StatsRefresher recounts
+  the most recent days every STATS_REFRESH_INTERVAL seconds (everything on
+  the first run), so a window of N days is a range-sum over at most N rows
+"""
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.periodic import PeriodicTask
+from app.models.models import User, Post, Support, DailyStat, PostStatus
+
+
+# Rollup column -> table whose rows it counts (by created_at day)
+ROLLUP_METRICS = {
+    'new_users': User,
+    'new_stories': Post,
+    'reactions': Support,
+}
+
+
+def _as_date(value) -> date:
+    """date(created_at) comes back as a date on PostgreSQL, text on SQLite"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class StatsService:
+    """Dashboard aggregates and the daily_stats rollup"""
+
+    @staticmethod
+    async def totals(db: AsyncSession, since: datetime) -> Dict[str, Dict[str, int]]:
+        """Lifetime totals per table, plus rows created at or after `since`"""
+        users = await db.execute(
+            select(
+                func.count().label('total'),
+                func.count().filter(User.is_active == True).label('active'),
+                func.count().filter(User.created_at >= since).label('new'),
+            ).select_from(User)
+        )
+        stories = await db.execute(
+            select(
+                func.count().label('total'),
+                func.count().filter(Post.status == PostStatus.PUBLISHED.value).label('published'),
+                func.count().filter(Post.flagged_count > 0).label('flagged'),
+                func.count().filter(Post.created_at >= since).label('new'),
+            ).select_from(Post)
+        )
+        reactions = await db.execute(
+            select(
+                func.count().label('total'),
+                func.count().filter(Support.created_at >= since).label('new'),
+            ).select_from(Support)
+        )
+        return {
+            'users': users.one()._asdict(),
+            'stories': stories.one()._asdict(),
+            'reactions': reactions.one()._asdict(),
+        }
+
+    @staticmethod
+    async def window(db: AsyncSession, first: date, end: date) -> Dict[str, int]:
+        """Rollup sums for days first <= day < end"""
+        result = await db.execute(
+            select(*[
+                func.coalesce(func.sum(getattr(DailyStat, name)), 0).label(name)
+                for name in ROLLUP_METRICS
+            ]).where(DailyStat.day >= first, DailyStat.day < end)
+        )
+        return result.one()._asdict()
+
+    @classmethod
+    async def dashboard(cls, db: AsyncSession, days: int) -> Dict:
+        """Admin dashboard for the last `days` days (today included)"""
+        today = datetime.utcnow().date()
+        totals = await cls.totals(db, datetime.combine(today, time.min))
+        # Today is counted live; earlier days come from the rollup
+        earlier = await cls.window(db, today - timedelta(days=days - 1), today)
+
+        users, stories, reactions = totals['users'], totals['stories'], totals['reactions']
+        return {
+            "users": {
+                "total": users['total'],
+                "new": users['new'] + earlier['new_users'],
+                "active": users['active'],
+            },
+            "stories": {
+                "total": stories['total'],
+                "new": stories['new'] + earlier['new_stories'],
+                "published": stories['published'],
+                "flagged": stories['flagged'],
+            },
+            "reactions": {
+                "total": reactions['total'],
+                "recent": reactions['new'] + earlier['reactions'],
+            },
+            "period_days": days,
+        }
+
+    @staticmethod
+    async def refresh(db: AsyncSession, since: Optional[date] = None) -> int:
+        """
+        Recount daily_stats rows from `since` onwards. By default that is the
+        last STATS_REFRESH_OVERLAP rolled-up days (rows can land late), or
+        every day on an empty table. Returns the number of days written.
+        """
+        if since is None:
+            latest = await db.scalar(select(func.max(DailyStat.day)))
+            if latest is not None:
+                since = _as_date(latest) - timedelta(days=settings.STATS_REFRESH_OVERLAP)
+
+        rows: Dict[date, Dict[str, int]] = {}
+        for name, model in ROLLUP_METRICS.items():
+            day = func.date(model.created_at)
+            query = select(day, func.count()).where(model.created_at.is_not(None)).group_by(day)
+            if since is not None:
+                query = query.where(model.created_at >= datetime.combine(since, time.min))
+            for value, count in (await db.execute(query)).all():
+                rows.setdefault(_as_date(value), dict.fromkeys(ROLLUP_METRICS, 0))[name] = count
+
+        # Days that lost all their rows must drop to zero, so replace the range
+        stale = delete(DailyStat)
+        if since is not None:
+            stale = stale.where(DailyStat.day >= since)
+        await db.execute(stale)
+        if rows:
+            now = datetime.utcnow()
+            await db.execute(
+                insert(DailyStat),
+                [{'day': day, **counts, 'refreshed_at': now} for day, counts in rows.items()]
+            )
+
+        await db.commit()
+        return len(rows)
+
+
+class StatsRefresher(PeriodicTask):
+    """
+    Background task that refreshes daily_stats every STATS_REFRESH_INTERVAL
+    seconds. A failed pass keeps the previous rollup; the next one recounts
+    the same days. One worker at a time (exclusive).
+    """
+
+    name = 'stats_refresh'
+    run_at_start = True
+    exclusive = True
+
+    def __init__(self, interval: Optional[float] = None, session_factory=async_session_maker):
+        super().__init__(interval or settings.STATS_REFRESH_INTERVAL, session_factory)
+
+    async def refresh(self) -> int:
+        async with self.session_factory() as db:
+            return await StatsService.refresh(db)
+
+    async def run_pass(self) -> int:
+        return await self.refresh()
+
+
+stats_refresher = StatsRefresher()
@@ -5,13 +5,21 @@ Complete migration of Flask story_service with CRUD, reactions, stats
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func, or_
+from sqlalchemy import select, update, delete, func, exists, literal, literal_column, Text
 from sqlalchemy.orm import selectinload
 
 from app.models.models import (
-    Post, User, Comment, Support, PostStatus, StoryType
+    Post, User, Comment, Support, Bookmark, ReadProgress, PostCounterShard, PostStatus, StoryType
 )
+from app.core.config import settings
 from app.core.security import generate_blind_author_token, shred_key_buffer
+from app.services.listing_service import StoryListing
+from app.services.comment_service import CommentThread
+from app.services.counter_service import CounterService, upsert_insert, pending_delta
+from app.services.resolver_service import id_resolver
+from app.services.engagement_service import EngagementService
+from app.services.feed_service import feed_snapshots
+from app.utils.cache import cache
 
 
 def calculate_reading_time(content: str) -> int:
@@ -20,6 +28,22 @@ def calculate_reading_time(content: str) -> int:
     return max(1, words // 225)  # 225 words per minute average
 
 
+EXCERPT_LENGTH = 200
+
+
+def user_stats_cache_key(user_public_id: str) -> str:
+    return f"user_stats:{user_public_id}"
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Build the feed preview: whitespace collapsed, cut on a word boundary"""
+    text = ' '.join(content.split())
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(' ', 1)[0] or text[:length]
+    return cut.rstrip(' .,;:!?') + '…'
+
+
 class StoryService:
     """Async service class for story-related business logic"""
     
@@ -49,6 +73,7 @@ class StoryService:
             public_id=post_public_id,
             title=data['title'],
             content=data['content'],
+            excerpt=make_excerpt(data['content']),
             story_type=data.get('story_type', 'other'),
             is_anonymous=is_anonymous,
             tags=data.get('tags', []),
@@ -63,6 +88,9 @@ class StoryService:
         
         db.add(story)
         await db.commit()
+        if story.status == PostStatus.PUBLISHED.value:
+            feed_snapshots.invalidate(story.story_type)
+        await cache.delete(user_stats_cache_key(user.public_id))
         await db.refresh(story)
         
         return story
@@ -102,62 +130,29 @@ class StoryService:
         sort_by: str = 'latest'
     ) -> Dict[str, Any]:
         """Get paginated list of published stories with optional filtering"""
-        query = select(Post).options(
-            selectinload(Post.author)
-        ).where(Post.status == PostStatus.PUBLISHED.value)
+        listing = StoryListing.published().order(sort_by)
         
         if filters:
-            if filters.get('story_type'):
-                query = query.where(Post.story_type == filters['story_type'])
+            listing.of_type(filters.get('story_type'))
             
             if filters.get('user_id'):
                 # Find user by public_id
-                user_result = await db.execute(
-                    select(User).where(User.public_id == filters['user_id'])
-                )
-                user = user_result.scalar_one_or_none()
-                if user:
-                    query = query.where(Post.user_id == user.id)
+                author = await id_resolver.user(db, filters['user_id'])
+                if author:
+                    listing.by_author(author.id)
             
             if filters.get('is_featured'):
-                query = query.where(Post.is_featured == True)
-        
-        # Apply sorting
-        if sort_by == 'trending':
-            query = query.order_by(desc(Post.support_count), desc(Post.published_at))
-        elif sort_by == 'most_viewed':
-            query = query.order_by(desc(Post.view_count))
-        elif sort_by == 'smart':
-            query = query.order_by(desc(Post.rank_score), desc(Post.published_at))
-        else:  # latest
-            query = query.order_by(desc(Post.published_at))
-        
-        # Count total
-        count_query = select(func.count()).select_from(Post).where(
-            Post.status == PostStatus.PUBLISHED.value
-        )
-        if filters and filters.get('story_type'):
-            count_query = count_query.where(Post.story_type == filters['story_type'])
-        
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        stories = result.scalars().all()
+                listing.featured()
         
-        total_pages = (total + per_page - 1) // per_page
+        result = await listing.fetch(db, page=page, per_page=per_page)
         
         return {
-            "stories": [s.to_dict() for s in stories],
-            "total": total,
+            "stories": result.to_dicts(),
+            "total": result.total,
             "page": page,
             "per_page": per_page,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
+            "total_pages": result.total_pages,
+            "has_next": result.has_next,
             "has_prev": page > 1
         }
     
@@ -169,32 +164,20 @@ class StoryService:
         per_page: int = 20
     ) -> Dict[str, Any]:
         """Get paginated list of user's draft stories"""
-        query = select(Post).where(
-            Post.user_id == user.id,
-            Post.status == PostStatus.DRAFT.value
-        ).order_by(desc(Post.updated_at))
-        
-        # Count
-        count_query = select(func.count()).select_from(Post).where(
-            Post.user_id == user.id,
-            Post.status == PostStatus.DRAFT.value
+        result = await (
+            StoryListing(PostStatus.DRAFT.value)
+            .by_author(user.id)
+            .order('updated')
+            .without_author()
+            .fetch(db, page=page, per_page=per_page)
         )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        drafts = result.scalars().all()
         
         return {
-            "drafts": [d.to_dict() for d in drafts],
-            "total": total,
+            "drafts": result.to_dicts(),
+            "total": result.total,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": result.total_pages
         }
     
     @staticmethod
@@ -208,41 +191,20 @@ class StoryService:
         if not query_text or len(query_text) < 2:
             return {"error": "Search query must be at least 2 characters"}
         
-        search_pattern = f"%{query_text}%"
-        
-        query = select(Post).options(selectinload(Post.author)).where(
-            Post.status == PostStatus.PUBLISHED.value,
-            or_(
-                Post.title.ilike(search_pattern),
-                Post.content.ilike(search_pattern)
-            )
-        ).order_by(desc(Post.published_at))
-        
-        # Count
-        count_query = select(func.count()).select_from(Post).where(
-            Post.status == PostStatus.PUBLISHED.value,
-            or_(
-                Post.title.ilike(search_pattern),
-                Post.content.ilike(search_pattern)
-            )
+        result = await (
+            StoryListing.published()
+            .matching(query_text)
+            .order('latest')
+            .fetch(db, page=page, per_page=per_page)
         )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        stories = result.scalars().all()
         
         return {
-            "results": [s.to_dict() for s in stories],
+            "results": result.to_dicts(),
             "query": query_text,
-            "total": total,
+            "total": result.total,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": result.total_pages
         }
     
     @staticmethod
@@ -259,11 +221,14 @@ class StoryService:
         if not is_author:
             return None
         
+        listed_before = (story.status, story.story_type)
+        
         # Update fields
         if 'title' in data:
             story.title = data['title']
         if 'content' in data:
             story.content = data['content']
+            story.excerpt = make_excerpt(data['content'])
             story.reading_time = calculate_reading_time(data['content'])
         if 'story_type' in data:
             story.story_type = data['story_type']
@@ -281,6 +246,12 @@ class StoryService:
         
         story.updated_at = datetime.utcnow()
         await db.commit()
+        id_resolver.forget_post(story.public_id)
+        # Feeds change when a story is published, unpublished or moves category
+        listed_after = (story.status, story.story_type)
+        if listed_after != listed_before and PostStatus.PUBLISHED.value in (listed_before[0], listed_after[0]):
+            feed_snapshots.invalidate(listed_before[1], listed_after[1])
+        await cache.delete(user_stats_cache_key(user.public_id))
         await db.refresh(story)
         
         return story
@@ -301,12 +272,19 @@ class StoryService:
         # Cryptographic Shredding: Overwrite content fields in memory prior to DB deletion
         story.title = shred_key_buffer(len(story.title) if story.title else 32).hex()
         story.content = shred_key_buffer(len(story.content) if story.content else 64).hex()
+        story.excerpt = None
         story.tags = []
         story.author_token = shred_key_buffer(32).hex()
         await db.flush()
         
+        public_id = story.public_id
+        was_published = story.status == PostStatus.PUBLISHED.value
         await db.delete(story)
         await db.commit()
+        id_resolver.forget_post(public_id)
+        if was_published:
+            feed_snapshots.invalidate(story.story_type)
+        await cache.delete(user_stats_cache_key(user.public_id))
         return True
     
     @staticmethod
@@ -314,67 +292,184 @@ class StoryService:
         db: AsyncSession,
         story: Post
     ):
-        """Increment the view count of a story"""
-        story.view_count += 1
+        """Increment the view count of a story (in SQL, no read-modify-write)"""
+        await CounterService.bump(db, Post.view_count, story.id)
         await db.commit()
     
     @staticmethod
+    def _toggle_reaction_statement(insert, story_id: str, user_id: int, support_type: str, message: Optional[str], now: datetime):
+        """Single-round-trip reaction toggle (PostgreSQL data-modifying CTEs)"""
+        story = (
+            select(Post.id, Post.user_id, Post.title)
+            .where(Post.public_id == story_id, Post.status == PostStatus.PUBLISHED.value)
+            .cte('story')
+        )
+        mine = (Support.giver_id == user_id, Support.post_id == select(story.c.id).scalar_subquery())
+        
+        # Same type: remove it
+        removed = (
+            delete(Support)
+            .where(*mine, Support.support_type == support_type)
+            .returning(Support.id)
+            .cte('removed')
+        )
+        # Different type: change it (count stays the same)
+        changed = (
+            update(Support)
+            .where(*mine, Support.support_type != support_type)
+            .values(support_type=support_type, message=message)
+            .returning(Support.id, Support.created_at)
+            .cte('changed')
+        )
+        # None yet: add one. A concurrent toggle that inserted first (not in
+        # this snapshot) makes it a change instead: the unique (giver_id,
+        # post_id) index is the conflict target, and xmax = 0 tells a real
+        # insert from an update so only inserts are counted
+        stmt = insert(Support).from_select(
+            ['support_type', 'message', 'giver_id', 'receiver_id', 'post_id', 'created_at'],
+            select(
+                literal(support_type), literal(message, Text), literal(user_id),
+                story.c.user_id, story.c.id, literal(now)
+            ).where(~exists(select(Support.id).where(Support.giver_id == user_id, Support.post_id == story.c.id)))
+        )
+        added = (
+            stmt.on_conflict_do_update(
+                index_elements=['giver_id', 'post_id'],
+                set_={'support_type': stmt.excluded.support_type, 'message': stmt.excluded.message},
+            )
+            .returning(Support.id, Support.created_at, literal_column('xmax = 0').label('inserted'))
+            .cte('added')
+        )
+        delta = (
+            select(func.count()).select_from(added).where(added.c.inserted).scalar_subquery()
+            - select(func.count()).select_from(removed).scalar_subquery()
+        )
+        counted = CounterService.add_from(
+            insert, 'support_count', select(story.c.id, delta).where(delta != 0)
+        ).cte('counted')
+        tracked = EngagementService.record_from(
+            insert, 'reactions', select(story.c.id, delta).where(delta != 0), now
+        ).cte('tracked')
+        
+        # CTEs share one snapshot, so add this statement's delta by hand
+        return (
+            select(
+                story.c.user_id,
+                story.c.title,
+                exists(select(removed.c.id)),
+                select(added.c.inserted).scalar_subquery(),
+                func.coalesce(select(added.c.id).scalar_subquery(), select(changed.c.id).limit(1).scalar_subquery()),
+                func.coalesce(select(added.c.created_at).scalar_subquery(), select(changed.c.created_at).limit(1).scalar_subquery()),
+                func.coalesce(Post.support_count, 0) + pending_delta('support_count') + delta,
+            )
+            .select_from(story)
+            .join(Post, Post.id == story.c.id)
+            .add_cte(counted, tracked)
+        )
+    
+    @classmethod
     async def toggle_reaction(
+        cls,
         db: AsyncSession,
-        story: Post,
+        story_id: str,
         user: User,
         support_type: str = 'heart',
         message: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Toggle a reaction on a story - each user can only have ONE reaction per story"""
-        # Check if user already has a reaction on this story
-        result = await db.execute(
-            select(Support).where(
-                Support.giver_id == user.id,
-                Support.post_id == story.id
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Toggle a reaction on a story - each user can only have ONE reaction per story.
+        Same type removes it, a different type changes it, none adds one.
+        Returns None if the story doesn't exist or isn't published.
+        
+        PostgreSQL: one statement (DELETE/UPDATE/INSERT ... RETURNING and the
+        support_count shard upsert chained as CTEs). Other dialects run the
+        same steps as separate statements.
+        
+        The unique (giver_id, post_id) index is what keeps it to one: the
+        CTEs read a snapshot, so a toggle racing another one can miss its
+        row; the insert then conflicts and becomes a change of type (not a
+        second reaction, and not counted twice).
+        """
+        now = datetime.utcnow()
+        insert = upsert_insert(db)
+        
+        if db.bind.dialect.name == 'postgresql':
+            result = await db.execute(
+                cls._toggle_reaction_statement(insert, story_id, user.id, support_type, message, now)
             )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            if existing.support_type == support_type:
-                # Same reaction type - remove it (toggle off)
-                await db.delete(existing)
-                current_count = story.support_count or 0
-                story.support_count = max(0, current_count - 1)
-                await db.commit()
-                return {
-                    'action': 'removed',
-                    'support_count': story.support_count,
-                    'user_reaction': None
-                }
+            row = result.first()
+            await db.commit()
+            if row is None:
+                return None
+            story_user_id, story_title, was_removed, inserted, reaction_id, created_at, support_count = row
+            if was_removed or reaction_id is None:
+                # None: a concurrent toggle removed the reaction this one meant to change
+                action = 'removed'
             else:
-                # Different reaction type - update it (count stays same)
-                existing.support_type = support_type
-                existing.message = message
-                await db.commit()
-                return {
-                    'action': 'changed',
-                    'support_count': story.support_count,
-                    'user_reaction': support_type
-                }
+                action = 'added' if inserted else 'changed'
         else:
-            # No existing reaction - add new one
-            reaction = Support(
-                support_type=support_type,
-                message=message,
-                giver_id=user.id,
-                receiver_id=story.user_id,
-                post_id=story.id
+            story_row = (await db.execute(
+                select(Post.id, Post.user_id, Post.title)
+                .where(Post.public_id == story_id, Post.status == PostStatus.PUBLISHED.value)
+            )).first()
+            if story_row is None:
+                return None
+            post_id, story_user_id, story_title = story_row
+            mine = (Support.giver_id == user.id, Support.post_id == post_id)
+            reaction_id = created_at = None
+            delta = 0
+            
+            removed = await db.execute(
+                delete(Support).where(*mine, Support.support_type == support_type).returning(Support.id)
             )
-            db.add(reaction)
-            story.support_count = (story.support_count or 0) + 1
+            if removed.first():
+                action, delta = 'removed', -1
+            else:
+                changed = (await db.execute(
+                    update(Support)
+                    .where(*mine, Support.support_type != support_type)
+                    .values(support_type=support_type, message=message)
+                    .returning(Support.id, Support.created_at)
+                )).first()
+                if changed:
+                    action = 'changed'
+                    reaction_id, created_at = changed
+                else:
+                    added = (await db.execute(
+                        insert(Support)
+                        .values(
+                            support_type=support_type, message=message, giver_id=user.id,
+                            receiver_id=story_user_id, post_id=post_id, created_at=now
+                        )
+                        .on_conflict_do_nothing()
+                        .returning(Support.id, Support.created_at)
+                    )).first()
+                    action = 'added'
+                    if added:
+                        reaction_id, created_at = added
+                        delta = 1
+            
+            if delta:
+                await CounterService.add(db, post_id, 'support_count', delta)
+                await EngagementService.record(db, post_id, now, reactions=delta)
+            support_count = await CounterService.value(db, post_id, 'support_count')
             await db.commit()
-            return {
-                'action': 'added',
-                'support_count': story.support_count,
-                'user_reaction': support_type
-            }
+        
+        reaction = None
+        if action != 'removed' and reaction_id is not None:
+            reaction = Support(
+                id=reaction_id, support_type=support_type, message=message,
+                created_at=created_at, giver=user
+            ).to_dict()
+        
+        return {
+            'action': action,
+            'support_count': max(0, support_count),
+            'user_reaction': None if action == 'removed' else support_type,
+            'reaction': reaction,
+            'story_user_id': story_user_id,
+            'story_title': story_title,
+        }
     
     @staticmethod
     async def get_user_reaction(
@@ -393,60 +488,112 @@ class StoryService:
         return reaction.support_type if reaction else None
     
     @staticmethod
-    async def get_user_stats(
+    async def get_user_states(
         db: AsyncSession,
-        user: User
-    ) -> Dict[str, Any]:
-        """Get statistics for a user"""
-        # Published count
-        published_result = await db.execute(
-            select(func.count()).select_from(Post).where(
-                Post.user_id == user.id,
-                Post.status == PostStatus.PUBLISHED.value
-            )
+        story_ids: List[str],
+        user_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Current user's reaction, bookmark and read progress for many stories.
+        One IN-list query per table, each led by the user's (user, post) index.
+        Unknown ids get the empty state.
+        """
+        states = {
+            story_id: {
+                'reaction_type': None,
+                'has_reacted': False,
+                'is_bookmarked': False,
+                'read_progress': None,
+            }
+            for story_id in story_ids
+        }
+        if not states:
+            return states
+
+        reactions = await db.execute(
+            select(Post.public_id, Support.support_type)
+            .select_from(Support)
+            .join(Post, Post.id == Support.post_id)
+            .where(Support.giver_id == user_id, Post.public_id.in_(story_ids))
         )
-        published_count = published_result.scalar() or 0
-        
-        # Draft count
-        draft_result = await db.execute(
-            select(func.count()).select_from(Post).where(
-                Post.user_id == user.id,
-                Post.status == PostStatus.DRAFT.value
-            )
+        for story_id, support_type in reactions.all():
+            states[story_id]['reaction_type'] = support_type
+            states[story_id]['has_reacted'] = True
+
+        bookmarks = await db.execute(
+            select(Post.public_id)
+            .select_from(Bookmark)
+            .join(Post, Post.id == Bookmark.post_id)
+            .where(Bookmark.user_id == user_id, Post.public_id.in_(story_ids))
         )
-        draft_count = draft_result.scalar() or 0
-        
-        # Total views
-        views_result = await db.execute(
-            select(func.sum(Post.view_count)).where(
-                Post.user_id == user.id,
-                Post.status == PostStatus.PUBLISHED.value
-            )
+        for story_id in bookmarks.scalars():
+            states[story_id]['is_bookmarked'] = True
+
+        progress = await db.execute(
+            select(Post.public_id, ReadProgress.scroll_depth, ReadProgress.completed, ReadProgress.last_read)
+            .select_from(ReadProgress)
+            .join(Post, Post.id == ReadProgress.post_id)
+            .where(ReadProgress.user_id == user_id, Post.public_id.in_(story_ids))
         )
-        total_views = views_result.scalar() or 0
-        
-        # Total reactions received
-        reactions_result = await db.execute(
-            select(func.count()).select_from(Support).where(
-                Support.receiver_id == user.id
+        for story_id, scroll_depth, completed, last_read in progress.all():
+            states[story_id]['read_progress'] = {
+                'scroll_depth': scroll_depth,
+                'completed': completed,
+                'last_read': last_read,
+            }
+
+        return states
+    
+    @staticmethod
+    def _user_stats_statement(user_id: int):
+        """All profile stats in one round trip, read from the maintained counters"""
+        published = Post.status == PostStatus.PUBLISHED.value
+        posts = (
+            select(
+                func.count().filter(published).label('total_stories'),
+                func.count().filter(Post.status == PostStatus.DRAFT.value).label('total_drafts'),
+                func.coalesce(func.sum(Post.view_count).filter(published), 0).label('total_views'),
+                func.coalesce(func.sum(Post.support_count), 0).label('folded_reactions'),
+                func.coalesce(func.sum(Post.comment_count), 0).label('total_comments'),
             )
+            .where(Post.user_id == user_id)
+            .subquery('author_posts')
         )
-        total_reactions = reactions_result.scalar() or 0
-        
-        # Total comments on user's stories
-        comments_result = await db.execute(
-            select(func.count()).select_from(Comment).join(Post).where(
-                Post.user_id == user.id
-            )
+        # Reactions still sitting in counter shards
+        pending = (
+            select(func.coalesce(func.sum(PostCounterShard.value), 0))
+            .join(Post, Post.id == PostCounterShard.post_id)
+            .where(Post.user_id == user_id, PostCounterShard.name == 'support_count')
+            .scalar_subquery()
         )
-        total_comments = comments_result.scalar() or 0
+        return select(
+            posts.c.total_stories,
+            posts.c.total_drafts,
+            posts.c.total_views,
+            (posts.c.folded_reactions + pending).label('total_reactions'),
+            posts.c.total_comments,
+        )
+    
+    @classmethod
+    async def get_user_stats(
+        cls,
+        db: AsyncSession,
+        user: User
+    ) -> Dict[str, Any]:
+        """
+        Get statistics for a user (one query, cached for USER_STATS_CACHE_TTL).
+        The author's own story writes drop the cached entry; other users'
+        views and reactions show up when it expires.
+        """
+        key = user_stats_cache_key(user.public_id)
+        stats = await cache.get(key)
+        if stats is None:
+            row = (await db.execute(cls._user_stats_statement(user.id))).one()
+            stats = {name: max(0, int(value or 0)) for name, value in row._mapping.items()}
+            await cache.set(key, stats, ttl=settings.USER_STATS_CACHE_TTL)
         
         return {
-            'total_stories': published_count,
-            'total_drafts': draft_count,
-            'total_views': total_views,
-            'total_reactions': total_reactions,
-            'total_comments': total_comments,
+            **stats,
             'member_since': user.created_at.isoformat() if user.created_at else None
         }
     
@@ -456,14 +603,13 @@ class StoryService:
         limit: int = 10
     ) -> List[Dict]:
         """Get featured stories"""
-        result = await db.execute(
-            select(Post).options(selectinload(Post.author)).where(
-                Post.status == PostStatus.PUBLISHED.value,
-                Post.is_featured == True
-            ).order_by(desc(Post.featured_at)).limit(limit)
+        result = await (
+            StoryListing.published()
+            .featured()
+            .order('featured')
+            .fetch(db, per_page=limit, with_total=False)
         )
-        stories = result.scalars().all()
-        return [s.to_dict() for s in stories]
+        return result.to_dicts()
     
     @staticmethod
     async def add_comment(
@@ -484,8 +630,9 @@ class StoryService:
         )
         db.add(comment)
         
-        # Update comment count
-        story.comment_count = (story.comment_count or 0) + 1
+        # Update comment counts atomically in SQL
+        await CounterService.bump(db, Post.comment_count, story.id)
+        await CounterService.bump(db, Comment.reply_count, parent_id)
         
         await db.commit()
         await db.refresh(comment)
@@ -498,34 +645,13 @@ class StoryService:
         page: int = 1,
         per_page: int = 50
     ) -> Dict[str, Any]:
-        """Get comments for a story"""
-        query = select(Comment).options(
-            selectinload(Comment.author),
-            selectinload(Comment.replies)
-        ).where(
-            Comment.post_id == story.id,
-            Comment.parent_id == None
-        ).order_by(Comment.created_at)
-        
-        # Count
-        count_result = await db.execute(
-            select(func.count()).select_from(Comment).where(
-                Comment.post_id == story.id,
-                Comment.parent_id == None
-            )
-        )
-        total = count_result.scalar() or 0
-        
-        # Paginate
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        
-        result = await db.execute(query)
-        comments = result.scalars().all()
+        """Get a window of the comment thread for a story, replies nested"""
+        thread = await CommentThread(story.id).fetch(db, page=page, per_page=per_page)
         
         return {
-            "comments": [c.to_dict() for c in comments],
-            "total": total,
+            "comments": thread.items,
+            "total": story.comment_count or 0,
             "page": page,
-            "per_page": per_page
+            "per_page": per_page,
+            "has_next": thread.has_next
         }
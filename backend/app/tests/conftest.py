@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db
 from app.models.models import User, Post, PostStatus, StoryType
 
 
@@ -54,6 +54,17 @@ async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
 @pytest_asyncio.fixture(scope="function")
 async def setup_database():
     """Create database tables for each test"""
+    from app.services.resolver_service import id_resolver
+    from app.services.feed_service import feed_snapshots
+    from app.services.engagement_service import pending_views
+    from app.utils.cache import cache
+    
+    # Row ids restart with every database, so cached references don't carry over
+    id_resolver.clear()
+    feed_snapshots.clear()
+    feed_snapshots.session_factory = TestSessionLocal
+    pending_views.drain()
+    await cache.clear_pattern('affinity:*')
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -72,6 +83,7 @@ async def db_session(setup_database) -> AsyncGenerator[AsyncSession, None]:
 async def client(setup_database) -> AsyncGenerator[AsyncClient, None]:
     """Create an async test client"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -88,3 +88,39 @@ class TestAdminComments:
         response = await client.delete("/api/admin/comments/some-id")
         
         assert response.status_code == 401
+
+
+class TestAdminMetrics:
+    """Test runtime metrics endpoint"""
+    
+    @pytest.mark.asyncio
+    async def test_metrics_unauthorized(self, client):
+        """Test metrics without auth"""
+        response = await client.get("/api/admin/metrics")
+        
+        assert response.status_code == 401
+    
+    @pytest.mark.asyncio
+    async def test_metrics_non_admin(self, client, auth_headers):
+        """Test regular user cannot read metrics"""
+        response = await client.get("/api/admin/metrics", headers=auth_headers)
+        
+        assert response.status_code == 403
+
+
+class TestAdminMaintenance:
+    """Test admin maintenance endpoints"""
+    
+    @pytest.mark.asyncio
+    async def test_reconcile_counters_unauthorized(self, client):
+        """Test counter reconciliation without auth"""
+        response = await client.post("/api/admin/maintenance/reconcile-counters")
+        
+        assert response.status_code == 401
+    
+    @pytest.mark.asyncio
+    async def test_reconcile_counters_non_admin(self, client, auth_headers):
+        """Test regular user cannot reconcile counters"""
+        response = await client.post("/api/admin/maintenance/reconcile-counters", headers=auth_headers)
+        
+        assert response.status_code == 403
@@ -3,6 +3,9 @@ FastAPI Authentication Tests
 """
 import pytest
 
+from app.services.counter_service import CounterFlusher
+from app.tests.conftest import TestSessionLocal
+
 
 # Use a strong password that meets requirements
 VALID_PASSWORD = "SecureP@ss123!"
@@ -216,3 +219,53 @@ class TestRefreshToken:
         assert response.status_code == 200
         data = response.json()
         assert "access_token" in data
+
+
+class TestUserStats:
+    """Test /api/auth/stats"""
+    
+    async def _story(self, client, headers, status="published"):
+        response = await client.post("/api/posts", headers=headers, json={
+            "title": "Stats Story Title",
+            "content": "This is a test story content that meets the minimum character requirement.",
+            "story_type": "life_story",
+            "is_anonymous": False,
+            "status": status
+        })
+        return response.json()["story"]["id"]
+    
+    @pytest.mark.asyncio
+    async def test_stats_aggregate_own_stories(self, client, auth_headers, second_user_headers):
+        """Counts stories, drafts, views, reactions and comments in one query"""
+        story_id = await self._story(client, auth_headers)
+        await self._story(client, auth_headers, status="draft")
+        await client.get(f"/api/posts/{story_id}")
+        await client.post(f"/api/posts/{story_id}/toggle-react", json={"support_type": "brave"}, headers=second_user_headers)
+        await client.post(f"/api/posts/{story_id}/comments", json={"content": "Thank you"}, headers=second_user_headers)
+        await CounterFlusher(session_factory=TestSessionLocal).flush()  # page views are written in bulk
+        
+        response = await client.get("/api/auth/stats", headers=auth_headers)
+        
+        assert response.status_code == 200
+        stats = response.json()["stats"]
+        assert stats["total_stories"] == 1
+        assert stats["total_drafts"] == 1
+        assert stats["total_views"] == 1
+        assert stats["total_reactions"] == 1
+        assert stats["total_comments"] == 1
+        assert stats["member_since"]
+    
+    @pytest.mark.asyncio
+    async def test_stats_cached_until_own_write(self, client, auth_headers, second_user_headers):
+        """Others' activity waits for the TTL; the author's own writes refresh it"""
+        story_id = await self._story(client, auth_headers)
+        await client.get("/api/auth/stats", headers=auth_headers)
+        
+        await client.post(f"/api/posts/{story_id}/comments", json={"content": "Hello"}, headers=second_user_headers)
+        cached = (await client.get("/api/auth/stats", headers=auth_headers)).json()["stats"]
+        assert cached["total_comments"] == 0
+        
+        await self._story(client, auth_headers, status="draft")
+        fresh = (await client.get("/api/auth/stats", headers=auth_headers)).json()["stats"]
+        assert fresh["total_comments"] == 1
+        assert fresh["total_drafts"] == 1
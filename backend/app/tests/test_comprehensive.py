@@ -419,6 +419,83 @@ class TestComments:
         assert response.status_code == 200
 
 
+class TestCommentThreads:
+    """Test nested, paginated comment threads"""
+
+    async def _story(self, client, auth_headers):
+        create = await client.post("/api/posts", json={
+            "title": "ThreadStory",
+            "content": valid_content(),
+            "story_type": "life_story",
+            "status": "published"
+        }, headers=auth_headers)
+        return create.json()["story"]["id"]
+
+    async def _comment(self, client, auth_headers, story_id, content, parent_id=None):
+        response = await client.post(f"/api/posts/{story_id}/comments", json={
+            "content": content,
+            "parent_id": parent_id
+        }, headers=auth_headers)
+        return response.json()["comment"]["id"]
+
+    @pytest.mark.asyncio
+    async def test_replies_nested_with_counts(self, client, auth_headers):
+        """Replies come back nested under their parent with reply_count"""
+        story_id = await self._story(client, auth_headers)
+        top = await self._comment(client, auth_headers, story_id, "top")
+        reply = await self._comment(client, auth_headers, story_id, "reply", top)
+        await self._comment(client, auth_headers, story_id, "deeper", reply)
+
+        response = await client.get(f"/api/posts/{story_id}/comments")
+        data = response.json()
+
+        assert (data["total"], data["comment_count"]) == (1, 3)  # top-level vs. all
+        assert len(data["comments"]) == 1
+        root = data["comments"][0]
+        assert root["reply_count"] == 1
+        assert root["replies"][0]["content"] == "reply"
+        assert root["replies"][0]["reply_count"] == 1
+        assert root["replies"][0]["replies"][0]["content"] == "deeper"
+
+    @pytest.mark.asyncio
+    async def test_top_level_pagination(self, client, auth_headers):
+        """Top-level comments page with has_next"""
+        story_id = await self._story(client, auth_headers)
+        for i in range(3):
+            await self._comment(client, auth_headers, story_id, f"comment {i}")
+
+        first = (await client.get(f"/api/posts/{story_id}/comments?per_page=2")).json()
+        second = (await client.get(f"/api/posts/{story_id}/comments?per_page=2&page=2")).json()
+
+        assert [c["content"] for c in first["comments"]] == ["comment 0", "comment 1"]
+        assert first["has_next"] is True
+        assert first["total"] == 3
+        assert [c["content"] for c in second["comments"]] == ["comment 2"]
+        assert second["has_next"] is False
+
+    @pytest.mark.asyncio
+    async def test_continue_branch_with_parent_id(self, client, auth_headers):
+        """parent_id returns the replies below one comment"""
+        story_id = await self._story(client, auth_headers)
+        top = await self._comment(client, auth_headers, story_id, "top")
+        await self._comment(client, auth_headers, story_id, "first reply", top)
+        await self._comment(client, auth_headers, story_id, "second reply", top)
+
+        response = await client.get(f"/api/posts/{story_id}/comments?parent_id={top}")
+
+        assert [c["content"] for c in response.json()["comments"]] == ["first reply", "second reply"]
+        assert response.json()["total"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_parent_id(self, client, auth_headers):
+        """parent_id from another story is a 404"""
+        story_id = await self._story(client, auth_headers)
+
+        response = await client.get(f"/api/posts/{story_id}/comments?parent_id=missing")
+
+        assert response.status_code == 404
+
+
 # ============================================================================
 # REACTIONS
 # ============================================================================
@@ -85,3 +85,89 @@ class TestDatabaseSettings:
         if settings.IS_SQLITE:
             # SQLite should use StaticPool
             assert True
+
+
+class TestPoolProfiles:
+    """Tests for named connection pool profiles"""
+    
+    def test_default_profile_keeps_original_settings(self):
+        from app.core.database import pool_options
+        
+        options = pool_options('default')
+        assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (5, 10, 300)
+        assert options['pool_pre_ping'] is True
+    
+    def test_profiles_differ_as_documented(self):
+        from app.core.database import pool_options
+        
+        serverless, dedicated = pool_options('serverless'), pool_options('dedicated')
+        assert serverless['pool_size'] < dedicated['pool_size']
+        assert serverless['pool_recycle'] < dedicated['pool_recycle']
+        assert serverless['prepared_statement_cache_size'] == 0
+        assert dedicated['pool_pre_ping'] is False
+        assert dedicated['prepared_statement_cache_size'] > 0
+    
+    def test_overrides_win(self, monkeypatch):
+        from app.core.database import pool_options
+        
+        monkeypatch.setattr(settings, 'DB_POOL_SIZE', 42)
+        assert pool_options('serverless')['pool_size'] == 42
+    
+    def test_statement_cache_off_disables_both_caches(self, monkeypatch):
+        from app.core.database import pool_options, asyncpg_connect_args
+        
+        assert asyncpg_connect_args(pool_options('serverless')['prepared_statement_cache_size'])['statement_cache_size'] == 0
+        assert 'statement_cache_size' not in asyncpg_connect_args(pool_options('dedicated')['prepared_statement_cache_size'])
+        
+        monkeypatch.setattr(settings, 'DB_PREPARED_STATEMENT_CACHE_SIZE', 0)
+        assert pool_options('dedicated')['prepared_statement_cache_size'] == 0
+    
+    def test_unknown_profile_rejected(self):
+        from app.core.database import pool_options
+        
+        with pytest.raises(ValueError):
+            pool_options('huge')
+    
+    def test_sql_echo_is_off_by_default(self):
+        assert settings.DB_ECHO is False
+
+
+class TestPoolInstrumentation:
+    """Tests for pool checkout metrics"""
+    
+    @pytest.mark.asyncio
+    async def test_checkout_waits_and_timeouts_are_counted(self, tmp_path):
+        import asyncio
+        from sqlalchemy import text, exc
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from app.core.database import InstrumentedQueuePool, register_pool_metrics
+        from app.core.metrics import MetricsRegistry
+        import app.core.database as database
+        
+        registry = MetricsRegistry()
+        original = database.metrics
+        database.metrics = registry
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.2,
+        )
+        try:
+            register_pool_metrics(engine, prefix='test.pool')
+            async with engine.connect() as held:
+                await held.execute(text("SELECT 1"))
+                assert registry.snapshot()['gauges']['test.pool.checked_out'] == 1
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+            
+            snapshot = registry.snapshot()
+            assert snapshot['counters']['db.pool.waits'] == 1
+            assert snapshot['counters']['db.pool.timeouts'] == 1
+            assert snapshot['timings']['db.pool.checkout_ms']['count'] == 2
+            assert snapshot['gauges']['test.pool.checked_out'] == 0
+        finally:
+            database.metrics = original
+            await engine.dispose()
@@ -0,0 +1,216 @@
+"""
+Denormalized Counter Tests
+Atomic SQL-side updates and bulk reconciliation
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from app.models.models import User, Post, Comment, Bookmark, PostCounterShard
+from app.services.counter_service import CounterService, CounterFlusher, SERIALIZATION_FAILURE
+
+
+async def load(db_session, model, public_id):
+    result = await db_session.execute(
+        select(model).where(model.public_id == public_id).execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def add_comment(db_session, post_id, user_id, parent_id=None):
+    comment = Comment(content="A comment", user_id=user_id, post_id=post_id, parent_id=parent_id)
+    db_session.add(comment)
+    await db_session.commit()
+    await db_session.refresh(comment)
+    return comment
+
+
+class TestBump:
+    """CounterService.bump issues an in-SQL increment"""
+
+    @pytest.mark.asyncio
+    async def test_increment_and_decrement(self, db_session, sample_story):
+        post = await load(db_session, Post, sample_story)
+
+        await CounterService.bump(db_session, Post.comment_count, post.id)
+        await CounterService.bump(db_session, Post.comment_count, post.id)
+        await CounterService.bump(db_session, Post.comment_count, post.id, -1)
+        await db_session.commit()
+
+        post = await load(db_session, Post, sample_story)
+        assert post.comment_count == 1
+
+    @pytest.mark.asyncio
+    async def test_never_below_zero(self, db_session, sample_story):
+        post = await load(db_session, Post, sample_story)
+
+        await CounterService.bump(db_session, Post.comment_count, post.id, -5)
+        await db_session.commit()
+
+        post = await load(db_session, Post, sample_story)
+        assert post.comment_count == 0
+
+    @pytest.mark.asyncio
+    async def test_none_row_is_noop(self, db_session):
+        await CounterService.bump(db_session, Comment.reply_count, None)
+
+
+class TestReconcile:
+    """CounterService.reconcile fixes drift from the source rows"""
+
+    @pytest.mark.asyncio
+    async def test_fixes_drifted_comment_counters(self, db_session, sample_story, sample_user):
+        post = await load(db_session, Post, sample_story)
+        user = await load(db_session, User, sample_user)
+        post_id, user_id = post.id, user.id
+        top = await add_comment(db_session, post_id, user_id)
+        top_public_id = top.public_id
+        await add_comment(db_session, post_id, user_id, parent_id=top.id)
+
+        # Simulate lost updates
+        post = await load(db_session, Post, sample_story)
+        top = await load(db_session, Comment, top_public_id)
+        post.comment_count = 7
+        top.reply_count = 5
+        await db_session.commit()
+
+        fixed = await CounterService.reconcile(db_session)
+
+        assert fixed["comment_count"] == 1
+        assert fixed["reply_count"] == 1
+        post = await load(db_session, Post, sample_story)
+        top = await load(db_session, Comment, top_public_id)
+        assert post.comment_count == 2
+        assert top.reply_count == 1
+
+    @pytest.mark.asyncio
+    async def test_clean_counters_untouched(self, db_session, sample_story):
+        fixed = await CounterService.reconcile(db_session)
+
+        assert fixed == {"comment_count": 0, "reply_count": 0, "support_count": 0, "save_count": 0}
+
+    @pytest.mark.asyncio
+    async def test_sharded_counters_recounted_exactly(self, db_session, sample_story, sample_user):
+        post = await load(db_session, Post, sample_story)
+        user = await load(db_session, User, sample_user)
+        post_id = post.id
+        db_session.add(Bookmark(user_id=user.id, post_id=post_id))
+        # Drifted shards and column
+        await CounterService.add(db_session, post_id, 'save_count', 3)
+        post.support_count = 4
+        await db_session.commit()
+
+        fixed = await CounterService.reconcile(db_session)
+
+        assert fixed["save_count"] == 1
+        assert fixed["support_count"] == 1
+        post = await load(db_session, Post, sample_story)
+        assert await CounterService.read(db_session, post) == {"support_count": 0, "save_count": 1}
+
+    @pytest.mark.asyncio
+    async def test_write_conflict_retried(self, db_session, sample_story, monkeypatch):
+        class Conflict(Exception):
+            sqlstate = SERIALIZATION_FAILURE
+
+        recount = CounterService._recount
+        calls = []
+
+        async def conflicting(db):
+            calls.append(1)
+            if len(calls) == 1:
+                raise DBAPIError("UPDATE posts ...", {}, Conflict())
+            return await recount(db)
+
+        monkeypatch.setattr(CounterService, "_recount", conflicting)
+
+        fixed = await CounterService.reconcile(db_session)
+
+        assert len(calls) == 2
+        assert fixed["comment_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_other_errors_not_retried(self, db_session, monkeypatch):
+        calls = []
+
+        async def failing(db):
+            calls.append(1)
+            raise DBAPIError("UPDATE posts ...", {}, Exception("disk I/O error"))
+
+        monkeypatch.setattr(CounterService, "_recount", failing)
+
+        with pytest.raises(DBAPIError):
+            await CounterService.reconcile(db_session)
+        assert len(calls) == 1
+
+
+class TestShardedCounters:
+    """Sharded support/save counters"""
+
+    async def _shard_rows(self, db_session):
+        result = await db_session.execute(select(PostCounterShard))
+        return result.scalars().all()
+
+    @pytest.mark.asyncio
+    async def test_add_spreads_across_shards_and_reads_sum(self, db_session, sample_story):
+        post = await load(db_session, Post, sample_story)
+        for _ in range(20):
+            await CounterService.add(db_session, post.id, 'support_count')
+        await CounterService.add(db_session, post.id, 'support_count', -1)
+        await db_session.commit()
+
+        rows = await self._shard_rows(db_session)
+        assert 1 < len(rows) <= 8
+        counts = await CounterService.read(db_session, post)
+        assert counts == {"support_count": 19, "save_count": 0}
+
+    @pytest.mark.asyncio
+    async def test_fold_moves_shards_into_posts(self, db_session, sample_story):
+        post = await load(db_session, Post, sample_story)
+        post_id = post.id
+        for _ in range(5):
+            await CounterService.add(db_session, post_id, 'support_count')
+        await CounterService.add(db_session, post_id, 'save_count', 2)
+        await db_session.commit()
+
+        touched = await CounterService.fold(db_session)
+
+        assert touched == 1
+        assert await self._shard_rows(db_session) == []
+        post = await load(db_session, Post, sample_story)
+        assert post.support_count == 5
+        assert post.save_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flusher_folds_with_its_own_session(self, db_session, sample_story):
+        from app.tests.conftest import TestSessionLocal
+
+        post = await load(db_session, Post, sample_story)
+        await CounterService.add(db_session, post.id, 'save_count')
+        await db_session.commit()
+
+        assert await CounterFlusher(session_factory=TestSessionLocal).flush() == 1
+
+    @pytest.mark.asyncio
+    async def test_feed_and_toggle_read_live_counts(self, client, auth_headers, second_user_headers):
+        create = await client.post("/api/posts", json={
+            "title": "Counted Story",
+            "content": "This is a test story content that meets the minimum character requirement.",
+            "story_type": "life_story",
+            "status": "published"
+        }, headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        response = await client.post(
+            f"/api/posts/{story_id}/toggle-react",
+            json={"support_type": "felt_this"},
+            headers=second_user_headers
+        )
+        assert response.json()["support_count"] == 1
+
+        response = await client.post(f"/api/posts/{story_id}/bookmark", headers=second_user_headers)
+        assert response.json()["save_count"] == 1
+
+        feed = (await client.get("/api/posts")).json()
+        assert feed["stories"][0]["support_count"] == 1
+        story = (await client.get(f"/api/posts/{story_id}")).json()["story"]
+        assert story["support_count"] == 1
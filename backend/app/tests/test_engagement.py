@@ -0,0 +1,189 @@
+"""
+Engagement Time Series Tests
+Hourly buckets, compaction to daily and the author analytics endpoint
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.models import Post, EngagementBucket
+from app.services.counter_service import CounterFlusher
+from app.services.engagement_service import EngagementService, pending_views, hour_start, day_start
+from app.tests.conftest import TestSessionLocal
+
+
+def story_payload():
+    return {
+        "title": "Analytics Story",
+        "content": "This is a test story content that meets the minimum character requirement.",
+        "story_type": "life_story",
+        "status": "published"
+    }
+
+
+async def post_id(db_session, public_id):
+    return await db_session.scalar(select(Post.id).where(Post.public_id == public_id))
+
+
+async def buckets(db_session, granularity):
+    result = await db_session.execute(
+        select(EngagementBucket)
+        .where(EngagementBucket.granularity == granularity)
+        .order_by(EngagementBucket.bucket_start)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all()
+
+
+class TestRecord:
+    """EngagementService.record upserts into the current hour"""
+
+    @pytest.mark.asyncio
+    async def test_deltas_accumulate_per_hour(self, db_session, sample_story):
+        pid = await post_id(db_session, sample_story)
+        now = datetime.utcnow()
+
+        await EngagementService.record(db_session, pid, now, views=1, reads=1)
+        await EngagementService.record(db_session, pid, now, views=1, reactions=1)
+        await EngagementService.record(db_session, pid, now, reactions=-1)
+        await EngagementService.record(db_session, pid, now - timedelta(hours=2), views=1)
+        await db_session.commit()
+
+        rows = await buckets(db_session, 'hour')
+        assert [row.bucket_start for row in rows] == [hour_start(now - timedelta(hours=2)), hour_start(now)]
+        assert (rows[1].views, rows[1].reads, rows[1].reactions) == (2, 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_empty_deltas_are_skipped(self, db_session, sample_story):
+        pid = await post_id(db_session, sample_story)
+
+        await EngagementService.record(db_session, pid, views=0)
+        await db_session.commit()
+
+        assert await buckets(db_session, 'hour') == []
+
+
+class TestCompact:
+    """Old hourly buckets fold into daily ones"""
+
+    @pytest.mark.asyncio
+    async def test_compacts_whole_days_past_retention(self, db_session, sample_story):
+        pid = await post_id(db_session, sample_story)
+        now = datetime.utcnow()
+        old_day = day_start(now) - timedelta(days=10)
+        for hour in (1, 5, 23):
+            await EngagementService.record(db_session, pid, old_day + timedelta(hours=hour), views=2, completions=1)
+        await EngagementService.record(db_session, pid, now, views=1)
+        await db_session.commit()
+
+        assert await EngagementService.compact(db_session, now) == 3
+        # Running again is a no-op
+        assert await EngagementService.compact(db_session, now) == 0
+
+        daily = await buckets(db_session, 'day')
+        assert [(row.bucket_start, row.views, row.completions) for row in daily] == [(old_day, 6, 3)]
+        assert len(await buckets(db_session, 'hour')) == 1
+
+    @pytest.mark.asyncio
+    async def test_series_merges_daily_and_hourly(self, db_session, sample_story):
+        pid = await post_id(db_session, sample_story)
+        now = datetime.utcnow()
+        await EngagementService.record(db_session, pid, now - timedelta(days=10), views=4)
+        await EngagementService.record(db_session, pid, now, views=1, bookmarks=1)
+        await db_session.commit()
+        await EngagementService.compact(db_session, now)
+
+        month = await EngagementService.series(db_session, pid, 30)
+        hourly = await EngagementService.series(db_session, pid, 2, 'hour')
+
+        assert [point['views'] for point in month['series']] == [4, 1]
+        assert month['series'][0]['bucket'] == day_start(now - timedelta(days=10))
+        assert month['totals']['views'] == 5
+        assert [point['views'] for point in hourly['series']] == [1]
+
+
+class TestPendingViews:
+    """Story page views are tallied in memory and written by the counter flusher"""
+
+    @pytest.mark.asyncio
+    async def test_views_written_in_bulk(self, client, auth_headers, db_session):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        counts = [(await client.get(f"/api/posts/{story_id}")).json()["story"]["view_count"] for _ in range(3)]
+        pid = await post_id(db_session, story_id)
+        before = await db_session.scalar(select(Post.view_count).where(Post.id == pid))
+
+        assert await CounterFlusher(session_factory=TestSessionLocal).flush() == 0  # no shards to fold
+        db_session.expire_all()
+
+        assert counts == [1, 2, 3]  # this worker's pending views are shown at once
+        assert before == 0
+        assert await db_session.scalar(select(Post.view_count).where(Post.id == pid)) == 3
+        assert [b.views for b in await buckets(db_session, 'hour')] == [3]
+        assert len(pending_views) == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_the_views(self, db_session, sample_story, monkeypatch):
+        pid = await post_id(db_session, sample_story)
+        pending_views.add(pid)
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("database unavailable")
+        monkeypatch.setattr(db_session, "connection", broken)
+
+        with pytest.raises(RuntimeError):
+            await EngagementService.flush_views(db_session)
+        assert pending_views.pending(pid) == 1
+
+
+class TestAnalyticsEndpoint:
+    """Write paths feed the buckets; only the author reads them"""
+
+    @pytest.mark.asyncio
+    async def test_author_sees_engagement(self, client, auth_headers, second_user_headers):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        await client.get(f"/api/posts/{story_id}")
+        await client.post(
+            f"/api/posts/{story_id}/read-progress",
+            json={"scroll_depth": 0.95, "time_spent": 60},
+            headers=second_user_headers
+        )
+        await client.post(f"/api/posts/{story_id}/toggle-react", json={"support_type": "brave"}, headers=second_user_headers)
+        await client.post(f"/api/posts/{story_id}/bookmark", headers=second_user_headers)
+        await client.post(f"/api/posts/{story_id}/bookmark", headers=second_user_headers)
+        await CounterFlusher(session_factory=TestSessionLocal).flush()
+
+        response = await client.get(f"/api/posts/{story_id}/analytics?days=7", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["granularity"] == "day"
+        assert data["totals"] == {
+            "views": 2, "reads": 1, "rereads": 0, "completions": 1, "reactions": 1, "bookmarks": 0
+        }
+        assert len(data["series"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_other_users_are_forbidden(self, client, auth_headers, second_user_headers):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        response = await client.get(f"/api/posts/{story_id}/analytics", headers=second_user_headers)
+
+        assert response.status_code == 403
+
+    def test_postgres_toggles_track_engagement_in_statement(self):
+        from sqlalchemy.dialects import postgresql
+        from app.services.story_service import StoryService
+        from app.services.ranking_service import RankingService
+
+        now = datetime.utcnow()
+        reaction = StoryService._toggle_reaction_statement(postgresql.insert, "id", 1, "brave", None, now)
+        bookmark = RankingService._toggle_bookmark_statement(postgresql.insert, "id", 1, now)
+
+        for stmt in (reaction, bookmark):
+            assert "INSERT INTO engagement_buckets" in str(stmt.compile(dialect=postgresql.dialect()))
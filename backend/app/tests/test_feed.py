@@ -0,0 +1,308 @@
+"""
+Feed Snapshot Tests
+Front page and category pages served from precomputed story id arrays,
+invalidated on publish / unpublish / delete; seeded random-order pages
+"""
+import asyncio
+import time
+from array import array
+
+import pytest
+from sqlalchemy import update
+
+from app.models.models import Post, PostStatus
+from app.services.feed_service import FeedSnapshot, FeedSnapshots, FeedSnapshotRefresher, feed_snapshots, shuffled_position
+from app.services.ranking_service import RankingService
+from app.tests.conftest import TestSessionLocal
+
+
+def story_payload(title, story_type="life_story", status="published"):
+    return {
+        "title": title,
+        "content": "This is a test story content that meets the minimum character requirement for validation.",
+        "story_type": story_type,
+        "status": status,
+        "is_anonymous": False
+    }
+
+
+async def publish(client, headers, count, story_type="life_story"):
+    ids = []
+    for i in range(count):
+        response = await client.post("/api/posts", headers=headers, json=story_payload(f"Feed Story {i}", story_type))
+        ids.append(response.json()["story"]["id"])
+    return ids
+
+
+async def feed_ids(client, **params):
+    response = await client.get("/api/posts", params={"sort_by": "latest", **params})
+    assert response.status_code == 200
+    return [s["id"] for s in response.json()["stories"]]
+
+
+@pytest.fixture
+def count_builds(monkeypatch):
+    builds = []
+    build = feed_snapshots.build
+
+    async def counting(db, story_type, sort):
+        builds.append((story_type, sort))
+        return await build(db, story_type, sort)
+
+    monkeypatch.setattr(feed_snapshots, "build", counting)
+    return builds
+
+
+class TestSnapshotPages:
+    """Pages sliced from the snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_pages_match_the_listing(self, client, auth_headers):
+        created = await publish(client, auth_headers, 5)
+
+        first = await client.get("/api/posts", params={"sort_by": "latest", "per_page": 2})
+        second = await feed_ids(client, per_page=2, page=2)
+        third = await feed_ids(client, per_page=2, page=3)
+
+        data = first.json()
+        assert [s["id"] for s in data["stories"]] + second + third == created[::-1]
+        assert (data["total"], data["has_next"], data["total_pages"]) == (5, True, 3)
+        assert data["next_cursor"]
+        assert data["stories"][0]["author"]["username"] == "testuser"
+
+    @pytest.mark.asyncio
+    async def test_snapshot_built_once(self, client, auth_headers, count_builds):
+        await publish(client, auth_headers, 3)
+
+        for page in (1, 2, 3):
+            await feed_ids(client, per_page=1, page=page)
+        await feed_ids(client, story_type="life_story")
+
+        assert count_builds == [(None, 'latest'), ('life_story', 'latest')]
+
+    @pytest.mark.asyncio
+    async def test_category_page_uses_snapshot(self, client, auth_headers, count_builds):
+        await publish(client, auth_headers, 2, story_type="regret")
+        await publish(client, auth_headers, 1, story_type="life_story")
+
+        response = await client.get("/api/posts/category/regret")
+
+        assert response.json()["total"] == 2
+        assert count_builds == [('regret', 'latest')]
+
+    @pytest.mark.asyncio
+    async def test_uncovered_requests_use_the_listing(self, client, auth_headers, count_builds):
+        await publish(client, auth_headers, 2)
+
+        assert await feed_ids(client, story_type="not_a_type") == []
+        assert len(await feed_ids(client, per_page=100, page=11)) == 0  # past FEED_SNAPSHOT_SIZE
+        assert count_builds == []
+
+
+class TestSingleFlight:
+    """Concurrent misses on one key share a single build"""
+
+    def slow_store(self, release, fail=False):
+        snapshots = FeedSnapshots(size=10)
+        builds = []
+
+        async def build(db, story_type, sort):
+            builds.append((story_type, sort))
+            await release.wait()
+            if fail:
+                raise RuntimeError("database unavailable")
+            return FeedSnapshot(array('q', [1]), bytes([0]), 1, time.monotonic())
+
+        snapshots.build = build
+        return snapshots, builds
+
+    @pytest.mark.asyncio
+    async def test_cold_key_built_once(self):
+        release = asyncio.Event()
+        snapshots, builds = self.slow_store(release)
+
+        waiting = [asyncio.create_task(snapshots.get(None, 'smart')) for _ in range(5)]
+        other = asyncio.create_task(snapshots.get('regret', 'smart'))
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*waiting, other)
+
+        assert builds == [(None, 'smart'), ('regret', 'smart')]
+        assert all(r is results[0] for r in results[:5])
+        assert snapshots._building == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_build_reaches_every_waiter(self):
+        release = asyncio.Event()
+        snapshots, builds = self.slow_store(release, fail=True)
+
+        waiting = [asyncio.create_task(snapshots.get(None, 'smart')) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+
+        assert len(builds) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_waiter_takes_over_a_cancelled_build(self):
+        release = asyncio.Event()
+        snapshots, builds = self.slow_store(release)
+
+        builder = asyncio.create_task(snapshots.get(None, 'smart'))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(snapshots.get(None, 'smart'))
+        await asyncio.sleep(0.01)
+        builder.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+
+        assert (await waiter).ids.tolist() == [1]
+        assert len(builds) == 2
+
+
+class TestInvalidation:
+    """Writes that change feed membership drop the affected snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_new_story_appears_immediately(self, client, auth_headers):
+        await publish(client, auth_headers, 2)
+        await feed_ids(client)
+
+        [new] = await publish(client, auth_headers, 1)
+
+        assert (await feed_ids(client))[0] == new
+
+    @pytest.mark.asyncio
+    async def test_unpublished_story_disappears(self, client, auth_headers):
+        first, second = await publish(client, auth_headers, 2)
+        await feed_ids(client)
+
+        await client.put(f"/api/posts/{second}", headers=auth_headers, json=story_payload("Feed Story 1", status="draft"))
+
+        assert await feed_ids(client) == [first]
+
+    @pytest.mark.asyncio
+    async def test_deleted_story_disappears(self, client, auth_headers):
+        first, second = await publish(client, auth_headers, 2)
+        await feed_ids(client)
+
+        await client.delete(f"/api/posts/{second}", headers=auth_headers)
+
+        assert await feed_ids(client) == [first]
+
+    @pytest.mark.asyncio
+    async def test_moved_story_leaves_old_category(self, client, auth_headers):
+        [story] = await publish(client, auth_headers, 1, story_type="regret")
+        await feed_ids(client, story_type="regret")
+        await feed_ids(client, story_type="life_story")
+
+        await client.put(f"/api/posts/{story}", headers=auth_headers, json=story_payload("Feed Story 0", story_type="life_story"))
+
+        assert await feed_ids(client, story_type="regret") == []
+        assert await feed_ids(client, story_type="life_story") == [story]
+
+    @pytest.mark.asyncio
+    async def test_other_categories_keep_their_snapshot(self, client, auth_headers, count_builds):
+        await feed_ids(client, story_type="regret")
+        await feed_ids(client, story_type="life_story")
+
+        await publish(client, auth_headers, 1, story_type="regret")
+        await feed_ids(client, story_type="regret")
+        await feed_ids(client, story_type="life_story")
+
+        assert count_builds.count(('regret', 'latest')) == 2
+        assert count_builds.count(('life_story', 'latest')) == 1
+
+    @pytest.mark.asyncio
+    async def test_rows_unpublished_behind_its_back_are_skipped(self, client, auth_headers, db_session):
+        first, second = await publish(client, auth_headers, 2)
+        await feed_ids(client)
+
+        await db_session.execute(
+            update(Post).where(Post.public_id == second).values(status=PostStatus.REMOVED.value)
+        )
+        await db_session.commit()
+
+        assert await feed_ids(client) == [first]
+
+
+class TestRefresher:
+    """Periodic rebuild of the snapshots in use"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_rebuilds_held_snapshots(self, client, auth_headers, db_session):
+        snapshots = FeedSnapshots(size=10, session_factory=TestSessionLocal)
+        await publish(client, auth_headers, 1)
+        await snapshots.get(None, 'latest')
+        await snapshots.get('life_story', 'trending')
+
+        await publish(client, auth_headers, 1)  # invalidates the global store, not this one
+        refreshed = await FeedSnapshotRefresher(snapshots, session_factory=TestSessionLocal).refresh()
+
+        assert refreshed == 2
+        assert len((await snapshots.get(None, 'latest')).ids) == 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_capped(self, client, auth_headers, db_session):
+        snapshots = FeedSnapshots(size=2, session_factory=TestSessionLocal)
+        await publish(client, auth_headers, 3)
+
+        snapshot = await snapshots.get(None, 'latest')
+
+        assert (len(snapshot.ids), snapshot.total) == (2, 3)
+        assert snapshots.covers(None, 'latest', page=1, per_page=2)
+        assert not snapshots.covers(None, 'latest', page=2, per_page=2)
+
+
+class TestRandomFeed:
+    """Seeded shuffle over the cached id list (unsent letters)"""
+
+    def test_shuffle_is_a_permutation(self):
+        for n in (1, 2, 5, 64, 1000):
+            assert sorted(shuffled_position(i, n, seed=42) for i in range(n)) == list(range(n))
+
+    def test_seed_decides_the_order(self):
+        order = lambda seed: [shuffled_position(i, 50, seed) for i in range(50)]
+
+        assert order(1) == order(1)
+        assert order(1) != order(2)
+
+    @pytest.mark.asyncio
+    async def test_pages_of_one_seed_never_repeat(self, client, auth_headers, count_builds):
+        created = await publish(client, auth_headers, 7, story_type="unsent_letter")
+
+        first = await client.get("/api/posts", params={"sort_by": "random", "story_type": "unsent_letter", "per_page": 3})
+        seed = first.json()["seed"]
+        rest = [
+            await feed_ids(client, sort_by="random", story_type="unsent_letter", per_page=3, page=page, seed=seed)
+            for page in (2, 3)
+        ]
+
+        seen = [s["id"] for s in first.json()["stories"]] + rest[0] + rest[1]
+        assert sorted(seen) == sorted(created)
+        assert first.json()["total"] == 7
+        assert count_builds == [('unsent_letter', 'random')]
+
+    @pytest.mark.asyncio
+    async def test_same_seed_same_page(self, client, auth_headers):
+        await publish(client, auth_headers, 6, story_type="unsent_letter")
+        params = {"sort_by": "random", "story_type": "unsent_letter", "per_page": 6}
+
+        one = await feed_ids(client, seed=7, **params)
+        again = await feed_ids(client, seed=7, **params)
+        other = await feed_ids(client, seed=8, **params)
+
+        assert one == again
+        assert sorted(one) == sorted(other)
+
+    @pytest.mark.asyncio
+    async def test_ranked_unsent_letters_use_the_shuffle(self, client, auth_headers, db_session):
+        created = await publish(client, auth_headers, 4, story_type="unsent_letter")
+
+        first = await RankingService.get_ranked_stories(db_session, "unsent_letter", page=1, per_page=2)
+        second = await RankingService.get_ranked_stories(db_session, "unsent_letter", page=2, per_page=2, seed=first["seed"])
+
+        assert first["ranking_algorithm"] == "random"
+        assert (first["total"], first["has_next"], second["has_next"]) == (4, True, False)
+        assert sorted(s["id"] for s in first["stories"] + second["stories"]) == sorted(created)
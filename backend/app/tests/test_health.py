@@ -1,9 +1,12 @@
 """
 FastAPI Health Endpoint Tests
 """
-import pytest
+import asyncio
 import time
 
+import pytest
+import pytest_asyncio
+
 
 class TestHealthEndpoint:
     """Test the /api/health endpoint for server warmup"""
@@ -65,3 +68,158 @@ class TestRootEndpoint:
         assert "name" in data
         assert "version" in data
         assert data["name"] == "HeartOut API"
+
+
+class TestStartupWarmup:
+    """Health answers during warmup; other requests wait for it"""
+
+    @pytest_asyncio.fixture
+    async def starting(self, monkeypatch):
+        import app.main as main_module
+        from app.core.warmup import Warmup
+
+        state = Warmup(backoff=0.01)
+        monkeypatch.setattr(main_module, "warmup", state)
+        yield state
+        await state.stop()
+
+    @pytest.mark.asyncio
+    async def test_health_answers_before_warmup_finishes(self, client, starting):
+        release = asyncio.Event()
+        starting.start(release.wait)
+
+        health = await client.get("/api/health")
+        stories = asyncio.create_task(client.get("/api/posts"))
+        await asyncio.sleep(0.05)
+
+        assert health.status_code == 200
+        assert health.json()["warmup"] == "warming"
+        assert not stories.done()
+
+        release.set()
+        assert (await stories).status_code == 200
+        assert (await client.get("/api/health")).json()["warmup"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_failed_warmup_is_reported(self, client, starting):
+        async def broken():
+            raise RuntimeError("database unreachable")
+        starting.start(broken)
+
+        stories = await client.get("/api/posts")
+        health = await client.get("/api/health")
+
+        assert stories.status_code == 503
+        assert health.status_code == 503
+        assert health.json()["message"] == "database unreachable"
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_are_retried(self, client, starting):
+        attempts = []
+        async def waking_database():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionRefusedError("database waking up")
+        starting.start(waking_database)
+
+        stories = await client.get("/api/posts")
+
+        assert stories.status_code == 200
+        assert len(attempts) == 3
+        assert (await client.get("/api/health")).json()["warmup"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_aborted_startup_is_not_retried(self, client, starting):
+        from app.core.warmup import StartupAborted
+        attempts = []
+        async def out_of_date():
+            attempts.append(1)
+            raise StartupAborted("schema out of date")
+        starting.start(out_of_date)
+
+        assert (await client.get("/api/posts")).status_code == 503
+        assert len(attempts) == 1
+
+    @pytest.mark.asyncio
+    async def test_websocket_waits_for_warmup(self, starting, monkeypatch):
+        import app.main as main_module
+        from app.core.config import settings
+        from app.tests.test_websockets import FakeWebSocket
+        monkeypatch.setattr(settings, "STARTUP_WARMUP_TIMEOUT", 0.05)
+        starting.start(asyncio.Event().wait)
+        socket = FakeWebSocket()
+
+        await main_module.websocket_endpoint(socket, token="any", cursor=None)
+
+        assert (socket.accepted, socket.closed_code) == (False, 1013)
+
+    @pytest.mark.asyncio
+    async def test_slow_warmup_times_out_with_retry_after(self, client, starting, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "STARTUP_WARMUP_TIMEOUT", 0.05)
+        starting.start(asyncio.Event().wait)
+
+        response = await client.get("/api/posts")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+
+    @pytest.mark.asyncio
+    async def test_starting_up_responses_carry_cors_headers(self, client, starting, monkeypatch):
+        """The browser sees a retryable 503, not a CORS failure; preflights don't wait"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "STARTUP_WARMUP_TIMEOUT", 0.05)
+        starting.start(asyncio.Event().wait)
+        origin = {"Origin": "http://localhost:5173"}
+
+        response = await client.get("/api/posts", headers=origin)
+        preflight = await client.options("/api/posts", headers={
+            **origin, "Access-Control-Request-Method": "GET"
+        })
+
+        assert response.status_code == 503
+        assert response.headers["access-control-allow-origin"] == "http://localhost:5173"
+        assert preflight.status_code == 200
+        assert preflight.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+    @pytest.mark.asyncio
+    async def test_wait_after_ready_sets_no_timer(self, starting, monkeypatch):
+        async def ready():
+            pass
+        starting.start(ready)
+        assert await starting.wait(1)
+
+        async def no_timer(*args, **kwargs):
+            raise AssertionError("wait_for called after READY")
+        monkeypatch.setattr(asyncio, "wait_for", no_timer)
+
+        assert await starting.wait(1)
+
+class TestDeferredImports:
+    """Rarely used modules stay out of the import of app.main"""
+
+    def test_admin_router_redis_and_numpy_are_not_imported_at_startup(self):
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = "import sys, app.main; print(*(m in sys.modules for m in ('app.api.v1.admin', 'redis', 'numpy')))"
+        backend = Path(__file__).resolve().parents[2]
+        result = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True)
+
+        assert result.stdout.split() == ["False", "False", "False"]
+
+    def test_lazy_router_loads_once(self):
+        from fastapi import FastAPI
+        from app.core.warmup import LazyRouter
+
+        app = FastAPI()
+        router = LazyRouter(app, "app.api.v1.admin", prefix="/api/admin", tags=["Admin"])
+        router.load()
+        routes = len(app.routes)
+        router.load()
+
+        assert len(app.routes) == routes
+        assert "/api/admin/dashboard" in app.openapi()["paths"]
+        assert router.matches("/api/admin/users") and not router.matches("/api/administrator")
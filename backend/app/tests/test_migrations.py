@@ -0,0 +1,222 @@
+"""
+Migration Runner Tests
+Fresh and pre-runner ("long-lived") SQLite databases brought to the
+current schema by app.migrations
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+import app.main as main_module
+from app.core.config import settings
+from app.core.database import Base
+from app.core.warmup import warmup, FAILED
+from app.models.models import User, Post, Comment
+from app.migrations import upgrade, schema_is_current, pending_migrations, load_migrations
+from app.migrations.ops import index_sql
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    await engine.dispose()
+
+
+async def schema(engine):
+    def read(sync_conn):
+        inspector = inspect(sync_conn)
+        return {
+            table: {
+                'columns': {c['name'] for c in inspector.get_columns(table)},
+                'indexes': {i['name'] for i in inspector.get_indexes(table)},
+            }
+            for table in inspector.get_table_names()
+        }
+    async with engine.connect() as conn:
+        return await conn.run_sync(read)
+
+
+async def make_legacy_database(engine):
+    """Tables as create_all left them before excerpts, reply counts, one reaction per story and the new tables"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        author = User(email="old@gmail.com", username="olduser")
+        author.set_password("SecureP@ss123!")
+        db.add(author)
+        await db.flush()
+        story = Post(title="Old story", content="An   old story written before excerpts existed.",
+                     status="published", user_id=author.id)
+        db.add(story)
+        await db.flush()
+        parent = Comment(content="Parent", post_id=story.id, user_id=author.id)
+        db.add(parent)
+        await db.flush()
+        db.add(Comment(content="Reply", post_id=story.id, user_id=author.id, parent_id=parent.id))
+        await db.commit()
+    async with engine.begin() as conn:
+        for index in ('idx_post_status_published', 'idx_post_user_status', 'idx_comment_post_parent'):
+            await conn.execute(text(f"DROP INDEX {index}"))
+        await conn.execute(text("ALTER TABLE posts DROP COLUMN excerpt"))
+        await conn.execute(text("ALTER TABLE comments DROP COLUMN reply_count"))
+        for table in ('daily_stats', 'engagement_buckets'):
+            await conn.execute(text(f"DROP TABLE {table}"))
+        # Reactions were unique per type, so a reader could hold several on one story
+        await conn.execute(text("DROP INDEX uq_support_giver_post"))
+        await conn.execute(text(
+            "INSERT INTO supports (support_type, giver_id, receiver_id, post_id, created_at) VALUES "
+            "('felt_this', 1, 1, 1, '2024-01-01'), ('brave', 1, 1, 1, '2024-01-02')"
+        ))
+        await conn.execute(text("UPDATE posts SET support_count = 2"))
+
+
+class TestUpgrade:
+    """Runner bookkeeping"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_database_gets_full_schema(self, engine):
+        assert not await schema_is_current(engine)
+
+        applied = await upgrade(engine)
+
+        assert applied == [m.revision for m in load_migrations()]
+        assert await schema_is_current(engine)
+        assert await upgrade(engine) == []
+        tables = await schema(engine)
+        assert set(Base.metadata.tables) <= set(tables)
+        assert 'idx_post_status_published' in tables['posts']['indexes']
+
+    @pytest.mark.asyncio
+    async def test_baseline_is_frozen(self, engine):
+        """0001 creates the pre-0002 tables, not the live models: later versions do the rest"""
+        from app.migrations.versions import v0001_baseline
+
+        async with engine.begin() as conn:
+            await v0001_baseline.upgrade(conn)
+
+        tables = await schema(engine)
+        assert 'excerpt' not in tables['posts']['columns']
+        assert 'reply_count' not in tables['comments']['columns']
+        assert 'idx_post_user_status' not in tables['posts']['indexes']
+        assert 'uq_support_giver_post' not in tables['supports']['indexes']
+
+    @pytest.mark.asyncio
+    async def test_migrated_schema_matches_the_models(self, engine, tmp_path):
+        reference = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'models.db'}")
+        async with reference.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        await upgrade(engine)
+
+        migrated = await schema(engine)
+        del migrated['schema_migrations']
+        assert migrated == await schema(reference)
+        await reference.dispose()
+
+    @pytest.mark.asyncio
+    async def test_only_unrecorded_versions_run(self, engine):
+        await upgrade(engine)
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM schema_migrations WHERE version = '0003'"))
+
+        assert [m.revision for m in await pending_migrations(engine)] == ['0003']
+        # Versions are idempotent, so re-running one against an up-to-date schema is safe
+        assert await upgrade(engine) == ['0003']
+
+    @pytest.mark.asyncio
+    async def test_long_lived_database_is_patched(self, engine):
+        await make_legacy_database(engine)
+
+        await upgrade(engine)
+
+        tables = await schema(engine)
+        assert {'daily_stats', 'engagement_buckets', 'schema_migrations'} <= set(tables)
+        assert 'excerpt' in tables['posts']['columns']
+        assert {'idx_post_status_published', 'idx_post_user_status'} <= tables['posts']['indexes']
+        assert 'idx_comment_post_parent' in tables['comments']['indexes']
+        async with engine.connect() as conn:
+            excerpt = await conn.scalar(text("SELECT excerpt FROM posts"))
+            replies = (await conn.execute(text("SELECT id, reply_count FROM comments ORDER BY id"))).all()
+        assert excerpt == "An old story written before excerpts existed."
+        assert [tuple(row) for row in replies] == [(1, 1), (2, 0)]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_reactions_collapsed_to_the_newest(self, engine):
+        await make_legacy_database(engine)
+
+        await upgrade(engine)
+
+        assert 'uq_support_giver_post' in (await schema(engine))['supports']['indexes']
+        async with engine.connect() as conn:
+            reactions = (await conn.execute(text("SELECT support_type FROM supports"))).scalars().all()
+            support_count = await conn.scalar(text("SELECT support_count FROM posts"))
+        assert (reactions, support_count) == (['brave'], 1)
+
+    @pytest.mark.asyncio
+    async def test_backfill_commits_batch_by_batch(self, engine, monkeypatch):
+        from app.migrations.versions import v0002_post_excerpts as v0002
+        from app.migrations.versions import v0004_comment_reply_counts as v0004
+        await make_legacy_database(engine)
+        steps = []
+        for version in (v0002, v0004):
+            monkeypatch.setattr(version, "BATCH_SIZE", 1)
+            monkeypatch.setattr(version, "step", lambda conn, name=version.revision: steps.append(name) or engine.begin())
+
+        await upgrade(engine)
+
+        # Per version: the ALTER, one step per row, and the empty probe that ends the backfill
+        assert steps.count('0002') == 1 + 1 + 1
+        assert steps.count('0004') == 1 + 2 + 1
+        assert v0002.transactional is v0004.transactional is False
+
+    @pytest.mark.asyncio
+    async def test_reply_counts_recomputed_after_combined_0002(self, engine):
+        await make_legacy_database(engine)
+        async with engine.begin() as conn:
+            await conn.execute(text("ALTER TABLE comments ADD COLUMN reply_count INTEGER DEFAULT 0"))
+
+        await upgrade(engine)
+
+        async with engine.connect() as conn:
+            replies = (await conn.execute(text("SELECT id, reply_count FROM comments ORDER BY id"))).all()
+        assert [tuple(row) for row in replies] == [(1, 1), (2, 0)]
+
+
+class TestOnlineIndexes:
+    """Index DDL per dialect"""
+
+    def test_postgres_builds_concurrently(self):
+        sql = index_sql('idx_post_user_status', 'posts', ['user_id', 'status'], 'postgresql')
+
+        assert sql == "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_post_user_status ON posts (user_id, status)"
+
+    def test_unique_index(self):
+        sql = index_sql('uq_support_giver_post', 'supports', ['giver_id', 'post_id'], 'postgresql', unique=True)
+
+        assert sql.startswith("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_support_giver_post")
+
+    def test_sqlite_builds_inline(self):
+        sql = index_sql('idx_post_user_status', 'posts', ['user_id', 'status'], 'sqlite')
+
+        assert "CONCURRENTLY" not in sql
+
+    def test_index_version_runs_outside_a_transaction(self):
+        versions = {m.revision: m for m in load_migrations()}
+
+        assert versions['0003'].transactional is versions['0005'].transactional is False
+
+
+class TestStartup:
+    """Startup warmup checks the schema instead of calling create_all"""
+
+    @pytest.mark.asyncio
+    async def test_refuses_to_serve_on_pending_migrations(self, engine, monkeypatch):
+        monkeypatch.setattr(main_module, "engine", engine)
+        monkeypatch.setattr(settings, "MIGRATE_ON_STARTUP", False)
+
+        async with main_module.lifespan(main_module.app):
+            assert not await warmup.wait(5)
+            assert warmup.state == FAILED
+            assert "out of date" in warmup.error
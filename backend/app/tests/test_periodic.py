@@ -0,0 +1,76 @@
+"""
+Periodic Background Task Tests
+The shared loop: failures are logged and counted, the loop carries on
+"""
+import asyncio
+import logging
+
+import pytest
+
+from app.core.metrics import metrics
+from app.core.periodic import PeriodicTask
+from app.services.counter_service import CounterFlusher
+from app.services.engagement_service import EngagementCompactor
+from app.services.feed_service import FeedSnapshotRefresher, feed_snapshots
+from app.services.stats_service import StatsRefresher
+from app.tests.conftest import TestSessionLocal
+
+
+class Flaky(PeriodicTask):
+    name = 'flaky'
+    run_at_start = True
+
+    def __init__(self, failures: int):
+        super().__init__(interval=0.001)
+        self.failures = failures
+        self.passes = 0
+        self.done = asyncio.Event()
+
+    async def run_pass(self):
+        self.passes += 1
+        if self.passes <= self.failures:
+            raise RuntimeError("database unavailable")
+        self.done.set()
+
+
+class TestPeriodicTask:
+    """start/stop loop shared by the background tasks"""
+
+    @pytest.mark.asyncio
+    async def test_failures_are_logged_and_counted(self, caplog):
+        metrics.reset()
+        task = Flaky(failures=2)
+
+        with caplog.at_level(logging.ERROR, logger='app.core.periodic'):
+            task.start()
+            await asyncio.wait_for(task.done.wait(), 5)
+            await task.stop()
+
+        assert task.passes == 3
+        assert metrics.get('flaky.failed') == 2
+        assert "flaky pass failed" in caplog.text
+        assert "database unavailable" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_exclusive_pass_runs_on_sqlite(self, setup_database):
+        """No advisory lock outside PostgreSQL: the pass just runs"""
+        task = Flaky(failures=0)
+        task.exclusive = True
+        task.session_factory = TestSessionLocal
+
+        await task._guarded_pass()
+
+        assert task.passes == 1
+
+    def test_background_loops_share_it(self):
+        loops = [
+            CounterFlusher(session_factory=TestSessionLocal),
+            StatsRefresher(session_factory=TestSessionLocal),
+            EngagementCompactor(session_factory=TestSessionLocal),
+            FeedSnapshotRefresher(feed_snapshots, session_factory=TestSessionLocal),
+        ]
+
+        assert all(isinstance(loop, PeriodicTask) for loop in loops)
+        assert len({loop.name for loop in loops}) == len(loops)
+        # Shared-table rewrites run in one worker at a time; per-process state is drained everywhere
+        assert [loop.exclusive for loop in loops] == [False, True, True, False]
@@ -0,0 +1,203 @@
+"""
+Personalized Ranking Tests
+Smart feed re-ranked by the reader's story type affinity, completed
+stories left out, reader profiles cached
+"""
+import time
+from array import array
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.models.models import User, Post, Support, Bookmark, ReadProgress, PostStatus
+from app.models.queries import USER_BY_PUBLIC_ID
+from app.services.feed_service import FeedSnapshot, STORY_TYPES, feed_snapshots
+from app.services.personalization_service import ReaderProfile, load_profile, rerank
+from app.services.ranking_service import RankingService
+
+
+def snapshot(*types):
+    codes = bytes(STORY_TYPES.index(t) for t in types)
+    return FeedSnapshot(array('q', range(1, len(types) + 1)), codes, len(types), time.monotonic())
+
+
+class TestRerank:
+    """In-memory re-ranking of the snapshot candidates"""
+
+    def test_no_history_keeps_the_global_order(self):
+        feed = snapshot('life_story', 'regret', 'other')
+
+        assert rerank(feed, ReaderProfile({}, frozenset())) == [1, 2, 3]
+
+    def test_affinity_lifts_a_readers_categories(self):
+        feed = snapshot('life_story', 'life_story', 'regret', 'life_story')
+
+        assert rerank(feed, ReaderProfile({'regret': 1.0}, frozenset()))[0] == 3
+        assert rerank(feed, ReaderProfile({'regret': 1.0}, frozenset()), boost=0) == [1, 2, 3, 4]
+
+    def test_completed_and_uncandidated_stories_left_out(self):
+        feed = snapshot('life_story', 'regret', 'other', 'other')
+
+        assert rerank(feed, ReaderProfile({}, frozenset({2})), candidates=3) == [1, 3]
+
+
+class TestPersonalizedFeed:
+    """RankingService.get_ranked_stories with a user_id"""
+
+    async def setup_feed(self, db, author_id, types):
+        stories = [
+            Post(
+                title=f"Story {i}", content="Content long enough for personalization tests.",
+                status=PostStatus.PUBLISHED.value, story_type=story_type, user_id=author_id,
+                rank_score=float(len(types) - i), is_anonymous=False
+            )
+            for i, story_type in enumerate(types)
+        ]
+        db.add_all(stories)
+        await db.commit()
+        return stories
+
+    async def reader(self, db, sample_user):
+        return (await db.scalar(USER_BY_PUBLIC_ID, {'public_id': sample_user})).id
+
+    @pytest.mark.asyncio
+    async def test_reader_sees_their_categories_first(self, db_session, sample_user):
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['life_story', 'life_story', 'regret', 'regret'])
+        db_session.add_all([
+            Support(giver_id=reader, post_id=stories[3].id, support_type='felt_this'),
+            Bookmark(user_id=reader, post_id=stories[3].id),
+        ])
+        await db_session.commit()
+
+        anonymous = await RankingService.get_ranked_stories(db_session)
+        personal = await RankingService.get_ranked_stories(db_session, user_id=reader)
+
+        assert anonymous["ranking_algorithm"] == "gravity"
+        assert [s["id"] for s in anonymous["stories"]] == [s.public_id for s in stories]
+        assert personal["ranking_algorithm"] == "personalized"
+        assert [s["id"] for s in personal["stories"]][:2] == [stories[2].public_id, stories[3].public_id]
+
+    @pytest.mark.asyncio
+    async def test_completed_stories_are_skipped(self, db_session, sample_user):
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['life_story', 'regret', 'other'])
+        db_session.add(ReadProgress(user_id=reader, post_id=stories[0].id, scroll_depth=1.0, completed=True))
+        await db_session.commit()
+
+        personal = await RankingService.get_ranked_stories(db_session, user_id=reader)
+
+        assert stories[0].public_id not in [s["id"] for s in personal["stories"]]
+        assert (personal["total"], personal["has_next"]) == (2, False)
+
+    @pytest.mark.asyncio
+    async def test_finishing_a_story_drops_it_at_once(self, db_session, sample_user):
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['life_story', 'regret'])
+        await RankingService.get_ranked_stories(db_session, user_id=reader)  # profile cached
+
+        await RankingService.update_story_metrics(db_session, stories[1].public_id, user_id=reader, scroll_depth=0.95)
+
+        personal = await RankingService.get_ranked_stories(db_session, user_id=reader)
+        assert [s["id"] for s in personal["stories"]] == [stories[0].public_id]
+
+    @pytest.mark.asyncio
+    async def test_profile_is_cached(self, db_session, sample_user):
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['regret', 'other'])
+        db_session.add(Bookmark(user_id=reader, post_id=stories[0].id))
+        await db_session.commit()
+
+        first = await load_profile(db_session, reader)
+        db_session.add(Bookmark(user_id=reader, post_id=stories[1].id))
+        await db_session.commit()
+
+        assert first.affinity == {'regret': 1.0}
+        assert await load_profile(db_session, reader) == first
+
+    @pytest.mark.asyncio
+    async def test_pages_past_the_candidates_use_the_global_order(self, db_session, sample_user, monkeypatch):
+        monkeypatch.setattr(settings, "PERSONALIZE_CANDIDATES", 2)
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['life_story', 'regret', 'other', 'other'])
+
+        second = await RankingService.get_ranked_stories(db_session, page=2, per_page=2, user_id=reader)
+
+        assert second["ranking_algorithm"] == "personalized"
+        assert [s["id"] for s in second["stories"]] == [s.public_id for s in stories[2:]]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("per_page", [1, 2, 3, 4])
+    @pytest.mark.parametrize("snapshot_size", [1000, 4])
+    async def test_hand_off_skips_and_repeats_nothing(self, db_session, sample_user, monkeypatch, per_page, snapshot_size):
+        """Candidates not a multiple of per_page, one of them completed, pages past the snapshot"""
+        monkeypatch.setattr(settings, "PERSONALIZE_CANDIDATES", 3)
+        monkeypatch.setattr(feed_snapshots, "size", snapshot_size)
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['other'] * 7)
+        db_session.add(ReadProgress(user_id=reader, post_id=stories[1].id, scroll_depth=1.0, completed=True))
+        await db_session.commit()
+
+        seen, page = [], 1
+        while True:
+            result = await RankingService.get_ranked_stories(db_session, page=page, per_page=per_page, user_id=reader)
+            seen += [s["id"] for s in result["stories"]]
+            if not result["has_next"]:
+                break
+            page += 1
+
+        assert seen == [s.public_id for i, s in enumerate(stories) if i != 1]
+        assert result["total"] == 6
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("snapshot_size", [1000, 4])
+    async def test_completed_stories_past_the_candidates_are_skipped(self, db_session, sample_user, monkeypatch, snapshot_size):
+        monkeypatch.setattr(settings, "PERSONALIZE_CANDIDATES", 2)
+        monkeypatch.setattr(feed_snapshots, "size", snapshot_size)
+        reader = await self.reader(db_session, sample_user)
+        stories = await self.setup_feed(db_session, reader, ['other'] * 6)
+        db_session.add_all([
+            ReadProgress(user_id=reader, post_id=stories[i].id, scroll_depth=1.0, completed=True)
+            for i in (2, 5)
+        ])
+        await db_session.commit()
+
+        result = await RankingService.get_ranked_stories(db_session, page=2, per_page=2, user_id=reader)
+
+        assert [s["id"] for s in result["stories"]] == [stories[3].public_id, stories[4].public_id]
+        # Completed stories deeper than the snapshot are dropped from pages, not from total
+        assert result["total"] == (4 if snapshot_size == 1000 else 5)
+
+    @pytest.mark.asyncio
+    async def test_feed_route_reads_the_reader_without_a_primary_session(self, client, auth_headers, db_session):
+        async def no_primary():
+            raise AssertionError("feed opened a primary session")
+            yield
+
+        app.dependency_overrides[get_db] = no_primary
+
+        response = await client.get("/api/posts", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["ranking_algorithm"] == "personalized"
+
+    @pytest.mark.asyncio
+    async def test_feed_route_personalizes_signed_in_readers(self, client, auth_headers, db_session):
+        reader = (await db_session.scalar(select(User).where(User.email == "test@gmail.com"))).id
+        stories = await self.setup_feed(db_session, reader, ['life_story', 'regret'])
+        db_session.add(ReadProgress(user_id=reader, post_id=stories[0].id, scroll_depth=1.0, completed=True))
+        await db_session.commit()
+
+        personal = (await client.get("/api/posts", headers=auth_headers)).json()
+        anonymous = (await client.get("/api/posts")).json()
+        latest = (await client.get("/api/posts?sort_by=latest", headers=auth_headers)).json()
+
+        assert personal["ranking_algorithm"] == "personalized"
+        assert [s["id"] for s in personal["stories"]] == [stories[1].public_id]
+        assert personal["next_cursor"] is None
+        assert anonymous["ranking_algorithm"] == "smart"
+        assert len(anonymous["stories"]) == 2
+        assert latest["ranking_algorithm"] == "latest"
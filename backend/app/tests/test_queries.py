@@ -0,0 +1,99 @@
+"""
+Prepared Statement Tests
+Hot lookups and feed listings reuse one statement object per query shape,
+with request values passed as bound parameters
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.models import Post, User, PostStatus, StoryType
+from app.models.queries import USER_BY_PUBLIC_ID, TOKEN_IS_REVOKED, STORY_WITH_AUTHOR
+from app.services.listing_service import StoryListing
+
+
+@contextmanager
+def executed_statements():
+    """Every statement ORM sessions execute inside the block"""
+    statements = []
+
+    def record(orm_execute_state):
+        statements.append(orm_execute_state.statement)
+
+    event.listen(Session, "do_orm_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Session, "do_orm_execute", record)
+
+
+async def add_stories(db, author: User, story_types):
+    for i, story_type in enumerate(story_types):
+        db.add(Post(
+            title=f"Story {i}",
+            content="Content long enough for a published story in the feed.",
+            story_type=story_type,
+            status=PostStatus.PUBLISHED.value,
+            user_id=author.id,
+        ))
+    await db.commit()
+
+
+class TestHotLookups:
+    """Auth and story lookups run the module-level statements"""
+
+    @pytest.mark.asyncio
+    async def test_authenticated_request_uses_prebuilt_lookups(self, client, auth_headers):
+        with executed_statements() as statements:
+            await client.get("/api/auth/profile", headers=auth_headers)
+            await client.get("/api/auth/profile", headers=auth_headers)
+
+        assert statements.count(TOKEN_IS_REVOKED) == 2
+        assert statements.count(USER_BY_PUBLIC_ID) == 2
+
+    @pytest.mark.asyncio
+    async def test_story_lookup_binds_the_id(self, client, sample_story):
+        with executed_statements() as statements:
+            found = await client.get(f"/api/posts/{sample_story}")
+            missing = await client.get("/api/posts/does-not-exist")
+
+        assert found.status_code == 200
+        assert found.json()["story"]["id"] == sample_story
+        assert missing.status_code == 404
+        assert statements.count(STORY_WITH_AUTHOR) == 2
+
+
+class TestListingStatements:
+    """Feed statements are built once per listing shape"""
+
+    @pytest.mark.asyncio
+    async def test_same_shape_reuses_statements(self, db_session, sample_user):
+        author = await db_session.scalar(USER_BY_PUBLIC_ID, {'public_id': sample_user})
+        await add_stories(db_session, author, [StoryType.REGRET.value] * 3 + [StoryType.LIFE_STORY.value])
+
+        with executed_statements() as statements:
+            regrets = await StoryListing.published().of_type(StoryType.REGRET.value).fetch(db_session, per_page=2)
+            life = await StoryListing.published().of_type(StoryType.LIFE_STORY.value).fetch(db_session, per_page=2)
+            second = await StoryListing.published().of_type(StoryType.REGRET.value).fetch(db_session, page=2, per_page=2)
+
+        page_queries, count_queries = statements[0::2], statements[1::2]
+        assert len(set(map(id, page_queries))) == 1
+        assert len(set(map(id, count_queries))) == 1
+        assert (regrets.total, len(regrets.items), regrets.has_next) == (3, 2, True)
+        assert (life.total, len(life.items)) == (1, 1)
+        assert (len(second.items), second.has_next) == (1, False)
+        assert {s.story_type for s in regrets.items + second.items} == {StoryType.REGRET.value}
+
+    @pytest.mark.asyncio
+    async def test_different_shapes_get_their_own_statements(self, db_session, sample_user):
+        author = await db_session.scalar(USER_BY_PUBLIC_ID, {'public_id': sample_user})
+        await add_stories(db_session, author, [StoryType.REGRET.value])
+
+        with executed_statements() as statements:
+            await StoryListing.published().order('latest').fetch(db_session, with_total=False)
+            await StoryListing.published().order('trending').fetch(db_session, with_total=False)
+            await StoryListing.published().by_author(author.id).fetch(db_session, with_total=False)
+
+        assert len(set(map(id, statements))) == 3
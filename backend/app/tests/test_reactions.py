@@ -209,3 +209,176 @@ class TestReactionTypes:
             
             # When toggling same story with different type, it might remove first
             assert response.status_code in [200, 201]
+
+
+class TestToggleStatements:
+    """Toggle endpoints run as upsert/delete statements"""
+    
+    async def _story(self, client, auth_headers):
+        response = await client.post(
+            "/api/posts",
+            headers=auth_headers,
+            json={
+                "title": "Toggle Story Title",
+                "content": valid_content(),
+                "story_type": "achievement",
+                "status": "published"
+            }
+        )
+        return response.json()["story"]["id"]
+    
+    @pytest.mark.asyncio
+    async def test_reaction_add_change_remove(self, client, auth_headers, second_user_headers):
+        """Add, change, then remove keeps the count exact"""
+        story_id = await self._story(client, auth_headers)
+        url = f"/api/posts/{story_id}/toggle-react"
+        
+        added = (await client.post(url, json={"support_type": "felt_this"}, headers=second_user_headers)).json()
+        changed = (await client.post(url, json={"support_type": "brave"}, headers=second_user_headers)).json()
+        removed = (await client.post(url, json={"support_type": "brave"}, headers=second_user_headers)).json()
+        
+        assert (added["action"], added["support_count"]) == ("added", 1)
+        assert added["reaction"]["support_type"] == "felt_this"
+        assert (changed["action"], changed["support_count"]) == ("changed", 1)
+        assert changed["reaction"]["id"] == added["reaction"]["id"]
+        assert (removed["action"], removed["support_count"], removed["user_reaction"]) == ("removed", 0, None)
+    
+    @pytest.mark.asyncio
+    async def test_bookmark_toggle_round_trip(self, client, auth_headers):
+        """Bookmark toggles on then off"""
+        story_id = await self._story(client, auth_headers)
+        
+        on = (await client.post(f"/api/posts/{story_id}/bookmark", headers=auth_headers)).json()
+        off = (await client.post(f"/api/posts/{story_id}/bookmark", headers=auth_headers)).json()
+        
+        assert (on["is_bookmarked"], on["save_count"]) == (True, 1)
+        assert (off["is_bookmarked"], off["save_count"]) == (False, 0)
+    
+    @pytest.mark.asyncio
+    async def test_bookmark_missing_story(self, client, auth_headers):
+        response = await client.post("/api/posts/missing-story/bookmark", headers=auth_headers)
+        
+        assert response.status_code == 404
+    
+    def test_postgres_toggles_are_single_statements(self):
+        """The PostgreSQL path chains every step into one statement"""
+        from datetime import datetime
+        from sqlalchemy.dialects import postgresql
+        from app.services.story_service import StoryService
+        from app.services.ranking_service import RankingService
+        
+        now = datetime.utcnow()
+        reaction = StoryService._toggle_reaction_statement(postgresql.insert, "id", 1, "brave", None, now)
+        bookmark = RankingService._toggle_bookmark_statement(postgresql.insert, "id", 1, now)
+        
+        for stmt in (reaction, bookmark):
+            sql = str(stmt.compile(dialect=postgresql.dialect()))
+            assert sql.startswith("WITH")
+            assert "INSERT INTO post_counter_shards" in sql
+        reaction_sql = str(reaction.compile(dialect=postgresql.dialect()))
+        bookmark_sql = str(bookmark.compile(dialect=postgresql.dialect()))
+        assert "DELETE FROM supports" in reaction_sql
+        assert "DELETE FROM bookmarks" in bookmark_sql
+        assert "ON CONFLICT DO NOTHING RETURNING" in bookmark_sql
+    
+    def test_postgres_reaction_insert_conflicts_on_the_story(self):
+        """A racing insert turns into a type change, and only real inserts are counted"""
+        from datetime import datetime
+        from sqlalchemy.dialects import postgresql
+        from app.services.story_service import StoryService
+        
+        reaction = StoryService._toggle_reaction_statement(postgresql.insert, "id", 1, "brave", None, datetime.utcnow())
+        sql = str(reaction.compile(dialect=postgresql.dialect()))
+        
+        assert "ON CONFLICT (giver_id, post_id) DO UPDATE SET support_type = excluded.support_type" in sql
+        assert "xmax = 0 AS inserted" in sql
+        assert "FROM added \nWHERE added.inserted" in sql
+    
+    @pytest.mark.asyncio
+    async def test_react_allows_one_reaction_per_story(self, client, auth_headers, second_user_headers):
+        """/react refuses a second reaction of another type, like the toggle"""
+        story_id = await self._story(client, auth_headers)
+        url = f"/api/posts/{story_id}/react"
+        
+        first = await client.post(url, json={"support_type": "felt_this"}, headers=second_user_headers)
+        second = await client.post(url, json={"support_type": "brave"}, headers=second_user_headers)
+        story = (await client.get(f"/api/posts/{story_id}")).json()["story"]
+        
+        assert first.status_code == 201
+        assert first.json()["reaction"]["support_type"] == "felt_this"
+        assert second.status_code == 409
+        assert story["support_count"] == 1
+
+
+class TestMyStoryStates:
+    """Batched per-user state for feed cards"""
+    
+    async def _story(self, client, auth_headers, title):
+        response = await client.post(
+            "/api/posts",
+            headers=auth_headers,
+            json={
+                "title": title,
+                "content": valid_content(),
+                "story_type": "achievement",
+                "status": "published"
+            }
+        )
+        return response.json()["story"]["id"]
+    
+    @pytest.mark.asyncio
+    async def test_states_for_many_stories(self, client, auth_headers, second_user_headers):
+        """Reaction, bookmark and read progress come back per story id"""
+        first = await self._story(client, auth_headers, "First State Story")
+        second = await self._story(client, auth_headers, "Second State Story")
+        await client.post(f"/api/posts/{first}/toggle-react", json={"support_type": "brave"}, headers=second_user_headers)
+        await client.post(f"/api/posts/{second}/bookmark", headers=second_user_headers)
+        await client.post(
+            f"/api/posts/{second}/read-progress",
+            json={"scroll_depth": 0.95, "time_spent": 60},
+            headers=second_user_headers
+        )
+        
+        response = await client.get(
+            f"/api/posts/my-state?ids={first},{second},unknown-id",
+            headers=second_user_headers
+        )
+        
+        assert response.status_code == 200
+        states = response.json()["states"]
+        assert states[first]["reaction_type"] == "brave"
+        assert states[first]["has_reacted"] is True
+        assert states[first]["is_bookmarked"] is False
+        assert states[first]["read_progress"] is None
+        assert states[second]["reaction_type"] is None
+        assert states[second]["is_bookmarked"] is True
+        assert states[second]["read_progress"]["completed"] is True
+        assert states["unknown-id"] == {
+            "reaction_type": None,
+            "has_reacted": False,
+            "is_bookmarked": False,
+            "read_progress": None,
+        }
+    
+    @pytest.mark.asyncio
+    async def test_states_are_per_user(self, client, auth_headers, second_user_headers):
+        story_id = await self._story(client, auth_headers, "Private State Story")
+        await client.post(f"/api/posts/{story_id}/bookmark", headers=second_user_headers)
+        
+        response = await client.get(f"/api/posts/my-state?ids={story_id}", headers=auth_headers)
+        
+        assert response.json()["states"][story_id]["is_bookmarked"] is False
+    
+    @pytest.mark.asyncio
+    async def test_too_many_ids_rejected(self, client, auth_headers):
+        ids = ",".join(f"story-{i}" for i in range(101))
+        
+        response = await client.get(f"/api/posts/my-state?ids={ids}", headers=auth_headers)
+        
+        assert response.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_requires_auth(self, client):
+        response = await client.get("/api/posts/my-state?ids=abc")
+        
+        assert response.status_code == 401
@@ -0,0 +1,199 @@
+"""
+Read Replica Routing Tests
+Two SQLite files stand in for the primary and the replica; the replica is
+never synced, so every read shows which database served it. Read sessions
+come from read_session_maker (AUTOCOMMIT, lazy connection).
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+import app.main as main_module
+from app.main import app
+from app.core.database import Base, SessionRouter, get_db, get_read_db, read_session_maker
+from app.core.metrics import metrics
+from app.services.feed_service import feed_snapshots
+from app.utils.serialization import FastJSONResponse
+from app.tests.conftest import VALID_PASSWORD
+
+
+def request_with_cookie(cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        for name in ("primary", "replica")
+    ]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def replica_client(databases, monkeypatch):
+    primary_engine, replica_engine = databases
+    primary = async_sessionmaker(primary_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    router = SessionRouter(read_session_maker(primary_engine), read_session_maker(replica_engine), window=5)
+    monkeypatch.setattr(main_module, "session_router", router)
+    monkeypatch.setattr(feed_snapshots, "session_factory", primary)
+
+    async def primary_db():
+        async with primary() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = primary_db
+    app.dependency_overrides[get_read_db] = router.read_db
+    # https, so the Secure stickiness cookie is sent back like a browser would
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+async def register(client) -> dict:
+    response = await client.post("/api/auth/register", json={
+        "email": "replica@gmail.com",
+        "username": "replicauser",
+        "password": VALID_PASSWORD,
+        "display_name": "Replica User"
+    })
+    assert response.status_code == 201
+    return response.json()["user"]
+
+
+class TestSessionRouter:
+    """Choosing primary or replica per request"""
+
+    def test_reads_go_to_replica(self):
+        router = SessionRouter("primary", "replica", window=5)
+        before = metrics.get("db.reads.replica")
+
+        assert router.session_for(request_with_cookie()) == "replica"
+        assert metrics.get("db.reads.replica") == before + 1
+
+    def test_recent_write_pins_reads_to_primary(self):
+        router = SessionRouter("primary", "replica", window=5)
+        future = int(time.time()) + 5
+        past = int(time.time()) - 1
+
+        assert router.session_for(request_with_cookie(f"{SessionRouter.COOKIE}={future}")) == "primary"
+        assert router.session_for(request_with_cookie(f"{SessionRouter.COOKIE}={past}")) == "replica"
+        assert router.session_for(request_with_cookie(f"{SessionRouter.COOKIE}=junk")) == "replica"
+
+    def test_without_replica_everything_reads_primary(self):
+        router = SessionRouter("primary", None, window=5)
+        response = Response()
+
+        router.mark_write(response)
+
+        assert router.session_for(request_with_cookie()) == "primary"
+        assert "set-cookie" not in response.headers
+
+    def test_mark_write_sets_short_lived_cookie(self):
+        router = SessionRouter("primary", "replica", window=5)
+        response = Response()
+
+        router.mark_write(response)
+
+        cookie = response.headers["set-cookie"]
+        assert cookie.startswith(f"{SessionRouter.COOKIE}=")
+        assert "Max-Age=6" in cookie
+        assert "HttpOnly" in cookie
+
+
+class TestReadSessions:
+    """Read-only sessions: lazy, transaction-free, released by the route"""
+
+    @pytest.mark.asyncio
+    async def test_connection_is_taken_lazily_in_autocommit(self, databases):
+        engine = databases[0]
+        pool = engine.sync_engine.pool
+        maker = read_session_maker(engine)
+
+        async with maker() as session:
+            assert pool.checkedout() == 0
+            await session.execute(select(1))
+            assert pool.checkedout() == 1
+            connection = await session.connection()
+            assert connection.sync_connection.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+            await session.close()
+            assert pool.checkedout() == 0
+
+    @pytest.mark.asyncio
+    async def test_read_route_returns_connection_before_responding(self, databases, replica_client):
+        replica_pool = databases[1].sync_engine.pool
+        held = []
+        original = FastJSONResponse.render
+
+        def render(self, content):
+            held.append(replica_pool.checkedout())
+            return original(self, content)
+
+        with patch.object(FastJSONResponse, "render", render):
+            response = await replica_client.get("/api/posts")
+
+        assert response.status_code == 200
+        assert held == [0]
+
+
+class TestReadYourWrites:
+    """End to end against two SQLite files"""
+
+    @pytest.mark.asyncio
+    async def test_writer_reads_primary_others_read_replica(self, replica_client):
+        user = await register(replica_client)
+
+        # The registering client is pinned to the primary and sees its new account
+        own = await replica_client.get(f"/api/auth/user/{user['id']}")
+        assert own.status_code == 200
+
+        # A client without the cookie reads the (lagging) replica
+        replica_client.cookies.clear()
+        other = await replica_client.get(f"/api/auth/user/{user['id']}")
+        assert other.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_failed_writes_do_not_pin(self, replica_client):
+        response = await replica_client.post("/api/auth/login", json={
+            "email": "nobody@gmail.com",
+            "password": VALID_PASSWORD
+        })
+
+        assert response.status_code >= 400
+        assert SessionRouter.COOKIE not in response.cookies
+
+    @pytest.mark.asyncio
+    async def test_feed_snapshot_is_built_from_the_primary(self, replica_client):
+        """A reader on the lagging replica doesn't pin a stale shared snapshot on the author"""
+        await register(replica_client)
+        create = await replica_client.post("/api/posts", json={
+            "title": "Fresh Story",
+            "content": "This is a test story content that meets the minimum character requirement.",
+            "story_type": "life_story",
+            "status": "published"
+        })
+        assert create.status_code == 201
+        author_cookies = dict(replica_client.cookies)
+
+        # First feed request after the publish comes from a reader on the replica
+        replica_client.cookies.clear()
+        other = await replica_client.get("/api/posts", params={"sort_by": "latest"})
+        assert other.json()["stories"] == []  # hydrated on the replica, which lacks the row
+
+        replica_client.cookies.update(author_cookies)
+        own = await replica_client.get("/api/posts", params={"sort_by": "latest"})
+        assert [s["id"] for s in own.json()["stories"]] == [create.json()["story"]["id"]]
@@ -0,0 +1,212 @@
+"""
+Public ID Resolution Cache Tests
+LRU behaviour, caching and invalidation on writes
+"""
+import time
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.models import Post, User, PostStatus
+from app.services.resolver_service import LRUCache, IdResolver, id_resolver
+from app.tests.conftest import VALID_PASSWORD
+
+
+def story_payload(status="published"):
+    return {
+        "title": "Resolver Story",
+        "content": "This is a test story content that meets the minimum character requirement.",
+        "story_type": "life_story",
+        "status": status
+    }
+
+
+class TestLRUCache:
+    """Bounded, expiring mapping"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_entries_expire(self, monkeypatch):
+        cache = LRUCache(maxsize=10, ttl=5)
+        cache.set("a", 1)
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_pop_where(self):
+        cache = LRUCache(maxsize=10, ttl=60)
+        for key, value in {"a": 1, "b": 2, "c": 3}.items():
+            cache.set(key, value)
+
+        cache.pop_where(lambda value: value % 2)
+
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, 2, None)
+
+
+class TestIdResolver:
+    """Cached public id -> reference lookups"""
+
+    @pytest.mark.asyncio
+    async def test_post_reference_is_cached(self, db_session, sample_story):
+        resolver = IdResolver()
+        ref = await resolver.post(db_session, sample_story)
+
+        # A direct write is invisible until the entry is forgotten
+        await db_session.execute(
+            update(Post).where(Post.id == ref.id).values(status=PostStatus.DRAFT.value)
+        )
+        await db_session.commit()
+        assert (await resolver.post(db_session, sample_story)).is_published
+
+        resolver.forget_post(sample_story)
+        assert not (await resolver.post(db_session, sample_story)).is_published
+
+    @pytest.mark.asyncio
+    async def test_fresh_lookup_reads_the_row(self, db_session, sample_user, sample_story):
+        resolver = IdResolver()
+        ref = await resolver.post(db_session, sample_story)
+        user = await resolver.user(db_session, sample_user)
+
+        await db_session.execute(
+            update(Post).where(Post.id == ref.id).values(status=PostStatus.DRAFT.value)
+        )
+        await db_session.execute(update(User).where(User.id == user.id).values(is_active=False))
+        await db_session.commit()
+
+        assert not (await resolver.post(db_session, sample_story, fresh=True)).is_published
+        assert not (await resolver.user(db_session, sample_user, fresh=True)).is_active
+        # ...and replaced the cached entries
+        assert not (await resolver.post(db_session, sample_story)).is_published
+
+    @pytest.mark.asyncio
+    async def test_missing_ids_are_not_cached(self, db_session):
+        resolver = IdResolver()
+
+        assert await resolver.post(db_session, "missing") is None
+        assert await resolver.user(db_session, "missing") is None
+        assert len(resolver._posts) == len(resolver._users) == 0
+
+    @pytest.mark.asyncio
+    async def test_forget_user_drops_their_posts(self, db_session, sample_user, sample_story):
+        resolver = IdResolver()
+        user = await resolver.user(db_session, sample_user)
+        await resolver.post(db_session, sample_story)
+
+        resolver.forget_user(sample_user, user.id)
+
+        assert len(resolver._posts) == len(resolver._users) == 0
+
+
+class TestInvalidationOnWrites:
+    """Routes see status changes made through the API"""
+
+    @pytest.mark.asyncio
+    async def test_unpublished_story_stops_taking_comments(self, client, auth_headers):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        response = await client.post(
+            f"/api/posts/{story_id}/comments", json={"content": "First!"}, headers=auth_headers
+        )
+        assert response.status_code == 201
+
+        await client.put(f"/api/posts/{story_id}", json=story_payload("draft"), headers=auth_headers)
+
+        response = await client.post(
+            f"/api/posts/{story_id}/comments", json={"content": "Second"}, headers=auth_headers
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_writes_ignore_a_stale_cached_status(self, client, auth_headers, second_user_headers, db_session):
+        """A story unpublished by another worker (no forget_post here) stops taking writes"""
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+        await client.get(f"/api/posts/{story_id}/my-reaction", headers=auth_headers)  # cached as published
+
+        await db_session.execute(
+            update(Post).where(Post.public_id == story_id).values(status=PostStatus.DRAFT.value)
+        )
+        await db_session.commit()
+
+        comment = await client.post(
+            f"/api/posts/{story_id}/comments", json={"content": "Too late"}, headers=second_user_headers
+        )
+        reaction = await client.post(
+            f"/api/posts/{story_id}/toggle-react", json={"support_type": "brave"}, headers=second_user_headers
+        )
+        progress = await client.post(
+            f"/api/posts/{story_id}/read-progress", json={"scroll_depth": 0.5}, headers=second_user_headers
+        )
+        assert (comment.status_code, reaction.status_code, progress.status_code) == (404, 404, 404)
+
+    @pytest.mark.asyncio
+    async def test_analytics_ignore_a_stale_cached_owner(self, client, auth_headers, second_user_headers, db_session):
+        """Ownership is read from the row, not the cache"""
+        create = await client.post("/api/posts", json=story_payload(), headers=second_user_headers)
+        story_id = create.json()["story"]["id"]
+        await client.get(f"/api/posts/{story_id}/my-reaction", headers=second_user_headers)  # owner cached
+
+        other = await db_session.scalar(select(User.id).where(User.email == "test@gmail.com"))
+        await db_session.execute(
+            update(Post).where(Post.public_id == story_id).values(user_id=other, author_token=None)
+        )
+        await db_session.commit()
+
+        response = await client.get(f"/api/posts/{story_id}/analytics", headers=second_user_headers)
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_suspended_user_cannot_refresh(self, client, auth_headers, db_session):
+        login = await client.post("/api/auth/login", json={"email": "test@gmail.com", "password": VALID_PASSWORD})
+        refresh_token = login.json()["refresh_token"]
+        await client.post("/api/auth/refresh", json={"refresh_token": refresh_token})  # user cached as active
+
+        await db_session.execute(update(User).where(User.email == "test@gmail.com").values(is_active=False))
+        await db_session.commit()
+
+        response = await client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_deleted_story_is_forgotten(self, client, auth_headers):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+        await client.get(f"/api/posts/{story_id}/my-reaction", headers=auth_headers)
+
+        await client.delete(f"/api/posts/{story_id}", headers=auth_headers)
+
+        response = await client.get(f"/api/posts/{story_id}/my-reaction", headers=auth_headers)
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_read_progress_counts_in_sql(self, client, auth_headers, db_session):
+        create = await client.post("/api/posts", json=story_payload(), headers=auth_headers)
+        story_id = create.json()["story"]["id"]
+
+        for _ in range(2):
+            await client.post(
+                f"/api/posts/{story_id}/read-progress",
+                json={"scroll_depth": 0.5, "time_spent": 30},
+                headers=auth_headers
+            )
+
+        result = await db_session.execute(
+            select(Post.view_count, Post.unique_readers, Post.reread_count)
+            .where(Post.public_id == story_id)
+        )
+        assert tuple(result.one()) == (2, 1, 1)
+        assert (await id_resolver.post(db_session, story_id)).is_published
@@ -0,0 +1,115 @@
+"""
+Batch Rank Scoring Tests
+Formulas (NumPy and pure Python paths) and the rescoring pass
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.models import Post, PostStatus
+from app.models.queries import USER_BY_PUBLIC_ID
+from app.services.ranking_service import RankingService
+from app.services.scoring_service import (
+    FORMULAS, NUMPY_AVAILABLE, RankScorer, score_columns, age_hours, get_formula, ENGAGEMENT_HALF_LIFE_HOURS
+)
+
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+COLUMNS = {
+    'save_count': [0, 1, 3, 0],
+    'support_count': [0, 2, 10, 5],
+    'view_count': [0, 50, 1000, 5],
+    'completion_rate': [0.0, 0.5, 1.0, 0.2],
+    'reread_count': [0, 0, 4, 1],
+}
+PUBLISHED = [None, NOW - timedelta(hours=5), NOW - timedelta(hours=100), NOW - timedelta(hours=1)]
+
+
+def scores(formula, use_numpy=NUMPY_AVAILABLE, published=PUBLISHED):
+    columns = dict(COLUMNS, age_hours=age_hours(published, NOW, use_numpy))
+    return score_columns(columns, get_formula(formula), use_numpy)
+
+
+class TestFormulas:
+    """Pluggable score formulas"""
+
+    @pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+    @pytest.mark.parametrize("formula", sorted(FORMULAS))
+    def test_numpy_and_python_agree(self, formula):
+        assert scores(formula, use_numpy=True) == pytest.approx(scores(formula, use_numpy=False))
+
+    def test_gravity_matches_original_formula(self):
+        points = 1 + 2 + 50 / 10.0
+        expected = (points + 1) / pow(5 + 2, 1.8)
+
+        assert scores('gravity')[1] == pytest.approx(expected)
+        assert scores('gravity')[0] == pytest.approx(1 / pow(2, 1.8))  # unpublished age counts as 0
+
+    def test_wilson_prefers_proven_ratios(self):
+        wilson = scores('wilson')
+
+        assert wilson[0] == 0.0  # no views
+        assert wilson[3] > wilson[1]  # 5 of 5 beats 3 of 50
+        assert all(0.0 <= s <= 1.0 for s in wilson)
+
+    def test_decayed_engagement_halves_per_half_life(self):
+        fresh = scores('decayed_engagement', published=[NOW] * 4)
+        older = scores('decayed_engagement', published=[NOW - timedelta(hours=ENGAGEMENT_HALF_LIFE_HOURS)] * 4)
+
+        assert fresh[1] == pytest.approx((2 + 1 + 50 / 10.0 + 1) * (0.5 + 0.5))
+        assert older == pytest.approx([s / 2 for s in fresh])
+
+    def test_unknown_formula_rejected(self):
+        with pytest.raises(ValueError):
+            RankScorer('karma')
+
+
+class TestRankScorer:
+    """Rescoring pass over the posts table"""
+
+    async def add_story(self, db, author_id, status=PostStatus.PUBLISHED.value, hours_old=1, **counters):
+        story = Post(
+            title="Scored story", content="Content long enough for scoring tests.",
+            status=status, user_id=author_id,
+            published_at=NOW - timedelta(hours=hours_old), updated_at=NOW - timedelta(days=3),
+            **counters
+        )
+        db.add(story)
+        await db.commit()
+        return story.id
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("batch_size", [1, 5000])
+    async def test_scores_written_back_in_batches(self, db_session, sample_user, batch_size):
+        author = await db_session.scalar(USER_BY_PUBLIC_ID, {'public_id': sample_user})
+        busy = await self.add_story(db_session, author.id, support_count=10, view_count=200)
+        quiet = await self.add_story(db_session, author.id)
+        draft = await self.add_story(db_session, author.id, status=PostStatus.DRAFT.value, support_count=99)
+
+        scored = await RankScorer('gravity', batch_size=batch_size).run(db_session, now=NOW)
+
+        rows = {
+            row.id: row for row in
+            (await db_session.execute(select(Post.id, Post.rank_score, Post.last_ranked_at, Post.updated_at))).all()
+        }
+        assert scored == 2
+        assert rows[busy].rank_score == pytest.approx((10 + 20 + 1) / pow(3, 1.8))
+        assert rows[busy].rank_score > rows[quiet].rank_score
+        assert rows[busy].last_ranked_at == NOW
+        assert rows[busy].updated_at == NOW - timedelta(days=3)  # rescoring is not an edit
+        assert rows[draft].last_ranked_at is None
+
+    @pytest.mark.asyncio
+    async def test_recalculate_reorders_smart_feed(self, client, db_session, sample_user):
+        author = await db_session.scalar(USER_BY_PUBLIC_ID, {'public_id': sample_user})
+        older = await self.add_story(db_session, author.id, hours_old=30, support_count=500)
+        await self.add_story(db_session, author.id, hours_old=1)
+        await client.get("/api/posts", params={"sort_by": "smart"})  # snapshot before rescoring
+
+        await RankingService.recalculate_rank_scores(db_session)
+
+        response = await client.get("/api/posts", params={"sort_by": "smart"})
+        top = await db_session.scalar(select(Post.public_id).where(Post.id == older))
+        assert response.json()["stories"][0]["id"] == top
@@ -0,0 +1,100 @@
+"""
+Serialization Tests
+The fast row serializers must produce exactly what to_dict() produces
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models.models import User, Post, Comment, Support
+from app.utils import serialization
+from app.utils.serialization import (
+    dumps, post_row, comment_row, support_row, FastJSONResponse
+)
+
+
+def make_user():
+    return User(public_id="user-1", username="writer", display_name="The Writer")
+
+
+def make_post(is_anonymous=False, author=None):
+    return Post(
+        public_id="post-1",
+        title="A Story",
+        content="Body text",
+        excerpt="Body text",
+        status="published",
+        story_type="regret",
+        is_anonymous=is_anonymous,
+        tags=["one"],
+        reading_time=1,
+        view_count=5,
+        is_featured=False,
+        created_at=datetime(2024, 1, 2, 3, 4, 5, 123456),
+        updated_at=datetime(2024, 1, 2, 3, 4, 5),
+        published_at=None,
+        support_count=2,
+        comment_count=None,
+        author=author,
+    )
+
+
+def roundtrip(row):
+    return json.loads(dumps(row))
+
+
+class TestRowParity:
+    """Row serializers match the model to_dict() output"""
+
+    @pytest.mark.parametrize("is_anonymous", [False, True])
+    def test_post_with_author(self, is_anonymous):
+        post = make_post(is_anonymous=is_anonymous, author=make_user())
+        assert roundtrip(post_row(post)) == post.to_dict()
+
+    def test_post_without_author(self):
+        post = make_post(is_anonymous=True)
+        assert roundtrip(post_row(post)) == post.to_dict()
+
+    def test_post_list_projection(self):
+        post = make_post(author=make_user())
+        row = roundtrip(post_row(post, include_content=False))
+        assert row == post.to_dict(include_content=False)
+        assert "content" not in row
+
+    @pytest.mark.parametrize("is_anonymous", [False, True])
+    def test_comment(self, is_anonymous):
+        comment = Comment(
+            public_id="c-1",
+            content="Nice",
+            is_anonymous=is_anonymous,
+            created_at=datetime(2024, 1, 2, 3, 4, 5, 1),
+            author=make_user(),
+        )
+        assert roundtrip(comment_row(comment)) == comment.to_dict()
+
+    def test_support(self):
+        support = Support(
+            id=7,
+            support_type="felt_this",
+            message=None,
+            created_at=datetime(2024, 1, 2),
+            giver=make_user(),
+        )
+        assert roundtrip(support_row(support)) == support.to_dict()
+
+
+class TestDumps:
+    """Encoder and response class"""
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        row = post_row(make_post(author=make_user()))
+        expected = json.loads(dumps(row))
+
+        monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+        assert json.loads(dumps(row)) == expected
+
+    def test_response_renders_bytes(self):
+        response = FastJSONResponse({"a": [1, 2]})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"a": [1, 2]}
@@ -0,0 +1,112 @@
+"""
+Site Statistics Tests
+FILTER aggregates and the daily_stats rollup behind the admin dashboard
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update, delete
+
+from app.models.models import User, Post, Support, DailyStat, PostStatus
+from app.services.stats_service import StatsService, StatsRefresher
+
+
+async def add_story(db_session, user_id, created_at, status=PostStatus.PUBLISHED.value):
+    story = Post(
+        title="Stats Story",
+        content="Story content for the statistics tests.",
+        status=status,
+        user_id=user_id,
+        created_at=created_at
+    )
+    db_session.add(story)
+    await db_session.commit()
+    return story.id
+
+
+async def user_id(db_session, public_id):
+    return await db_session.scalar(select(User.id).where(User.public_id == public_id))
+
+
+class TestRollup:
+    """StatsService.refresh writes one row per day"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_counts_per_day(self, db_session, sample_user):
+        uid = await user_id(db_session, sample_user)
+        now = datetime.utcnow()
+        for days_ago in (0, 3, 3, 40):
+            await add_story(db_session, uid, now - timedelta(days=days_ago))
+        post_id = await add_story(db_session, uid, now - timedelta(days=3))
+        db_session.add(Support(support_type="brave", giver_id=uid, receiver_id=uid, post_id=post_id,
+                               created_at=now - timedelta(days=3)))
+        await db_session.commit()
+
+        assert await StatsService.refresh(db_session) == 3
+
+        rows = (await db_session.execute(select(DailyStat).order_by(DailyStat.day))).scalars().all()
+        assert [(r.new_stories, r.reactions) for r in rows] == [(1, 0), (3, 1), (1, 0)]
+        assert rows[-1].new_users == 1  # sample_user, created today
+
+    @pytest.mark.asyncio
+    async def test_refresh_drops_emptied_days(self, db_session, sample_user):
+        uid = await user_id(db_session, sample_user)
+        post_id = await add_story(db_session, uid, datetime.utcnow() - timedelta(days=1))
+        await StatsService.refresh(db_session)
+
+        await db_session.execute(delete(Post).where(Post.id == post_id))
+        await db_session.commit()
+        await StatsService.refresh(db_session)
+
+        result = await db_session.execute(select(DailyStat.new_stories))
+        assert sum(result.scalars().all()) == 0
+
+    @pytest.mark.asyncio
+    async def test_refresher_uses_its_own_session(self, db_session, sample_user):
+        from app.tests.conftest import TestSessionLocal
+
+        assert await StatsRefresher(session_factory=TestSessionLocal).refresh() == 1
+
+
+class TestDashboard:
+    """Dashboard = live totals + rollup range-sum"""
+
+    @pytest.mark.asyncio
+    async def test_window_sums_rollup_and_today(self, db_session, sample_user):
+        uid = await user_id(db_session, sample_user)
+        now = datetime.utcnow()
+        await add_story(db_session, uid, now)
+        await add_story(db_session, uid, now - timedelta(days=5), status=PostStatus.DRAFT.value)
+        await add_story(db_session, uid, now - timedelta(days=100))
+        await StatsService.refresh(db_session)
+
+        week = await StatsService.dashboard(db_session, 7)
+        year = await StatsService.dashboard(db_session, 365)
+
+        assert week["stories"] == {"total": 3, "new": 2, "published": 2, "flagged": 0}
+        assert year["stories"]["new"] == 3
+        assert week["users"] == {"total": 1, "new": 1, "active": 1}
+        assert week["reactions"] == {"total": 0, "recent": 0}
+
+    @pytest.mark.asyncio
+    async def test_today_is_counted_before_refresh(self, db_session, sample_user):
+        uid = await user_id(db_session, sample_user)
+        await add_story(db_session, uid, datetime.utcnow())
+
+        dashboard = await StatsService.dashboard(db_session, 1)
+
+        assert dashboard["stories"]["new"] == 1
+        assert dashboard["period_days"] == 1
+
+    @pytest.mark.asyncio
+    async def test_admin_endpoints(self, client, auth_headers, db_session):
+        await db_session.execute(update(User).where(User.email == "test@gmail.com").values(role="admin"))
+        await db_session.commit()
+
+        refreshed = await client.post("/api/admin/maintenance/refresh-stats?full=true", headers=auth_headers)
+        dashboard = await client.get("/api/admin/dashboard?days=30", headers=auth_headers)
+
+        assert refreshed.status_code == 200
+        assert refreshed.json()["days"] == 1
+        assert dashboard.status_code == 200
+        assert dashboard.json()["users"]["total"] == 1
@@ -1,6 +1,9 @@
 """
 FastAPI Story/Post Tests
 """
+import base64
+import json
+
 import pytest
 
 
@@ -187,6 +190,127 @@ class TestGetStories:
         assert "results" in data
 
 
+class TestListingPagination:
+    """Test keyset (cursor) pagination on the story feed"""
+
+    async def _create_stories(self, client, auth_headers, count):
+        for i in range(count):
+            await client.post(
+                "/api/posts",
+                headers=auth_headers,
+                json={
+                    "title": f"Paged Story {i}",
+                    "content": valid_content(),
+                    "story_type": "life_story",
+                    "status": "published"
+                }
+            )
+
+    @pytest.mark.asyncio
+    async def test_cursor_walks_feed_without_duplicates(self, client, auth_headers):
+        """Following next_cursor visits every story exactly once"""
+        await self._create_stories(client, auth_headers, 5)
+
+        seen = []
+        cursor = None
+        for _ in range(5):
+            params = {"sort_by": "latest", "per_page": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/posts", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(s["id"] for s in data["stories"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    @pytest.mark.asyncio
+    async def test_offset_page_reports_next(self, client, auth_headers):
+        """Offset pages still report totals and hand out a cursor"""
+        await self._create_stories(client, auth_headers, 3)
+
+        response = await client.get("/api/posts", params={"sort_by": "latest", "per_page": 2})
+
+        data = response.json()
+        assert data["total"] == 3
+        assert data["has_next"] is True
+        assert data["next_cursor"]
+
+    @pytest.mark.asyncio
+    async def test_feed_items_carry_excerpt_not_content(self, client, auth_headers):
+        """List items ship the stored excerpt; the body stays on the detail route"""
+        create_response = await client.post(
+            "/api/posts",
+            headers=auth_headers,
+            json={
+                "title": "Excerpt Story",
+                "content": valid_content() * 10,
+                "story_type": "life_story",
+                "status": "published"
+            }
+        )
+        story_id = create_response.json()["story"]["id"]
+
+        response = await client.get("/api/posts")
+        item = response.json()["stories"][0]
+        assert "content" not in item
+        assert item["excerpt"].startswith("This is a test story")
+        assert len(item["excerpt"]) <= 201
+
+        response = await client.get(f"/api/posts/{story_id}")
+        assert response.json()["story"]["content"] == valid_content() * 10
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_rejected(self, client):
+        """Garbage cursors return 400"""
+        response = await client.get("/api/posts", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("payload", [
+        ["latest", 5],
+        ["latest", "ab"],
+        ["latest", [None]],
+        ["latest", ["2024-01-01T00:00:00", "x"]],
+        ["latest", [5, 1]],
+        ["latest", ["2024-01-01T00:00:00", True]],
+        ["most_viewed", [1.5, 1]],
+        ["smart", ["high", "2024-01-01T00:00:00", 1]],
+    ])
+    async def test_malformed_cursor_values_rejected(self, client, payload):
+        """Well-formed cursors whose values don't fit the sort keys return 400"""
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        response = await client.get("/api/posts", params={"sort_by": payload[0], "cursor": cursor})
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_cursor_from_other_sort_rejected(self, client, auth_headers):
+        """A cursor is only valid for the sort that produced it"""
+        await self._create_stories(client, auth_headers, 3)
+
+        response = await client.get("/api/posts", params={"sort_by": "latest", "per_page": 2})
+        cursor = response.json()["next_cursor"]
+
+        response = await client.get("/api/posts", params={"sort_by": "most_viewed", "cursor": cursor})
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sort_by", ["bookmarked", "featured", "updated"])
+    async def test_internal_sorts_rejected(self, client, sort_by):
+        """Only the public feed sorts are accepted; 'bookmarked' needs the bookmarks join"""
+        response = await client.get("/api/posts", params={"sort_by": sort_by})
+
+        assert response.status_code == 422
+
+
 class TestUpdateStory:
     """Test story updates"""
     
@@ -312,3 +436,21 @@ class TestBookmarks:
         assert response.status_code == 200
         data = response.json()
         assert "items" in data
+
+    @pytest.mark.asyncio
+    async def test_bookmarks_listed_newest_first(self, client, auth_headers):
+        """Bookmarks list in bookmark order, one row per story"""
+        ids = []
+        for title in ("First Bookmark", "Second Bookmark"):
+            response = await client.post(
+                "/api/posts",
+                headers=auth_headers,
+                json={"title": title, "content": valid_content(), "story_type": "life_story", "status": "published"}
+            )
+            ids.append(response.json()["story"]["id"])
+        for story_id in reversed(ids):
+            await client.post(f"/api/posts/{story_id}/bookmark", headers=auth_headers)
+
+        response = await client.get("/api/posts/bookmarks", headers=auth_headers)
+
+        assert [s["id"] for s in response.json()["items"]] == ids
@@ -3,7 +3,7 @@ Utility Function Tests
 Tests for utility functions and helpers
 """
 import pytest
-from app.services.story_service import calculate_reading_time
+from app.services.story_service import calculate_reading_time, make_excerpt, EXCERPT_LENGTH
 
 
 class TestReadingTimeCalculation:
@@ -41,6 +41,22 @@ class TestReadingTimeCalculation:
         assert isinstance(result, int)
 
 
+class TestExcerpt:
+    """Tests for the precomputed feed excerpt"""
+    
+    def test_short_content_unchanged(self):
+        assert make_excerpt("A short story.") == "A short story."
+    
+    def test_whitespace_collapsed(self):
+        assert make_excerpt("Line one\n\n  line   two") == "Line one line two"
+    
+    def test_long_content_cut_on_word_boundary(self):
+        content = "word " * 200
+        result = make_excerpt(content)
+        assert len(result) <= EXCERPT_LENGTH + 1
+        assert result.endswith("word…")
+
+
 class TestEdgeCases:
     """Test edge cases for various utilities"""
     
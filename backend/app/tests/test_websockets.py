@@ -1,8 +1,12 @@
 """
 WebSocket Tests - Test real-time notification infrastructure
 """
+import asyncio
 import pytest
-from app.api.v1.websockets import ConnectionManager, manager, notify_reaction, notify_comment
+from app.api.v1.websockets import (
+    ConnectionManager, NotificationDispatcher, manager, notify_reaction, notify_comment,
+    reader_count_stream
+)
 
 
 class TestConnectionManager:
@@ -173,3 +177,351 @@ class TestMultipleStoryReaders:
         
         # Should still be just 1
         assert cm.get_reader_count(1) == 1
+
+
+class FakeWebSocket:
+    """Minimal stand-in for starlette's WebSocket"""
+    
+    def __init__(self, fail_send: bool = False):
+        self.accepted = False
+        self.closed_code = None
+        self.sent = []
+        self.fail_send = fail_send
+    
+    async def accept(self):
+        self.accepted = True
+    
+    async def send_json(self, data):
+        if self.fail_send:
+            raise RuntimeError("socket gone")
+        self.sent.append(data)
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed_code = code
+
+
+class TestHeartbeatAndLimits:
+    """Test server heartbeats, idle reaping and connection caps"""
+    
+    @pytest.mark.asyncio
+    async def test_multiple_connections_per_user(self):
+        """Test a user can hold several sockets (tabs) at once"""
+        cm = ConnectionManager()
+        await cm.connect(FakeWebSocket(), user_id=1)
+        await cm.connect(FakeWebSocket(), user_id=1)
+        
+        assert cm.connection_count() == 2
+        assert len(cm.active_connections[1]) == 2
+    
+    @pytest.mark.asyncio
+    async def test_per_user_limit_rejects(self):
+        """Test connections over the per-user cap are closed"""
+        cm = ConnectionManager(max_connections_per_user=1)
+        assert await cm.connect(FakeWebSocket(), user_id=1) is not None
+        
+        rejected = FakeWebSocket()
+        assert await cm.connect(rejected, user_id=1) is None
+        assert rejected.accepted is False
+        assert rejected.closed_code == 1008
+    
+    @pytest.mark.asyncio
+    async def test_worker_limit_rejects(self):
+        """Test connections over the per-worker cap are closed"""
+        cm = ConnectionManager(max_connections=1)
+        await cm.connect(FakeWebSocket(), user_id=1)
+        
+        rejected = FakeWebSocket()
+        assert await cm.connect(rejected, user_id=2) is None
+        assert rejected.closed_code == 1013
+    
+    @pytest.mark.asyncio
+    async def test_notification_delivered_through_queue(self):
+        """Test notifications reach every socket of the user"""
+        cm = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await cm.connect(ws_a, user_id=1)
+        await cm.connect(ws_b, user_id=1)
+        
+        await cm.send_notification(1, {"type": "reaction"})
+        await asyncio.sleep(0)
+        
+        assert ws_a.sent == [{"type": "reaction"}]
+        assert ws_b.sent == [{"type": "reaction"}]
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_pings_live_connections(self):
+        """Test heartbeat sends a ping to fresh connections"""
+        cm = ConnectionManager(idle_timeout=60)
+        ws = FakeWebSocket()
+        await cm.connect(ws, user_id=1)
+        
+        reaped = await cm.heartbeat()
+        await asyncio.sleep(0)
+        
+        assert reaped == 0
+        assert ws.sent == [{"type": "ping"}]
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_reaps_idle_connections(self):
+        """Test half-open sockets are closed and removed from readers"""
+        cm = ConnectionManager(idle_timeout=60)
+        ws = FakeWebSocket()
+        conn = await cm.connect(ws, user_id=1)
+        cm.add_reader(story_id="story-1", user_id=1)
+        conn.last_seen -= 120
+        
+        reaped = await cm.heartbeat()
+        
+        assert reaped == 1
+        assert ws.closed_code == 1001
+        assert cm.connection_count() == 0
+        assert cm.get_reader_count("story-1") == 0
+    
+    @pytest.mark.asyncio
+    async def test_touch_keeps_connection_alive(self):
+        """Test inbound frames reset the idle clock"""
+        cm = ConnectionManager(idle_timeout=60)
+        conn = await cm.connect(FakeWebSocket(), user_id=1)
+        conn.last_seen -= 120
+        conn.touch()
+        
+        assert await cm.heartbeat() == 0
+        assert cm.connection_count() == 1
+    
+    @pytest.mark.asyncio
+    async def test_failed_send_disconnects(self):
+        """Test a socket that errors on send is dropped"""
+        cm = ConnectionManager()
+        await cm.connect(FakeWebSocket(fail_send=True), user_id=1)
+        
+        await cm.send_notification(1, {"type": "comment"})
+        await asyncio.sleep(0)
+        
+        assert cm.connection_count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_slow_consumer(self):
+        """Test a socket whose queue overflows is closed"""
+        cm = ConnectionManager(queue_size=1)
+        ws = FakeWebSocket()
+        await cm.connect(ws, user_id=1)
+        
+        # Sender task hasn't run yet, so the second frame overflows
+        await cm.send_notification(1, {"n": 1})
+        await cm.send_notification(1, {"n": 2})
+        await asyncio.sleep(0)
+        
+        assert cm.connection_count() == 0
+        assert ws.closed_code == 1008
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_one_socket_keeps_reader(self):
+        """Test closing one tab keeps the user counted as a reader"""
+        cm = ConnectionManager()
+        conn_a = await cm.connect(FakeWebSocket(), user_id=1)
+        await cm.connect(FakeWebSocket(), user_id=1)
+        cm.add_reader(story_id="story-1", user_id=1)
+        
+        cm.disconnect(1, conn_a)
+        
+        assert cm.get_reader_count("story-1") == 1
+    
+    @pytest.mark.asyncio
+    async def test_stop_closes_all(self):
+        """Test shutdown closes every socket"""
+        cm = ConnectionManager()
+        ws = FakeWebSocket()
+        await cm.connect(ws, user_id=1)
+        cm.start()
+        
+        await cm.stop()
+        
+        assert ws.closed_code == 1001
+        assert cm.connection_count() == 0
+
+
+class TestNotificationDispatcher:
+    """Test batched delivery and the offline inbox"""
+    
+    @staticmethod
+    async def _make_user(db_session):
+        from app.models.models import User
+        user = User(username="inboxuser", email="inbox@gmail.com", password_hash="x")
+        db_session.add(user)
+        await db_session.commit()
+        return user.id
+    
+    @staticmethod
+    async def _inbox(db_session, user_id):
+        from sqlalchemy import select
+        from app.models.models import Notification
+        result = await db_session.execute(
+            select(Notification).where(Notification.user_id == user_id).order_by(Notification.id)
+        )
+        return result.scalars().all()
+    
+    @pytest.mark.asyncio
+    async def test_offline_notification_parked_in_inbox(self, db_session):
+        """Test notifications for offline users are stored, not dropped"""
+        user_id = await self._make_user(db_session)
+        dispatcher = NotificationDispatcher(ConnectionManager())
+        
+        await dispatcher.publish(user_id, {"type": "reaction"}, db=db_session)
+        
+        rows = await self._inbox(db_session, user_id)
+        assert [r.payload for r in rows] == [{"type": "reaction"}]
+    
+    @pytest.mark.asyncio
+    async def test_online_burst_coalesced_into_one_frame(self):
+        """Test a burst of events becomes a single frame"""
+        cm = ConnectionManager()
+        ws = FakeWebSocket()
+        await cm.connect(ws, user_id=1)
+        dispatcher = NotificationDispatcher(cm, window_ms=10)
+        
+        for i in range(3):
+            await dispatcher.publish(1, {"type": "comment", "n": i})
+        await asyncio.sleep(0.05)
+        
+        assert len(ws.sent) == 1
+        assert ws.sent[0]["type"] == "notifications"
+        assert [item["n"] for item in ws.sent[0]["items"]] == [0, 1, 2]
+    
+    @pytest.mark.asyncio
+    async def test_max_batch_flushes_early(self):
+        """Test a full batch is sent without waiting for the window"""
+        cm = ConnectionManager()
+        ws = FakeWebSocket()
+        await cm.connect(ws, user_id=1)
+        dispatcher = NotificationDispatcher(cm, window_ms=60000, max_batch=2)
+        
+        await dispatcher.publish(1, {"n": 0})
+        await dispatcher.publish(1, {"n": 1})
+        await asyncio.sleep(0)
+        
+        assert len(ws.sent) == 1
+        assert len(ws.sent[0]["items"]) == 2
+    
+    @pytest.mark.asyncio
+    async def test_replay_and_ack_in_chunks(self, db_session):
+        """Test the inbox is replayed chunk by chunk with a cursor"""
+        user_id = await self._make_user(db_session)
+        cm = ConnectionManager()
+        dispatcher = NotificationDispatcher(cm, replay_chunk=2)
+        for i in range(3):
+            await dispatcher.publish(user_id, {"n": i}, db=db_session)
+        
+        ws = FakeWebSocket()
+        conn = await cm.connect(ws, user_id=user_id)
+        assert await dispatcher.replay(db_session, conn) == 2
+        await asyncio.sleep(0)
+        
+        first = ws.sent[0]
+        assert [item["n"] for item in first["items"]] == [0, 1]
+        assert first["has_more"] is True
+        
+        assert await dispatcher.ack(db_session, conn, first["cursor"]) == 1
+        await asyncio.sleep(0)
+        
+        second = ws.sent[1]
+        assert [item["n"] for item in second["items"]] == [2]
+        assert second["has_more"] is False
+        assert len(await self._inbox(db_session, user_id)) == 1
+        
+        await dispatcher.ack(db_session, conn, second["cursor"])
+        assert await self._inbox(db_session, user_id) == []
+    
+    @pytest.mark.asyncio
+    async def test_failed_replay_unregisters_the_socket(self, db_session, monkeypatch):
+        """A replay error right after connect doesn't leave the socket counted against the user"""
+        import app.main as main_module
+        from app.core.security import create_access_token
+        from app.models.models import User
+        from app.tests.conftest import TestSessionLocal
+        user_id = await self._make_user(db_session)
+        public_id = (await db_session.get(User, user_id)).public_id
+
+        async def broken_replay(db, connection):
+            raise RuntimeError("database unavailable")
+        monkeypatch.setattr(main_module, "async_session_maker", TestSessionLocal)
+        monkeypatch.setattr(main_module.dispatcher, "replay", broken_replay)
+
+        socket = FakeWebSocket()
+        await main_module.websocket_endpoint(socket, token=create_access_token({"sub": public_id}), cursor=None)
+
+        assert socket.accepted
+        assert user_id not in manager.active_connections
+    
+    @pytest.mark.asyncio
+    async def test_notify_without_author_is_ignored(self, db_session):
+        """Test anonymous stories (no author id) never hit the inbox"""
+        await notify_reaction(
+            story_author_id=None,
+            story_id="test-id",
+            story_title="Test",
+            reactor_username="testuser",
+            reaction_type="moved",
+            db=db_session
+        )
+
+
+class TestReaderCountStream:
+    """Test the Server-Sent Events reader count feed"""
+    
+    @staticmethod
+    def _disconnect_after(ticks: int):
+        calls = {"n": 0}
+        
+        async def is_disconnected():
+            calls["n"] += 1
+            return calls["n"] > ticks
+        return is_disconnected
+    
+    @pytest.mark.asyncio
+    async def test_stream_registers_and_unregisters_reader(self):
+        """Test the stream counts as a reader only while open"""
+        events = []
+        stream = reader_count_stream(
+            "sse-story", self._disconnect_after(1), interval=0.001, keepalive=60
+        )
+        async for event in stream:
+            events.append(event)
+            if len(events) == 2:
+                assert manager.get_reader_count("sse-story") == 1
+        
+        assert events[0].startswith("retry:")
+        assert events[1].startswith("event: reader_count\n")
+        assert '"count": 1' in events[1]
+        assert manager.get_reader_count("sse-story") == 0
+    
+    @pytest.mark.asyncio
+    async def test_stream_coalesces_unchanged_counts(self):
+        """Test unchanged counts are not re-sent on every tick"""
+        events = [
+            e async for e in reader_count_stream(
+                "sse-quiet", self._disconnect_after(5), interval=0.001, keepalive=60
+            )
+        ]
+        
+        assert len([e for e in events if e.startswith("event:")]) == 1
+    
+    @pytest.mark.asyncio
+    async def test_stream_sees_websocket_readers(self):
+        """Test SSE and WebSocket readers share one registry"""
+        manager.add_reader("sse-shared", 4242)
+        try:
+            events = [
+                e async for e in reader_count_stream(
+                    "sse-shared", self._disconnect_after(1), interval=0.001, keepalive=60
+                )
+            ]
+            assert '"count": 2' in events[1]
+        finally:
+            manager.remove_reader("sse-shared", 4242)
+    
+    @pytest.mark.asyncio
+    async def test_live_endpoint_unknown_story(self, client):
+        """Test the SSE endpoint 404s for unknown stories"""
+        response = await client.get("/api/posts/nonexistent-id/live")
+        
+        assert response.status_code == 404
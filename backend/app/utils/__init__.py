@@ -10,6 +10,7 @@ from app.utils.exceptions import (
 from app.utils.cache import cache, async_cached, AsyncCache
 from app.utils.password_validator import validate_password, get_password_requirements
 from app.utils.reading_time import calculate_reading_time, calculate_reading_time_detailed
+from app.utils.serialization import FastJSONResponse, dumps
 
 __all__ = [
     # Exceptions
@@ -21,5 +22,7 @@ __all__ = [
     "validate_password", "get_password_requirements",
     # Reading time
     "calculate_reading_time", "calculate_reading_time_detailed",
+    # Serialization
+    "FastJSONResponse", "dumps",
 ]
 
@@ -10,17 +10,22 @@ import functools
 from typing import Any, Optional, Callable
 import asyncio
 
-# Try to import aioredis, fallback to None if not available
-try:
-    import redis.asyncio as aioredis
-    REDIS_AVAILABLE = True
-except ImportError:
+
+def _load_redis():
+    """
+    Import the Redis client on first use; importing redis costs ~60ms of
+    cold start and most deployments run without REDIS_URL.
+    Returns None when no client library is installed.
+    """
     try:
-        import aioredis
-        REDIS_AVAILABLE = True
+        import redis.asyncio as aioredis
+        return aioredis
     except ImportError:
-        aioredis = None
-        REDIS_AVAILABLE = False
+        try:
+            import aioredis
+            return aioredis
+        except ImportError:
+            return None
 
 
 class AsyncCache:
@@ -43,12 +48,9 @@ class AsyncCache:
         if self._initialized:
             return
         
-        if not REDIS_AVAILABLE:
-            self._initialized = True
-            return
-        
         redis_url = os.environ.get('REDIS_URL')
-        if redis_url:
+        aioredis = _load_redis() if redis_url else None
+        if aioredis:
             try:
                 self._redis_client = await aioredis.from_url(
                     redis_url,
@@ -0,0 +1,131 @@
+"""
+Fast JSON Serialization
+Row serializers for list responses plus a response class that renders
+them straight to bytes, skipping FastAPI's jsonable_encoder pass.
+
+Uses orjson when installed (datetimes are formatted in C), falls back to
+the stdlib json module otherwise. The row serializers are the single
+definition of each shape: the models' to_dict() return plain() of them.
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional
+
+from fastapi.responses import Response
+
+# Try to import orjson, fallback to stdlib json if not available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+# Aware UTC datetimes render with a 'Z' suffix (the Post format),
+# naive ones render exactly like datetime.isoformat()
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z if ORJSON_AVAILABLE else 0
+
+_ANONYMOUS_AUTHOR = {'username': 'Anonymous', 'display_name': 'Anonymous User'}
+
+
+def _default(obj: Any) -> str:
+    if isinstance(obj, datetime):
+        return obj.isoformat().replace('+00:00', 'Z')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with dumps(); return it directly from routes"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def plain(row: dict) -> dict:
+    """The row with datetimes as ISO strings (what dumps() would render), for JSON-type callers"""
+    return {key: _default(value) if isinstance(value, datetime) else value for key, value in row.items()}
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    return value.replace(tzinfo=timezone.utc) if value else None
+
+
+def user_row(user) -> dict:
+    """Public author block embedded in story and comment rows"""
+    return {
+        'id': user.public_id,
+        'username': user.username,
+        'display_name': user.display_name,
+    }
+
+
+def post_row(post, include_author: bool = True, include_content: bool = True) -> dict:
+    """A story: the public fields, optional body, and author block (masked when anonymous)"""
+    data = {
+        'id': post.public_id,
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'status': post.status,
+        'story_type': post.story_type,
+        'is_anonymous': post.is_anonymous,
+        'tags': post.tags or [],
+        'reading_time': post.reading_time,
+        'view_count': post.view_count,
+        'is_featured': post.is_featured,
+        'created_at': _utc(post.created_at),
+        'updated_at': _utc(post.updated_at),
+        'published_at': _utc(post.published_at),
+        'support_count': post.support_count or 0,
+        'comment_count': post.comment_count or 0,
+    }
+    if include_content:
+        data['content'] = post.content
+
+    author = post.author if include_author else None
+    if author:
+        data['author'] = user_row(author)
+        if post.is_anonymous:
+            data['author'].update(_ANONYMOUS_AUTHOR)
+    elif post.is_anonymous:
+        data['author'] = dict(_ANONYMOUS_AUTHOR)
+    return data
+
+
+def comment_row(comment) -> dict:
+    """A comment with its direct-reply count; anonymous comments get the masked author block"""
+    return {
+        'id': comment.public_id,
+        'content': comment.content,
+        'is_anonymous': comment.is_anonymous,
+        'created_at': comment.created_at,
+        'reply_count': comment.reply_count or 0,
+        'author': user_row(comment.author) if not comment.is_anonymous and comment.author else dict(_ANONYMOUS_AUTHOR),
+    }
+
+
+def support_row(support) -> dict:
+    """A reaction and who gave it"""
+    return {
+        'id': support.id,
+        'support_type': support.support_type,
+        'message': support.message,
+        'created_at': support.created_at,
+        'giver': user_row(support.giver) if support.giver else None,
+    }
+
+
+def post_rows(posts: Iterable, include_content: bool = False) -> List[dict]:
+    return [post_row(p, include_content=include_content) for p in posts]
+
+
+def comment_rows(comments: Iterable) -> List[dict]:
+    return [comment_row(c) for c in comments]
@@ -0,0 +1,74 @@
+"""
+Benchmark: cold start, time to first response
+
+Starts a fresh uvicorn worker (new database each run, so the warmup
+creates the schema) and measures from process spawn to:
+- the first 200 from /api/health (answered while warmup is still running)
+- the first 200 from /api/posts (warmup finished: schema ready, DB reachable)
+
+Run:
+    cd backend
+    python benchmarks/cold_start.py --runs 5
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def first_ok(client: httpx.Client, url: str, started: float, timeout: float = 60.0) -> float:
+    """Seconds from `started` until `url` first answers 200"""
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} did not answer within {timeout}s")
+
+
+def cold_start(port: int) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", FLASK_ENV="production")
+        base_url = f"http://127.0.0.1:{port}"
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env, cwd=BACKEND, stdout=subprocess.DEVNULL,
+        )
+        try:
+            with httpx.Client(timeout=30) as client:
+                health = first_ok(client, f"{base_url}/api/health", started)
+                ready = first_ok(client, f"{base_url}/api/posts", started)
+        finally:
+            server.terminate()
+            server.wait()
+    return health, ready
+
+
+def main(runs: int, port: int):
+    results = [cold_start(port) for _ in range(runs)]
+    health = [h for h, _ in results]
+    ready = [r for _, r in results]
+    print(f"runs: {runs}")
+    print(f"first /api/health: median {statistics.median(health) * 1000:7.1f} ms  max {max(health) * 1000:7.1f} ms")
+    print(f"first /api/posts : median {statistics.median(ready) * 1000:7.1f} ms  max {max(ready) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    main(args.runs, args.port)
@@ -0,0 +1,75 @@
+"""
+Profile: import time of app.main (python -X importtime)
+
+Imports the app in a fresh interpreter with -X importtime and reports the
+total plus the slowest modules by cumulative and by self time. With
+--budget-ms the exit status is 1 when the total is over budget, so it can
+guard cold start in CI.
+
+Run:
+    cd backend
+    python benchmarks/import_profile.py --top 25 --budget-ms 1500
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile(target: str) -> List[ImportRecord]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def main(target: str, top: int, runs: int, budget_ms: float) -> int:
+    profiles = [profile(target) for _ in range(runs)]
+    totals = [sum(r.cumulative_us for r in p if r.depth == 0) / 1000 for p in profiles]
+    median = statistics.median(totals)
+    # Break down the run closest to the median
+    records = min(zip(totals, profiles), key=lambda run: abs(run[0] - median))[1]
+
+    print(f"import {target}: median {median:.1f} ms over {runs} run(s)")
+    print(f"\nslowest by cumulative time (top {top}):")
+    for r in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f"  {r.cumulative_us / 1000:8.1f} ms  {'  ' * r.depth}{r.module}")
+    print(f"\nslowest by self time (top {top}):")
+    for r in sorted(records, key=lambda r: r.self_us, reverse=True)[:top]:
+        print(f"  {r.self_us / 1000:8.1f} ms  {r.module}")
+
+    if budget_ms and median > budget_ms:
+        print(f"\nOVER BUDGET: {median:.1f} ms > {budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=0)
+    args = parser.parse_args()
+    sys.exit(main(args.target, args.top, args.runs, args.budget_ms))
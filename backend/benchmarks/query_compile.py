@@ -0,0 +1,119 @@
+"""
+Benchmark: per-request statement overhead for the ten hottest queries
+
+Before SQLAlchemy can reuse compiled SQL it needs the statement object and
+its cache key. Compares building both per request (the old inline select()
+calls) with the prebuilt statements in app.models.queries and the
+per-shape feed statements in StoryListing, whose cache keys are memoized.
+A full uncached compile is shown for scale.
+
+Run:
+    cd backend
+    python benchmarks/query_compile.py --repeat 2000
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import selectinload
+
+from app.models.models import User, Post, TokenBlocklist, PostStatus
+from app.models import queries
+from app.services.listing_service import StoryListing
+
+
+def feed(cached: bool):
+    listing = StoryListing.published().of_type('regret').order('smart')
+    key_columns = listing._sort_keys() + [Post.id]
+    if cached:
+        return listing._statement('offset', lambda: listing._offset_query(key_columns))
+    return listing._offset_query(key_columns)
+
+
+def feed_count(cached: bool):
+    listing = StoryListing.published().of_type('regret').order('smart')
+    build = lambda: listing._from(select(func.count()).select_from(Post))
+    return listing._statement('count', build) if cached else build()
+
+
+# name -> (inline builder as the routes used to write it, prebuilt statement)
+QUERIES = {
+    'token revoked': (
+        lambda: select(TokenBlocklist).where(TokenBlocklist.jti == 'jti-value'),
+        lambda: queries.TOKEN_IS_REVOKED,
+    ),
+    'user by public id': (
+        lambda: select(User).where(User.public_id == 'user-id'),
+        lambda: queries.USER_BY_PUBLIC_ID,
+    ),
+    'user by email': (
+        lambda: select(User).where(User.email == 'a@b.com'),
+        lambda: queries.USER_BY_EMAIL,
+    ),
+    'user by username': (
+        lambda: select(User).where(User.username == 'name'),
+        lambda: queries.USER_BY_USERNAME,
+    ),
+    'post ref': (
+        lambda: select(Post.id, Post.status, Post.user_id, Post.author_token).where(Post.public_id == 'story-id'),
+        lambda: queries.POST_REF_BY_PUBLIC_ID,
+    ),
+    'user ref': (
+        lambda: select(User.id, User.is_active).where(User.public_id == 'user-id'),
+        lambda: queries.USER_REF_BY_PUBLIC_ID,
+    ),
+    'story with author': (
+        lambda: select(Post).options(selectinload(Post.author)).where(Post.public_id == 'story-id'),
+        lambda: queries.STORY_WITH_AUTHOR,
+    ),
+    'published story': (
+        lambda: select(Post).where(Post.public_id == 'story-id', Post.status == PostStatus.PUBLISHED.value),
+        lambda: queries.PUBLISHED_STORY,
+    ),
+    'feed page': (lambda: feed(False), lambda: feed(True)),
+    'feed count': (lambda: feed_count(False), lambda: feed_count(True)),
+}
+
+
+def per_call_us(build, repeat: int) -> float:
+    """Statement construction plus cache key generation, per call"""
+    build()._generate_cache_key()  # warm (fills the per-shape feed cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build()._generate_cache_key()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def compile_us(build, repeat: int) -> float:
+    dialect = postgresql.asyncpg.dialect()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build().compile(dialect=dialect)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(repeat: int):
+    print(f"{'query':<20} {'inline us':>10} {'prebuilt us':>12} {'full compile us':>16}")
+    inline_total = prebuilt_total = 0.0
+    for name, (inline, prebuilt) in QUERIES.items():
+        inline_us = per_call_us(inline, repeat)
+        prebuilt_us = per_call_us(prebuilt, repeat)
+        full_us = compile_us(inline, max(1, repeat // 10))
+        inline_total += inline_us
+        prebuilt_total += prebuilt_us
+        print(f"{name:<20} {inline_us:10.1f} {prebuilt_us:12.1f} {full_us:16.1f}")
+    print(f"{'total':<20} {inline_total:10.1f} {prebuilt_total:12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,101 @@
+"""
+Benchmark: random-order feed page vs. category size
+
+Compares one page of unsent letters ordered by ORDER BY random() (reads and
+sorts the whole category) with the seeded shuffle over the cached id list
+(FeedSnapshots.shuffled_page: per_page permutation lookups plus an id IN
+query), on SQLite files of growing size. The snapshot is built once
+before timing, as the refresher would.
+
+Run:
+    cd backend
+    python benchmarks/random_feed.py --sizes 1000 10000 100000 --repeat 50
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.database import Base
+from app.models.models import User, Post
+from app.services.feed_service import FeedSnapshots
+from app.services.listing_service import StoryListing
+
+
+async def seed_database(engine, stories: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"public_id": "bench-user", "email": "bench@example.com", "username": "bench", "password_hash": "x"}])
+        start = datetime(2024, 1, 1)
+        await conn.execute(insert(Post), [
+            {
+                "public_id": f"letter-{i}",
+                "title": f"Letter {i}",
+                "content": "word " * 200,
+                "excerpt": "word " * 40,
+                "story_type": "unsent_letter",
+                "status": "published",
+                "published_at": start + timedelta(minutes=i),
+                "user_id": 1,
+            }
+            for i in range(stories)
+        ])
+
+
+async def timed(fetch, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fetch()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+async def run(stories: int, per_page: int, repeat: int) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        await seed_database(engine, stories)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        snapshots = FeedSnapshots(random_size=stories)
+
+        async with sessions() as db:
+            await snapshots.get(db, 'unsent_letter', 'random')
+
+            async def order_by_random():
+                await StoryListing.published().of_type('unsent_letter').order('random').fetch(db, per_page=per_page)
+                db.expunge_all()
+
+            async def shuffled():
+                await snapshots.shuffled_page(db, 'unsent_letter', seed=12345, page=3, per_page=per_page)
+                db.expunge_all()
+
+            result = await timed(order_by_random, repeat), await timed(shuffled, repeat)
+        await engine.dispose()
+        return result
+
+
+def main(sizes, per_page: int, repeat: int):
+    print(f"{'stories':>9} {'ORDER BY random() ms':>21} {'seeded shuffle ms':>18}")
+    for stories in sizes:
+        random_ms, shuffled_ms = asyncio.run(run(stories, per_page, repeat))
+        print(f"{stories:9d} {random_ms:21.2f} {shuffled_ms:18.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.sizes, args.per_page, args.repeat)
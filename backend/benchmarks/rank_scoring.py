@@ -0,0 +1,145 @@
+"""
+Benchmark: batch rank scoring
+
+1. Scoring only, on synthetic columns (default 1M posts): the old per-row
+   Python formula vs. score_columns() with NumPy and without it.
+2. End to end on a SQLite file (default 100k posts): the old ORM loop
+   (load Post objects, set rank_score, flush) vs. RankScorer.run()
+   (columnar SELECT, one vectorized pass, chunked executemany UPDATE).
+
+Run:
+    cd backend
+    python benchmarks/rank_scoring.py --posts 1000000 --db-posts 100000
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.database import Base
+from app.models.models import User, Post, PostStatus
+from app.services.scoring_service import (
+    NUMPY_AVAILABLE, RankScorer, SCORE_INPUTS, score_columns, age_hours, get_formula, GRAVITY
+)
+
+
+NOW = datetime(2025, 6, 1)
+
+
+def synthetic(posts: int) -> tuple:
+    rng = random.Random(7)
+    columns = {
+        'save_count': [rng.randint(0, 50) for _ in range(posts)],
+        'support_count': [rng.randint(0, 200) for _ in range(posts)],
+        'view_count': [rng.randint(0, 10000) for _ in range(posts)],
+        'completion_rate': [rng.random() for _ in range(posts)],
+        'reread_count': [rng.randint(0, 20) for _ in range(posts)],
+    }
+    published = [NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 365)) for _ in range(posts)]
+    return columns, published
+
+
+def legacy_scores(columns, published):
+    """The loop recalculate_rank_scores used to run (minus the ORM)"""
+    scores = []
+    for save, support, views, published_at in zip(
+        columns['save_count'], columns['support_count'], columns['view_count'], published
+    ):
+        points = (save or 0) + (support or 0) + ((views or 0) / 10.0)
+        age = (NOW - published_at).total_seconds() / 3600 if published_at else 0
+        scores.append((points + 1) / pow(age + 2, GRAVITY))
+    return scores
+
+
+def timed(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<38} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def scoring_only(posts: int, formula: str):
+    print(f"scoring only: {posts:,} posts, formula '{formula}'")
+    columns, published = synthetic(posts)
+    score = get_formula(formula)
+    if formula == 'gravity':
+        timed("per-row Python (old loop)", lambda: legacy_scores(columns, published))
+    timed("score_columns, pure Python", lambda: score_columns(
+        dict(columns, age_hours=age_hours(published, NOW, False)), score, use_numpy=False))
+    if NUMPY_AVAILABLE:
+        timed("score_columns, NumPy", lambda: score_columns(
+            dict(columns, age_hours=age_hours(published, NOW, True)), score, use_numpy=True))
+    else:
+        print("  (numpy not installed)")
+
+
+async def seed_database(engine, posts: int):
+    columns, published = synthetic(posts)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"public_id": "bench-user", "email": "bench@example.com",
+                                           "username": "bench", "password_hash": "x"}])
+        rows = [
+            dict({name: columns[name][i] for name in SCORE_INPUTS},
+                 public_id=f"post-{i}", title="Bench", content="Bench story", status=PostStatus.PUBLISHED.value,
+                 story_type="other", published_at=published[i], user_id=1)
+            for i in range(posts)
+        ]
+        for start in range(0, posts, 10000):
+            await conn.execute(insert(Post), rows[start:start + 10000])
+
+
+async def legacy_run(db):
+    stories = (await db.execute(select(Post).where(Post.status == PostStatus.PUBLISHED.value))).scalars().all()
+    for story in stories:
+        points = (story.save_count or 0) + (story.support_count or 0) + ((story.view_count or 0) / 10.0)
+        age = (NOW - story.published_at).total_seconds() / 3600 if story.published_at else 0
+        story.rank_score = (points + 1) / pow(age + 2, GRAVITY)
+        story.last_ranked_at = NOW
+    await db.commit()
+
+
+async def end_to_end(posts: int, formula: str, skip_legacy: bool):
+    print(f"\nend to end on SQLite: {posts:,} posts")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        await seed_database(engine, posts)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        runs = [("RankScorer.run", lambda db: RankScorer(formula).run(db, now=NOW))]
+        if not skip_legacy:
+            runs.insert(0, ("ORM loop (old recalculate_rank_scores)", legacy_run))
+        for label, run in runs:
+            async with sessions() as db:
+                start = time.perf_counter()
+                await run(db)
+                print(f"  {label:<38} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        await engine.dispose()
+
+
+def main(posts: int, db_posts: int, formula: str, skip_legacy: bool):
+    scoring_only(posts, formula)
+    if db_posts:
+        asyncio.run(end_to_end(db_posts, formula, skip_legacy))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--db-posts", type=int, default=100_000, help="0 skips the end-to-end run")
+    parser.add_argument("--formula", default="gravity")
+    parser.add_argument("--skip-legacy", action="store_true", help="don't time the ORM loop")
+    args = parser.parse_args()
+    main(args.posts, args.db_posts, args.formula, args.skip_legacy)
@@ -0,0 +1,167 @@
+"""
+Benchmark: pooled connections held per read request under load
+
+Runs concurrent GET /api/posts requests against the app (in-process, ASGI
+transport) on a temp SQLite file behind a queue pool, once with the old
+read path (get_db: transactional session, COMMIT after the handler, held
+until the dependency exits) and once with get_read_db (AUTOCOMMIT, lazy
+connection, closed before the response is built). Reports connection hold
+time per request, average and peak connections checked out and COMMITs
+issued.
+
+Run:
+    cd backend
+    python benchmarks/read_connections.py --stories 100 --requests 500 --concurrency 20
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.main import app
+from app.core.database import Base, SessionRouter, get_db, get_read_db, read_session_maker
+from app.models.models import User, Post
+
+
+class PoolProbe:
+    """Records checkout -> checkin time and peak concurrency for one pool"""
+
+    def __init__(self, engine):
+        self.holds = []
+        self.checked_out = 0
+        self.peak = 0
+        self.commits = 0
+        self._started = {}
+        pool = engine.sync_engine.pool
+        event.listen(pool, "checkout", self._checkout)
+        event.listen(pool, "checkin", self._checkin)
+        event.listen(engine.sync_engine, "commit", self._commit)
+
+    def reset(self):
+        self.holds.clear()
+        self.peak = self.checked_out
+        self.commits = 0
+
+    def _checkout(self, dbapi_connection, record, proxy):
+        self._started[id(record)] = time.perf_counter()
+        self.checked_out += 1
+        self.peak = max(self.peak, self.checked_out)
+
+    def _checkin(self, dbapi_connection, record):
+        started = self._started.pop(id(record), None)
+        if started is not None:
+            self.holds.append((time.perf_counter() - started) * 1000)
+        self.checked_out -= 1
+
+    def _commit(self, connection):
+        self.commits += 1
+
+
+class HeldSession(AsyncSession):
+    """Old read path: the route's close() is ignored, the dependency releases"""
+
+    async def close(self):
+        pass
+
+
+async def seed(maker, stories: int):
+    async with maker() as db:
+        author = User(email="bench@gmail.com", username="benchuser", display_name="Bench Writer")
+        author.set_password("Bench@Pass123!")
+        db.add(author)
+        await db.flush()
+        now = datetime.utcnow()
+        db.add_all([
+            Post(
+                title=f"Story number {i}",
+                content="word " * 400,
+                excerpt="word " * 40,
+                status="published",
+                story_type="life_story",
+                user_id=author.id,
+                created_at=now - timedelta(hours=i),
+                published_at=now - timedelta(hours=i),
+            )
+            for i in range(stories)
+        ])
+        await db.commit()
+
+
+async def run(client, requests: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            response = await client.get("/api/posts?sort_by=latest&per_page=50")
+            assert response.status_code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def main(stories: int, requests: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}",
+            pool_size=concurrency,
+            max_overflow=0,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+        await seed(maker, stories)
+        probe = PoolProbe(engine)
+
+        held_maker = async_sessionmaker(engine, class_=HeldSession, expire_on_commit=False, autoflush=False)
+
+        async def transactional_db():
+            # get_db as it was: always COMMIT, connection held until exit
+            session = held_maker()
+            try:
+                yield session
+                await session.commit()
+            finally:
+                await AsyncSession.close(session)
+
+        read_db = SessionRouter(read_session_maker(engine)).read_db
+        print(f"stories: {stories}   requests: {requests}   concurrency: {concurrency}")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for label, dependency in (("get_db", transactional_db), ("get_read_db", read_db)):
+                app.dependency_overrides[get_read_db] = dependency
+                await run(client, concurrency, concurrency)  # warm up
+                probe.reset()
+                elapsed = await run(client, requests, concurrency)
+                holds = sorted(probe.holds)
+                print(
+                    f"{label:12} hold/request: mean {statistics.mean(holds):6.2f} ms"
+                    f"  p95 {holds[int(len(holds) * 0.95) - 1]:6.2f} ms"
+                    f"  avg checked out: {sum(holds) / 1000 / elapsed:5.1f}"
+                    f"  peak: {probe.peak:3}"
+                    f"  commits: {probe.commits:4}"
+                    f"  throughput: {requests / elapsed:7.1f} req/s"
+                )
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stories", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.stories, args.requests, args.concurrency))
@@ -0,0 +1,88 @@
+"""
+Benchmark: per-row serialization cost of a 100-item story page
+
+Compares the default path (Post.to_dict() -> jsonable_encoder -> JSONResponse)
+with the fast path (post_row() -> FastJSONResponse) on in-memory rows.
+
+Run:
+    cd backend
+    python benchmarks/serialization.py --rows 100 --repeat 200
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.models import User, Post
+from app.utils.serialization import FastJSONResponse, post_rows, ORJSON_AVAILABLE
+
+
+def build_page(rows: int) -> list:
+    author = User(public_id="bench-user", username="bench", display_name="Bench Writer")
+    now = datetime.utcnow()
+    return [
+        Post(
+            public_id=f"post-{i}",
+            title=f"Story number {i}",
+            content="word " * 400,
+            excerpt="word " * 40,
+            status="published",
+            story_type="life_story",
+            is_anonymous=i % 3 == 0,
+            tags=["bench", "story"],
+            reading_time=2,
+            view_count=i * 7,
+            is_featured=False,
+            created_at=now - timedelta(hours=i),
+            updated_at=now - timedelta(hours=i),
+            published_at=now - timedelta(hours=i),
+            support_count=i,
+            comment_count=i // 2,
+            author=author,
+        )
+        for i in range(rows)
+    ]
+
+
+def default_path(posts: list) -> bytes:
+    content = {"stories": [p.to_dict(include_content=False) for p in posts]}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast_path(posts: list) -> bytes:
+    return FastJSONResponse({"stories": post_rows(posts)}).body
+
+
+def measure(fn, posts: list, repeat: int) -> float:
+    fn(posts)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(posts)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(rows: int, repeat: int):
+    posts = build_page(rows)
+    before = measure(default_path, posts, repeat)
+    after = measure(fast_path, posts, repeat)
+
+    print(f"rows per page: {rows}   encoder: {'orjson' if ORJSON_AVAILABLE else 'stdlib json'}")
+    print(f"to_dict + jsonable_encoder: {before * 1e3:7.3f} ms/page  {before / rows * 1e6:6.2f} us/row")
+    print(f"post_row + FastJSONResponse: {after * 1e3:7.3f} ms/page  {after / rows * 1e6:6.2f} us/row")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,140 @@
+"""
+Load test: server memory per live-reader connection, SSE vs WebSocket
+
+Starts a throwaway uvicorn worker on a temp SQLite database, opens N
+`/api/posts/{id}/live` SSE streams, then N `/ws` sockets joined to the
+same story, and reports the server's RSS growth per connection.
+
+Run (Linux, reads /proc for RSS):
+    cd backend
+    python benchmarks/sse_vs_ws_memory.py --connections 500
+
+Note: This file is not run by pytest.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import websockets
+
+
+PASSWORD = "Bench@Pass123!"
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/api/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def seed(base_url: str) -> tuple:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        response = await client.post("/api/auth/register", json={
+            "username": "benchuser", "email": "bench@gmail.com", "password": PASSWORD
+        })
+        token = response.json()["access_token"]
+        response = await client.post(
+            "/api/posts",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "title": "Benchmark story",
+                "content": "Benchmark content long enough to pass validation. " * 3,
+                "status": "published",
+            },
+        )
+        return token, response.json()["story"]["id"]
+
+
+async def open_sse(base_url: str, story_id: str, n: int):
+    client = httpx.AsyncClient(base_url=base_url, timeout=None, limits=httpx.Limits(max_connections=n + 10))
+    streams = []
+    for _ in range(n):
+        ctx = client.stream("GET", f"/api/posts/{story_id}/live")
+        response = await ctx.__aenter__()
+        streams.append(ctx)
+        # Read the retry + first count event so the stream is live server-side
+        async for _ in response.aiter_lines():
+            break
+    return client, streams
+
+
+async def open_ws(ws_url: str, token: str, story_id: str, n: int):
+    sockets = []
+    for _ in range(n):
+        ws = await websockets.connect(f"{ws_url}/ws?token={token}")
+        await ws.send(json.dumps({"type": "join_story", "story_id": story_id}))
+        sockets.append(ws)
+    return sockets
+
+
+async def main(connections: int, port: int):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        FLASK_ENV="production",
+        WS_MAX_CONNECTIONS=str(connections * 2 + 10),
+        WS_MAX_CONNECTIONS_PER_USER=str(connections + 10),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_until_up(base_url)
+        token, story_id = await seed(base_url)
+        await asyncio.sleep(0.5)
+
+        baseline = rss_kb(server.pid)
+        client, streams = await open_sse(base_url, story_id, connections)
+        await asyncio.sleep(1)
+        sse_kb = rss_kb(server.pid) - baseline
+        for ctx in streams:
+            await ctx.__aexit__(None, None, None)
+        await client.aclose()
+        await asyncio.sleep(3)
+
+        baseline = rss_kb(server.pid)
+        sockets = await open_ws(f"ws://127.0.0.1:{port}", token, story_id, connections)
+        await asyncio.sleep(1)
+        ws_kb = rss_kb(server.pid) - baseline
+        for ws in sockets:
+            await ws.close()
+
+        print(f"connections: {connections}")
+        print(f"SSE  /api/posts/{{id}}/live: {sse_kb:>8} KB total, {sse_kb / connections:6.1f} KB/conn")
+        print(f"WS   /ws                   : {ws_kb:>8} KB total, {ws_kb / connections:6.1f} KB/conn")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.port))
@@ -1,16 +1,17 @@
 import React from 'react';
-import { Heart, MessageCircle, Clock, Eye } from 'lucide-react';
+import { Heart, MessageCircle, Clock, Eye, Bookmark, CheckCircle2 } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import { storyTypes } from './StoryTypeSelector';
 import { sanitizeText } from '../utils/sanitize';
 import { formatRelativeDate } from '../utils/dateFormat';
 
-export default function StoryCard({ story, index = 0 }) {
+// `state`: the reader's reaction / bookmark / read progress (useMyStoryStates), if signed in
+export default function StoryCard({ story, index = 0, state }) {
     const storyType = storyTypes.find(t => t.value === story.story_type) || storyTypes[storyTypes.length - 1];
     const Icon = storyType.icon;
 
     // Get excerpt - one emotionally charged sentence
-    const safeContent = sanitizeText(story.content);
+    const safeContent = sanitizeText(story.excerpt || story.content || '');
     const firstSentence = safeContent.split(/[.!?]/)[0];
     const excerpt = firstSentence.length > 110
         ? firstSentence.substring(0, 110) + '…'
@@ -66,8 +67,17 @@ export default function StoryCard({ story, index = 0 }) {
 
                         {/* Quiet Interaction Counts */}
                         <div className="flex items-center gap-3 text-stone-400 dark:text-stone-500">
+                            {state?.read_progress?.completed && (
+                                <div className="flex items-center gap-1 text-emerald-600/80 dark:text-emerald-400/80" title="You finished this story">
+                                    <CheckCircle2 className="w-3.5 h-3.5" strokeWidth={1.5} />
+                                    <span className="text-[11px]">Read</span>
+                                </div>
+                            )}
+                            {state?.is_bookmarked && (
+                                <Bookmark className="w-3.5 h-3.5 text-amber-600/80 dark:text-amber-400/80" strokeWidth={1.5} fill="currentColor" aria-label="Saved" />
+                            )}
                             {story.support_count > 0 && (
-                                <div className="flex items-center gap-1">
+                                <div className={`flex items-center gap-1 ${state?.has_reacted ? 'text-rose-500 dark:text-rose-400' : ''}`} title={state?.has_reacted ? 'You reacted to this story' : undefined}>
                                     <Heart className="w-3.5 h-3.5 text-rose-500/80" strokeWidth={1.5} fill="currentColor" />
                                     <span className="text-[11px]">{story.support_count}</span>
                                 </div>
@@ -169,6 +169,7 @@ export function useToggleBookmark() {
         onSuccess: (_, storyId) => {
             queryClient.invalidateQueries({ queryKey: ['bookmarks'] });
             queryClient.invalidateQueries({ queryKey: ['story', storyId] });
+            queryClient.invalidateQueries({ queryKey: ['myStoryStates'] });
         },
     });
 }
@@ -190,6 +191,7 @@ export function useToggleReaction() {
         }),
         onSuccess: (_, { storyId }) => {
             queryClient.invalidateQueries({ queryKey: ['story', storyId] });
+            queryClient.invalidateQueries({ queryKey: ['myStoryStates'] });
         },
     });
 }
@@ -205,6 +207,22 @@ export function useMyReaction(storyId) {
     });
 }
 
+/**
+ * Get user's reaction, bookmark and read progress for a page of stories
+ * (one request for the whole feed instead of two per card)
+ */
+export function useMyStoryStates(storyIds = []) {
+    const ids = storyIds.slice(0, 100).join(',');
+    return useQuery({
+        queryKey: ['myStoryStates', ids],
+        queryFn: () => apiFetch(`/posts/my-state?ids=${encodeURIComponent(ids)}`),
+        select: (data) => data.states,
+        enabled: ids.length > 0,
+        // Story pages change these with plain fetch calls: refetch when the feed mounts again
+        staleTime: 0,
+    });
+}
+
 // ============================================================================
 // COMMENTS HOOKS
 // ============================================================================
@@ -86,6 +86,23 @@ export function WebSocketProvider({ children, userId }) {
                 }, ...prev.slice(0, 49)]); // Keep last 50 notifications
                 break;
 
+            case 'notifications': {
+                // Batched frame (live burst or offline inbox replay)
+                const now = Date.now();
+                const items = (data.items || []).map((item, i) => ({
+                    ...item,
+                    id: `${now}-${i}`,
+                    timestamp: new Date()
+                })).reverse();
+                setNotifications(prev => [...items, ...prev].slice(0, 50));
+
+                // Ack inbox chunks so the server can drop them and send the next
+                if (data.cursor && wsRef.current?.readyState === WebSocket.OPEN) {
+                    wsRef.current.send(JSON.stringify({ type: 'ack', cursor: data.cursor }));
+                }
+                break;
+            }
+
             case 'reader_count':
                 // Update reader count for a story
                 setReaderCounts(prev => ({
@@ -94,6 +111,13 @@ export function WebSocketProvider({ children, userId }) {
                 }));
                 break;
 
+            case 'ping':
+                // Server heartbeat - reply so the idle reaper keeps us
+                if (wsRef.current?.readyState === WebSocket.OPEN) {
+                    wsRef.current.send(JSON.stringify({ type: 'pong' }));
+                }
+                break;
+
             case 'pong':
                 // Heartbeat response
                 break;
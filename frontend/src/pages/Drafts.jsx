@@ -179,7 +179,7 @@ export default function Drafts() {
 
                                             {/* Excerpt */}
                                             <p className="text-sm text-gray-600 dark:text-gray-400 line-clamp-2 mb-3">
-                                                {draft.content?.substring(0, 150) || 'No content yet…'}
+                                                {(draft.excerpt || draft.content)?.substring(0, 150) || 'No content yet…'}
                                             </p>
 
                                             {/* Last Edited */}
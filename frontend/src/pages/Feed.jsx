@@ -1,10 +1,12 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useContext } from 'react';
 import { Link } from 'react-router-dom';
 import { Sparkles, TrendingUp, Star, BookOpen, Heart, Clock, ArrowDown } from 'lucide-react';
 import StoryCard from '../components/PostCard';
 import StoryTypeSelector from '../components/StoryTypeSelector';
 import StoryTypeShowcase from '../components/StoryTypeShowcase';
 import { getApiUrl } from '../config/api';
+import { useMyStoryStates } from '../config/queryHooks';
+import { AuthContext } from '../context/AuthContext';
 
 export default function Feed() {
     const [stories, setStories] = useState([]);
@@ -12,6 +14,10 @@ export default function Feed() {
     const [selectedCategory, setSelectedCategory] = useState('all');
     const [sortBy, setSortBy] = useState('smart');  // Default to smart ranking
     const [page, setPage] = useState(1);
+    const { user } = useContext(AuthContext);
+
+    // The reader's reaction, bookmark and progress for every card in one request
+    const { data: storyStates } = useMyStoryStates(user ? stories.map(story => story.id) : []);
 
     useEffect(() => {
         fetchStories();
@@ -30,7 +36,8 @@ export default function Feed() {
                 params.append('story_type', selectedCategory);
             }
 
-            const response = await fetch(getApiUrl(`/api/posts?${params}`));
+            // Cookies let the smart feed be personalized for a signed-in reader
+            const response = await fetch(getApiUrl(`/api/posts?${params}`), { credentials: 'include' });
             const data = await response.json();
             setStories(data.stories || []);
         } catch (error) {
@@ -211,7 +218,7 @@ export default function Feed() {
                                 <div className="flex flex-col gap-6">
                                     {stories.map((story, index) => (
                                         <div key={story.id} className="transform transition-all hover:z-10">
-                                            <StoryCard story={story} index={index} />
+                                            <StoryCard story={story} index={index} state={storyStates?.[story.id]} />
                                         </div>
                                     ))}
                                 </div>